@@ -0,0 +1,55 @@
+"""Cold and warm compiles through the compile cache.
+
+Compiles one generated program without a cache, then through an empty cache
+(which compiles and stores every phase), then again through the warm cache,
+where the TAC is loaded whole, and at another optimization level, where only
+the analyzed tree is reused. Reports each time and the size of the entries.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_compile_cache --size-mb 1
+"""
+import argparse
+import tempfile
+import time
+
+from zara.compile_cache import CompileCache
+from zara.compiler import compile_source
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    args = parser.parse_args()
+
+    code = HEADER + BODY * max(1, int(args.size_mb * 1024 * 1024 / len(BODY)))
+    other_level = 0 if args.opt_level else 1
+    with tempfile.TemporaryDirectory() as directory:
+        expected, uncached = timed(lambda: compile_source(code, opt_level=args.opt_level))
+        cache = CompileCache(directory)
+        _, cold = timed(lambda: compile_source(code, opt_level=args.opt_level, cache=cache))
+        size = cache.size()
+        quads, warm = timed(lambda: compile_source(code, opt_level=args.opt_level, cache=CompileCache(directory)))
+        if quads.rows() != expected.rows() or quads.constants != expected.constants:
+            raise AssertionError("the cached TAC differs from a fresh compile")
+        _, from_tree = timed(lambda: compile_source(code, opt_level=other_level, cache=CompileCache(directory)))
+
+    print(f"{len(code) / 1e6:.1f} MB of source, {len(expected)} instructions, {size / 1e6:.2f} MB cached")
+    print(f"no cache          {uncached:8.3f}s")
+    print(f"cold cache        {cold:8.3f}s")
+    print(f"warm, TAC hit     {warm:8.3f}s  {uncached / warm:6.1f}x")
+    print(f"warm, -O{other_level} from tree {from_tree:6.3f}s  {uncached / from_tree:6.1f}x")
+    for line in cache.report():
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""CFG construction and dataflow analysis time on large generated functions.
+
+Builds programs of growing instruction counts, then times building the CFG
+and solving liveness and reaching definitions over it. Time per instruction
+should stay roughly flat as the program grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dataflow --instructions 25000 50000 100000 200000
+"""
+import argparse
+import time
+
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.tac_generator import TACGenerator
+from zara.cfg import CFG
+from zara.dataflow import Liveness, ReachingDefinitions
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+def build_quads(instructions):
+    per_body = len(TACGenerator().generate(Parser(Lexer(HEADER + BODY).tokenize()).parse())) - 3
+    lexer = Lexer(HEADER + BODY * max(1, instructions // per_body))
+    return TACGenerator(names=lexer.names).generate(Parser(lexer.tokenize()).parse())
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instructions", type=int, nargs="+", default=[25000, 50000, 100000, 200000])
+    args = parser.parse_args()
+
+    print(f"{'instructions':>12} {'blocks':>8} {'cfg':>8} {'liveness':>9} {'reaching':>9} {'us/instr':>9} {'visits/block':>13}")
+    for size in args.instructions:
+        quads = build_quads(size)
+        count = len(quads)
+        cfg, cfg_seconds = timed(lambda: CFG.from_quads(quads))
+        liveness, live_seconds = timed(lambda: Liveness(cfg))
+        reaching, reach_seconds = timed(lambda: ReachingDefinitions(cfg))
+        total = cfg_seconds + live_seconds + reach_seconds
+        visits = (liveness.solution.visits + reaching.solution.visits) / (2 * len(cfg))
+        print(f"{count:12} {len(cfg):8} {cfg_seconds:7.2f}s {live_seconds:8.2f}s {reach_seconds:8.2f}s "
+              f"{total / count * 1e6:9.2f} {visits:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
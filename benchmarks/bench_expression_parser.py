@@ -0,0 +1,134 @@
+"""Precedence-climbing expression parsing against the recursive-descent version.
+
+Parses long operator chains, deeply nested parentheses and a generated
+program with Parser, whose expression() keeps an explicit stack, and with
+RecursiveExpressionParser, which recurses through one method per precedence
+level. Checks that both build the same trees, reports tokens per second, and
+reports the deepest nesting each can parse: the recursive parser stops at
+Python's recursion limit. Last, compiles the chain and the --depth nesting
+end to end, through semantic analysis and TAC generation, which walk
+operators with explicit stacks too.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_expression_parser --operands 100000 --depth 100000
+"""
+import argparse
+import gc
+import random
+import time
+
+from zara.ast_nodes import Node
+from zara.compiler import compile_source
+from zara.lexer import Lexer
+from zara.parser import Parser, RecursiveExpressionParser
+from benchmarks.workload import generate
+
+OPERATORS = ("+", "-", "*", "/", "<", "==")
+
+
+def chain(operands, seed):
+    """An expression of operands names joined by arithmetic, with a comparison and an equality test."""
+    rng = random.Random(seed)
+    parts = ["v0"]
+    comparisons = iter(OPERATORS[4:])
+    for index in range(1, operands):
+        op = rng.choice(OPERATORS[:4])
+        if index in (operands // 3, 2 * operands // 3):
+            op = next(comparisons)
+        parts += [op, f"v{index % 50}"]
+    return " ".join(parts) + ";"
+
+
+def nested(depth):
+    return "(" * depth + "x" + " + 1)" * depth + ";"
+
+
+def parse_expression(parser_class, tokens):
+    try:
+        return parser_class(tokens).expression()
+    except RecursionError:
+        return None
+
+
+def same_tree(first, second):
+    """Node equality without recursion, since a long chain builds a tree as deep as it is long."""
+    pairs = [(first, second)]
+    while pairs:
+        a, b = pairs.pop()
+        if isinstance(a, Node) or isinstance(b, Node):
+            if type(a) is not type(b):
+                return False
+            pairs.extend((getattr(a, field), getattr(b, field)) for field in a.fields)
+        elif isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                return False
+            pairs.extend(zip(a, b))
+        elif a != b:
+            return False
+    return True
+
+
+def best_time(function, repeat):
+    """Best seconds of repeat calls; trees are dropped and collected between calls, so none slows the next."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def deepest(parser_class, limit):
+    """Return the deepest nesting, up to limit, that parser_class parses, by bisection."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if parse_expression(parser_class, Lexer(nested(middle)).tokenize()) is not None:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operands", type=int, default=100000, help="operands in the operator chain")
+    parser.add_argument("--depth", type=int, default=100000, help="parentheses nested in the deepest expression")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'input':24} {'tokens':>8} {'recursive':>14} {'climbing':>14} {'speedup':>8}")
+    for name, code in (("operator chain", chain(args.operands, 0)), ("nested 200 deep", nested(200))):
+        tokens = Lexer(code).tokenize()
+        old, new = parse_expression(RecursiveExpressionParser, tokens), parse_expression(Parser, tokens)
+        if old is not None and not same_tree(old, new):
+            raise AssertionError(f"The parsers build different trees for the {name}")
+        del old, new
+        old_seconds = best_time(lambda: parse_expression(RecursiveExpressionParser, tokens), args.repeat)
+        new_seconds = best_time(lambda: parse_expression(Parser, tokens), args.repeat)
+        print(f"{name:24} {len(tokens):8} {len(tokens) / old_seconds:10,.0f} t/s {len(tokens) / new_seconds:10,.0f} t/s "
+              f"{old_seconds / new_seconds:7.2f}x")
+
+    code = generate(0, declarations=2000, blocks=500, expression_length=8, depth=3)
+    tokens = Lexer(code).tokenize()
+    if not same_tree(RecursiveExpressionParser(tokens).parse(), Parser(tokens).parse()):
+        raise AssertionError("The parsers build different trees for the generated program")
+    old_seconds = best_time(lambda: RecursiveExpressionParser(tokens).parse(), args.repeat)
+    new_seconds = best_time(lambda: Parser(tokens).parse(), args.repeat)
+    print(f"{'generated program':24} {len(tokens):8} {len(tokens) / old_seconds:10,.0f} t/s "
+          f"{len(tokens) / new_seconds:10,.0f} t/s {old_seconds / new_seconds:7.2f}x")
+
+    print(f"deepest nesting: recursive {deepest(RecursiveExpressionParser, args.depth)}, "
+          f"climbing {deepest(Parser, args.depth)} (of {args.depth} tried)")
+
+    declarations = "".join(f"int v{index} = {index};\n" for index in range(50)) + "int x = 1;\n"
+    for name, code in (("operator chain", chain(args.operands, 0)), (f"nested {args.depth} deep", nested(args.depth))):
+        program = declarations + "int result = " + code
+        seconds = best_time(lambda: compile_source(program), 1)
+        print(f"compile {name:24} {len(compile_source(program)):8} instructions in {seconds:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Cost of per-phase instrumentation on whole-file and streaming compiles.
+
+Compiles a generated source of --size-kb kilobytes with compile_source and
+compile_stream, without instrumentation, with it, and with it tracing memory,
+and reports the slowdown of each against the plain compile. Instrumentation
+that is off should cost nothing measurable; the phases of a streaming compile
+are entered once per statement, so that is where recording shows most.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_instrumentation --size-kb 512 --repeat 5
+"""
+import argparse
+import io
+import time
+
+from zara.compiler import compile_source, compile_stream
+from zara.instrumentation import Instrumentation
+from benchmarks.bench_streaming import HEADER, BODY
+
+MODES = ("off", "on", "memory")
+
+
+def instrumentation(mode):
+    return None if mode == "off" else Instrumentation(memory=mode == "memory")
+
+
+def whole(code, mode):
+    recorder = instrumentation(mode)
+    start = time.perf_counter()
+    compile_source(code, opt_level=2, instrumentation=recorder)
+    seconds = time.perf_counter() - start
+    if recorder is not None:
+        recorder.close()
+    return seconds
+
+
+def streamed(code, mode):
+    recorder = instrumentation(mode)
+    source = io.BytesIO(code.encode("utf-8"))
+    start = time.perf_counter()
+    compile_stream(source, io.StringIO(), instrumentation=recorder)
+    seconds = time.perf_counter() - start
+    if recorder is not None:
+        recorder.close()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=float, default=512)
+    parser.add_argument("--repeat", type=int, default=5, help="compiles per measurement; the best is shown")
+    args = parser.parse_args()
+    code = HEADER + BODY * max(1, int(args.size_kb * 1024 / len(BODY)))
+
+    print(f"{len(code) / 1024:.0f} KB source")
+    print(f"{'compile':8} " + " ".join(f"{mode:>16}" for mode in MODES))
+    for name, function in (("whole", whole), ("stream", streamed)):
+        best = {mode: min(function(code, mode) for _ in range(args.repeat)) for mode in MODES}
+        cells = [f"{best[mode]:8.3f}s {best[mode] / best['off'] - 1:+6.1%}" for mode in MODES]
+        print(f"{name:8} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
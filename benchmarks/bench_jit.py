@@ -0,0 +1,47 @@
+"""Speed of the tracing JIT against the plain bytecode VM.
+
+Runs the programs of bench_vm on VM and on TracingVM and reports both run
+times, the speedup, the effective instructions per second (counting the
+instructions the plain VM executes) and how many traces were compiled and
+entered.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_jit --scale 1 -O 2
+"""
+import argparse
+import time
+
+from zara.compiler import compile_source
+from zara.jit import TracingVM
+from zara.vm import VM, assemble
+from benchmarks.bench_vm import PROGRAMS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the iteration counts")
+    parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    args = parser.parse_args()
+
+    n = max(1, int(200000 * args.scale))
+    print(f"{'program':12} {'vm':>8} {'jit':>8} {'speedup':>8} {'jit instr/s':>13} {'traces':>7} {'entries':>8}")
+    for name, source in PROGRAMS.items():
+        bytecode = assemble(compile_source(source.format(n=n), opt_level=args.opt_level))
+        vm = VM(bytecode)
+        start = time.perf_counter()
+        expected = vm.run()
+        vm_seconds = time.perf_counter() - start
+
+        jit = TracingVM(bytecode)
+        start = time.perf_counter()
+        result = jit.run()
+        jit_seconds = time.perf_counter() - start
+        if result != expected:
+            raise AssertionError(f"{name}: the JIT gave {result}, the VM gave {expected}")
+        print(f"{name:12} {vm_seconds:7.3f}s {jit_seconds:7.3f}s {vm_seconds / jit_seconds:7.1f}x "
+              f"{vm.executed / jit_seconds:13,.0f} {len(jit.traces):7} {jit.trace_runs:8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""LALR(1) table cache and parser throughput.
+
+Builds the Zara tables from scratch, saves and reloads them through the disk
+cache, reports any conflicts, checks that LALRParser and the recursive-descent
+Parser build equal trees, and compares their parsing speed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_lalr --size-mb 1
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from zara.lalr import build_tables, load_or_build, LRParser
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.zara_grammar import GRAMMAR, terminal_of
+
+PROGRAM = '''
+class Counter {
+    int count;
+    Counter(int start) {
+        this.count = start;
+    }
+    int next(int step) {
+        this.count = this.count + step * 2;
+        return this.count;
+    }
+}
+int total = 0;
+array<int> values = [1, 2, 3];
+for (int i = 0; i < 10; i++) {
+    if (i > 5) {
+        total = total + values[i / 4];
+    } else if (i == 3) {
+        total = total - (i + 1) * 2;
+    } else {
+        print(total);
+    }
+}
+do {
+    total = total / 2;
+} while (total > 1);
+'''
+
+
+def syntax_examples():
+    with open("ZARA_SYNTAX.md") as f:
+        return re.findall(r"```zara\n(.*?)```", f.read(), re.S)
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tables, build_seconds = best_time(lambda: build_tables(GRAMMAR), args.repeat)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_or_build(GRAMMAR, cache_dir, "zara_grammar")
+        cached, load_seconds = best_time(lambda: load_or_build(GRAMMAR, cache_dir, "zara_grammar"), args.repeat)
+        size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+    if (cached.action, cached.goto) != (tables.action, tables.goto):
+        raise AssertionError("Cached tables differ from freshly built ones")
+
+    resolved = len(tables.conflicts) - len(tables.unresolved_conflicts())
+    print(f"Tables: {tables.nstates} states, {tables.nterminals} terminals, {tables.nnonterminals} nonterminals")
+    print(f"Conflicts: {resolved} resolved by precedence, {len(tables.unresolved_conflicts())} unresolved")
+    for conflict in tables.unresolved_conflicts():
+        print(f"  {conflict}")
+    print(f"Build: {build_seconds * 1000:.2f} ms  cached load: {load_seconds * 1000:.2f} ms  cache file: {size} bytes")
+
+    engine = LRParser(GRAMMAR, tables)
+    for code in syntax_examples() + [PROGRAM]:
+        tokens = Lexer(code).tokenize()
+        if engine.parse(tokens, terminal_of) != Parser(tokens).parse():
+            raise AssertionError(f"Parsers disagree on:\n{code}")
+    print("Both parsers build the same trees for the ZARA_SYNTAX.md examples")
+
+    code = PROGRAM * max(1, int(args.size_mb * 1024 * 1024 / len(PROGRAM)))
+    tokens = Lexer(code).tokenize()
+    _, recursive_seconds = best_time(lambda: Parser(tokens).parse(), args.repeat)
+    _, lalr_seconds = best_time(lambda: engine.parse(tokens, terminal_of), args.repeat)
+    print(f"Parse {len(tokens)} tokens: recursive descent {len(tokens) / recursive_seconds:,.0f} tokens/s, "
+          f"LALR(1) {len(tokens) / lalr_seconds:,.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Lexer throughput benchmark.
+
+Checks that the regex and legacy engines produce identical token streams on the
+same input, then reports the throughput of each engine in MB/s.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_lexer --size-mb 4
+"""
+import argparse
+import time
+
+from zara.lexer import Lexer
+
+SAMPLE = '''
+int x = 5;
+float y = 3.14;
+string greeting = "Hello, Zara!";
+string quoted = "say \\"hi\\"";
+if (x > 0) {
+    greeting = "Positive";
+} else {
+    y = y * 2 / (x - 1) + 0.5;
+}
+do {
+    x = x + 1;
+} while (x == 10);
+int 123abc = 3.14abc @ 7;
+'''
+
+
+def build_source(size_mb):
+    """Repeat the sample program until it reaches roughly size_mb megabytes."""
+    repeats = max(1, int(size_mb * 1024 * 1024 / len(SAMPLE)))
+    return SAMPLE * repeats
+
+
+def token_stream(tokens):
+    return [(token.type, type(token.value), token.value, token.start, token.end) for token in tokens]
+
+
+def check_engines_agree(code):
+    """Raise AssertionError if the engines disagree anywhere on code."""
+    regex_tokens = token_stream(Lexer(code, engine="regex").tokenize())
+    legacy_tokens = token_stream(Lexer(code, engine="legacy").tokenize())
+    if regex_tokens != legacy_tokens:
+        for index, (new, old) in enumerate(zip(regex_tokens, legacy_tokens)):
+            if new != old:
+                raise AssertionError(f"Token {index} differs: regex={new} legacy={old}")
+        raise AssertionError(f"Token counts differ: regex={len(regex_tokens)} legacy={len(legacy_tokens)}")
+    return len(regex_tokens)
+
+
+def time_engine(code, engine, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Lexer(code, engine=engine).tokenize()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=2.0, help="size of the generated source")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per engine (best is kept)")
+    args = parser.parse_args()
+
+    code = build_source(args.size_mb)
+    megabytes = len(code.encode("utf-8")) / (1024 * 1024)
+    token_count = check_engines_agree(code)
+    print(f"Source: {megabytes:.2f} MB, {token_count} tokens, engines agree")
+
+    results = {}
+    for engine in ("legacy", "regex"):
+        seconds = time_engine(code, engine, args.repeat)
+        results[engine] = seconds
+        print(f"{engine:>7}: {seconds:.3f} s  {megabytes / seconds:8.2f} MB/s")
+    print(f"Speedup: {results['legacy'] / results['regex']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Loop-invariant code motion and strength reduction on loop-heavy programs.
+
+Compiles each program at -O2 and at -O3, which adds the loop passes, and
+reports for both the instructions in the three-address code, the
+instructions the VM executes and the best VM run time, then how much -O3
+saves. Checks that both levels leave the variables with the same values.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_loops --scale 1
+"""
+import argparse
+import time
+
+from zara.compiler import compile_source
+from zara.vm import VM, assemble
+
+# Each program is formatted with n, its iteration count
+PROGRAMS = {
+    "invariant": '''
+int a = 7;
+int b = 3;
+int sum = 0;
+for (int i = 0; i < {n}; i++) {{
+    sum = sum + (a * b + a / 7) - (b * 5 - a);
+}}
+''',
+    "strided": '''
+int base = 100;
+int sum = 0;
+for (int i = 0; i < {n}; i++) {{
+    sum = sum + i * 8 + base;
+    sum = sum - i * 4;
+}}
+''',
+    "nested": '''
+int width = 64;
+int total = 0;
+for (int row = 0; row < {n} / 64; row++) {{
+    for (int col = 0; col < 64; col++) {{
+        total = total + (row * 64 + col) * 2 - width * 2;
+    }}
+}}
+''',
+    "do-while": '''
+int k = 5;
+int j = 0;
+int acc = 0;
+do {{
+    acc = acc + j * 3 + (k * k - 1);
+    j = j + 2;
+}} while (j < {n} * 2);
+''',
+}
+
+
+def measure(source, level, repeat):
+    """Return (three-address instructions, instructions executed, best seconds, variables) for one level."""
+    quads = compile_source(source, opt_level=level)
+    vm = VM(assemble(quads))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        values = vm.run()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return len(quads), vm.executed, best, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the iteration counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per program; the fastest is reported")
+    args = parser.parse_args()
+
+    n = max(64, int(200000 * args.scale))
+    print(f"{'program':10} {'TAC -O2':>8} {'-O3':>5} {'executed -O2':>13} {'-O3':>11} "
+          f"{'seconds -O2':>12} {'-O3':>7} {'saved':>9} {'speedup':>8}")
+    for name, source in PROGRAMS.items():
+        source = source.format(n=n)
+        size2, executed2, seconds2, values2 = measure(source, 2, args.repeat)
+        size3, executed3, seconds3, values3 = measure(source, 3, args.repeat)
+        if values2 != values3:
+            raise AssertionError(f"{name} ends with different values at -O2 and -O3")
+        print(f"{name:10} {size2:8} {size3:5} {executed2:13} {executed3:11} {seconds2:12.3f} {seconds3:7.3f} "
+              f"{1 - executed3 / executed2:8.1%} {seconds2 / seconds3:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Code size and optimizer time at each optimization level.
+
+Compiles one generated program at every level in optimizer.OPT_LEVELS and
+reports the instruction count, the time spent in the passes and the per-pass
+statistics of the highest level.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_optimizer --size-mb 0.5
+"""
+import argparse
+import time
+
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.tac_generator import TACGenerator
+from zara.optimizer import PassManager, OPT_LEVELS
+from benchmarks.bench_streaming import HEADER, BODY
+
+# Redundant arithmetic on top of the streaming benchmark's body, for folding and CSE to find
+EXTRA = '''x = 2 * 3 + x * 4 - x * 4;
+y = y * 2.0 + y * 2.0;
+s = "a" + "b";
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=0.5)
+    args = parser.parse_args()
+
+    unit = BODY + EXTRA
+    code = HEADER + unit * max(1, int(args.size_mb * 1024 * 1024 / len(unit)))
+    lexer = Lexer(code)
+    tree = Parser(lexer.tokenize()).parse()
+
+    baseline = None
+    for level in sorted(OPT_LEVELS):
+        generator = TACGenerator(names=lexer.names)
+        generator.generate(tree)
+        manager = PassManager(level)
+        start = time.perf_counter()
+        manager.run(generator.instructions)
+        seconds = time.perf_counter() - start
+        count = len(generator.instructions)
+        baseline = baseline or count
+        print(f"-O{level}: {count:9} instructions ({count / baseline:6.1%}), "
+              f"{manager.rounds} rounds in {seconds:.2f} s")
+    for line in manager.report():
+        print("  " + line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Run time of programs translated to Python, against the bytecode VM.
+
+Compiles the programs of bench_vm at one optimization level, then runs each on
+the VM and as Python code from python_backend. Reports the time to prepare
+each (assemble, or translate and compile), the run time and the speedup, and
+how long loading the compiled code back from its cached bytes takes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_python_backend --scale 1 -O 2
+"""
+import argparse
+import time
+
+from zara.compiler import compile_source
+from zara.python_backend import PythonProgram, compile_program
+from zara.vm import VM, assemble
+from benchmarks.bench_vm import PROGRAMS
+
+
+def timed(function, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the iteration counts")
+    parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per program; the fastest is reported")
+    args = parser.parse_args()
+
+    n = max(1, int(200000 * args.scale))
+    print(f"{'program':12} {'assemble':>9} {'vm run':>8} {'translate':>10} {'py run':>8} {'speedup':>8} "
+          f"{'cache load':>11}")
+    for name, source in PROGRAMS.items():
+        quads = compile_source(source.format(n=n), opt_level=args.opt_level)
+        vm, assemble_seconds = timed(lambda: VM(assemble(quads)))
+        expected, vm_seconds = timed(vm.run, args.repeat)
+        program, translate_seconds = timed(lambda: compile_program(quads))
+        result, python_seconds = timed(lambda: PythonProgram(program.code).run(), args.repeat)
+        if result != expected:
+            raise AssertionError(f"{name}: Python backend gave {result}, the VM gave {expected}")
+        data = program.dumps()
+        _, load_seconds = timed(lambda: PythonProgram.loads(data), args.repeat)
+        print(f"{name:12} {assemble_seconds * 1000:7.2f}ms {vm_seconds:7.3f}s {translate_seconds * 1000:8.2f}ms "
+              f"{python_seconds:7.3f}s {vm_seconds / python_seconds:7.1f}x {load_seconds * 1e6:9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
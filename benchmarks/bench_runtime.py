@@ -0,0 +1,92 @@
+"""Typed containers against lists of boxed Python objects.
+
+Times the bulk operations of runtime.ZaraArray and pushing and popping on
+runtime.ZaraStack against the same work done on plain lists, and compares the
+memory each needs for the elements. Reports which buffer backend (NumPy or the
+array module) is in use.
+
+With the array module, only fill, copy and slice come out faster than on a
+list; sum and elementwise arithmetic box every element they read and run at
+about half the speed of a list comprehension, and push/pop, one method call
+each, at a fraction of list.append and list.pop. What the typed buffer wins
+there is memory. The speedups of the bulk operations need NumPy.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_runtime --length 1000000
+"""
+import argparse
+import sys
+import time
+
+from zara import runtime
+from zara.runtime import ZaraArray, ZaraStack
+
+
+def timed(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def list_bytes(values):
+    """Bytes of a list and of the distinct objects it refers to."""
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in {id(v): v for v in values}.values())
+
+
+def push_pop_list(length):
+    stack = []
+    for value in range(length):
+        stack.append(float(value))
+    while stack:
+        stack.pop()
+
+
+def push_pop_stack(length):
+    stack = ZaraStack("float")
+    for value in range(length):
+        stack.push(float(value))
+    while not stack.is_empty():
+        stack.pop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--length", type=int, default=1000000)
+    args = parser.parse_args()
+    n = args.length
+    print(f"buffers: {'NumPy' if runtime.numpy is not None else 'array module'}, {n} elements")
+
+    values = [float(i) for i in range(n)]
+    boxed, other_boxed = list(values), list(values)
+    typed, other_typed = ZaraArray("float", values), ZaraArray("float", values)
+    cases = [
+        ("fill", lambda: [2.5] * n, lambda: typed.fill(2.5)),
+        ("copy", lambda: boxed.copy(), lambda: typed.copy()),
+        ("slice", lambda: boxed[n // 4:3 * n // 4], lambda: typed.slice(n // 4, 3 * n // 4)),
+        ("sum", lambda: sum(boxed), lambda: typed.sum()),
+        ("add scalar", lambda: [value + 1.5 for value in boxed], lambda: typed + 1.5),
+        ("add arrays", lambda: [a + b for a, b in zip(boxed, other_boxed)], lambda: typed + other_typed),
+        ("multiply", lambda: [a * b for a, b in zip(boxed, other_boxed)], lambda: typed * other_typed),
+    ]
+    print(f"{'operation':14} {'list':>9} {'typed':>9} {'speedup':>8}")
+    for name, on_list, on_typed in cases:
+        list_seconds, typed_seconds = timed(on_list), timed(on_typed)
+        print(f"{name:14} {list_seconds * 1000:7.2f}ms {typed_seconds * 1000:7.2f}ms "
+              f"{list_seconds / typed_seconds:7.1f}x")
+
+    stack_length = max(1, n // 10)
+    list_seconds = timed(lambda: push_pop_list(stack_length), 1)
+    typed_seconds = timed(lambda: push_pop_stack(stack_length), 1)
+    print(f"{'push/pop':14} {list_seconds * 1000:7.2f}ms {typed_seconds * 1000:7.2f}ms "
+          f"{list_seconds / typed_seconds:7.1f}x  ({stack_length} elements, one at a time)")
+
+    print(f"memory: list {list_bytes(boxed) / 1e6:.1f} MB, typed {typed.nbytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
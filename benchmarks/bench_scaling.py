@@ -0,0 +1,162 @@
+"""How the time and memory of each compiler phase scale with program size.
+
+Generates programs with benchmarks.workload at each --scales multiple of a
+base shape, and runs Lexer.tokenize, Parser.parse, SemanticAnalyzer.analyze
+and TACGenerator.generate over each one. Reports the best wall time of each
+phase over --repeat runs, its tracemalloc peak from one more run, and the
+scaling exponent of each phase: the slope of log time against log tokens,
+which is 1 for a phase linear in the input.
+
+With --baseline, the results are compared with ones saved before by
+--save-baseline, and the benchmark exits with status 1 if a phase got more
+than --tolerance slower or bigger at any size, or its exponent grew by more
+than 0.25. Timings only compare on the machine that saved them, so save a
+baseline where the check will run. Programs with --methods or --classes are
+only lexed and parsed, since semantic analysis does not support them yet.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scaling --scales 1 2 4 8 --save-baseline scaling.json
+    python -m benchmarks.bench_scaling --scales 1 2 4 8 --baseline scaling.json
+"""
+import argparse
+import json
+import math
+import sys
+
+from zara.instrumentation import Instrumentation
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.semantic_analyzer import SemanticAnalyzer
+from zara.symbol_table import SymbolTable
+from zara.tac_generator import TACGenerator
+from benchmarks.workload import generate
+
+PHASES = ("lex", "parse", "analyze", "generate")
+# Exponent growth that counts as a regression, whatever the timings
+EXPONENT_SLACK = 0.25
+
+
+def compile_phases(code, instrumentation, analyze=True):
+    """Run the phases of a compile over code, recording each one; return the number of tokens."""
+    phase = instrumentation.phase
+    with phase("lex"):
+        lexer = Lexer(code)
+        tokens = lexer.tokenize()
+    with phase("parse"):
+        tree = Parser(tokens).parse()
+    if analyze:
+        with phase("analyze"):
+            SemanticAnalyzer(SymbolTable(lexer.names)).analyze(tree)
+        with phase("generate"):
+            TACGenerator(names=lexer.names).generate(tree)
+    return len(tokens)
+
+
+def measure(code, repeat, analyze):
+    """Return {"kb", "tokens", "phases": {name: {"seconds", "peak_bytes"}}} for one program."""
+    seconds = {}
+    for _ in range(repeat):
+        timing = Instrumentation()
+        tokens = compile_phases(code, timing, analyze)
+        for name, phase in timing.phases.items():
+            seconds[name] = min(seconds.get(name, math.inf), phase.record.wall)
+    memory = Instrumentation(memory=True)
+    compile_phases(code, memory, analyze)
+    memory.close()
+    phases = {name: {"seconds": seconds[name], "peak_bytes": phase.record.peak}
+              for name, phase in memory.phases.items()}
+    return {"kb": len(code) / 1024, "tokens": tokens, "phases": phases}
+
+
+def exponent(points, name):
+    """Least-squares slope of log seconds against log tokens for a phase, or None with fewer than two sizes."""
+    pairs = [(math.log(point["tokens"]), math.log(point["phases"][name]["seconds"]))
+             for point in points if name in point["phases"]]
+    if len(pairs) < 2:
+        return None
+    mean_x = sum(x for x, _ in pairs) / len(pairs)
+    mean_y = sum(y for _, y in pairs) / len(pairs)
+    spread = sum((x - mean_x) ** 2 for x, _ in pairs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in pairs) / spread if spread else None
+
+
+def regressions(results, baseline, tolerance, min_ms):
+    """Return a line for each phase and size that is worse than in baseline."""
+    if baseline["settings"] != results["settings"]:
+        return [f"the baseline was saved with other settings: {baseline['settings']}"]
+    found = []
+    saved = {point["scale"]: point for point in baseline["points"]}
+    for point in results["points"]:
+        before = saved.get(point["scale"])
+        if before is None:
+            continue
+        for name, now in point["phases"].items():
+            then = before["phases"].get(name)
+            if then is None:
+                continue
+            if now["seconds"] > then["seconds"] * (1 + tolerance) and now["seconds"] - then["seconds"] > min_ms / 1000:
+                found.append(f"{name} at scale {point['scale']}: {now['seconds'] * 1000:.1f} ms, "
+                             f"was {then['seconds'] * 1000:.1f} ms")
+            if now["peak_bytes"] > then["peak_bytes"] * (1 + tolerance):
+                found.append(f"{name} at scale {point['scale']}: peak {now['peak_bytes'] / 1024:.0f} KB, "
+                             f"was {then['peak_bytes'] / 1024:.0f} KB")
+    for name, now in results["exponents"].items():
+        then = baseline["exponents"].get(name)
+        if now is not None and then is not None and now > then + EXPONENT_SLACK:
+            found.append(f"{name} scales as tokens^{now:.2f}, was tokens^{then:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="multiples of the base shape's declarations and blocks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--declarations", type=int, default=200, help="top-level declarations at scale 1")
+    parser.add_argument("--blocks", type=int, default=50, help="top-level control statements at scale 1")
+    parser.add_argument("--expression-length", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--statements", type=int, default=4)
+    parser.add_argument("--methods", type=int, default=0, help="methods at scale 1")
+    parser.add_argument("--classes", type=int, default=0, help="classes at scale 1")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per size; the best is kept")
+    parser.add_argument("--baseline", help="JSON file from --save-baseline to check the results against")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown or growth (default 0.5)")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="slowdowns smaller than this are noise")
+    args = parser.parse_args()
+
+    settings = {name: getattr(args, name) for name in ("seed", "declarations", "blocks", "expression_length", "depth",
+                                                       "statements", "methods", "classes")}
+    analyze = not (args.methods or args.classes)
+    phases = PHASES if analyze else PHASES[:2]
+    print(f"{'scale':>5} {'KB':>7} {'tokens':>8} " + " ".join(f"{name + ' ms':>11} {'peak KB':>8}" for name in phases))
+    points = []
+    for scale in args.scales:
+        code = generate(args.seed, args.declarations * scale, args.expression_length, args.depth,
+                        args.blocks * scale, args.statements, args.methods * scale, args.classes * scale)
+        point = {"scale": scale, **measure(code, args.repeat, analyze)}
+        points.append(point)
+        cells = [f"{point['phases'][name]['seconds'] * 1000:11.2f} {point['phases'][name]['peak_bytes'] / 1024:8.0f}"
+                 for name in phases]
+        print(f"{scale:5} {point['kb']:7.0f} {point['tokens']:8} " + " ".join(cells))
+    exponents = {name: exponent(points, name) for name in phases}
+    print("exponents: " + ", ".join(f"{name} {value:.2f}" for name, value in exponents.items() if value is not None))
+
+    results = {"settings": settings, "points": points, "exponents": exponents}
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance, args.min_ms)
+        for line in found:
+            print(f"regression: {line}")
+        if found:
+            sys.exit(1)
+        print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
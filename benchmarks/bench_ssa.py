@@ -0,0 +1,76 @@
+"""How SSA construction, destruction and sparse conditional constant propagation scale.
+
+Generates programs with benchmarks.workload at each --scales multiple of a
+base shape (a program is one function, so these are functions of tens of
+thousands of instructions), compiles each to unoptimized TAC and reports the
+best time over --repeat runs of building its SSA form, of turning that back
+into TAC, and of the whole sccp pass, with the phis and values built and what
+the pass rewrote and removed. The last line gives each step's scaling
+exponent, the slope of log time against log tokens, which stays near 1 for a
+step that is near-linear. Checks that destruction gives back the TAC it
+started from.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ssa --scales 1 2 4 8 16
+"""
+import argparse
+import time
+
+from zara.compiler import compile_source
+from zara.lexer import Lexer
+from zara.optimizer import sparse_conditional_constants
+from zara.ssa import SSA
+from benchmarks.bench_scaling import exponent
+from benchmarks.workload import generate
+
+STEPS = ("build", "destruct", "sccp")
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="multiples of the base shape's declarations and blocks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--declarations", type=int, default=300, help="top-level declarations at scale 1")
+    parser.add_argument("--blocks", type=int, default=60, help="top-level control statements at scale 1")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size; the best is kept")
+    args = parser.parse_args()
+
+    print(f"{'scale':>5} {'tokens':>8} {'rows':>7} {'blocks':>6} {'phis':>6} {'values':>7} "
+          + " ".join(f"{name + ' ms':>11}" for name in STEPS) + f" {'rewritten':>9} {'removed':>7}")
+    points = []
+    for scale in args.scales:
+        code = generate(args.seed, args.declarations * scale, 5, args.depth, args.blocks * scale)
+        quads = compile_source(code)
+        rows = quads.rows()
+        seconds = {}
+        seconds["build"], form = best_time(lambda: SSA(rows), args.repeat)
+        seconds["destruct"], plain = best_time(form.destruct, args.repeat)
+        if plain != rows:
+            raise AssertionError(f"SSA destruction changed the TAC at scale {scale}")
+        seconds["sccp"], (optimized, rewrites) = best_time(lambda: sparse_conditional_constants(rows, quads),
+                                                           args.repeat)
+        tokens = len(Lexer(code).tokenize())
+        points.append({"tokens": tokens, "phases": {name: {"seconds": value} for name, value in seconds.items()}})
+        phis = sum(len(block) for block in form.phis)
+        print(f"{scale:5} {tokens:8} {len(rows):7} {len(form.cfg.blocks):6} {phis:6} {len(form.variables):7} "
+              + " ".join(f"{seconds[name] * 1000:11.2f}" for name in STEPS)
+              + f" {rewrites:9} {len(rows) - len(optimized):7}")
+    exponents = {name: exponent(points, name) for name in STEPS}
+    print("exponents: " + ", ".join(f"{name} {value:.2f}" for name, value in exponents.items() if value is not None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cold-start cost of the compiler for short-lived, one-shot compiles.
+
+Starts fresh interpreters that import zara.compiler under -X importtime and
+reports the import time of the package and the modules that take longest.
+It then times whole processes, against an empty interpreter: one that calls
+compile_source on one line, and `python -m zara` compiling a one-line file at
+-O0 as a user would. Checks that neither loads the parts that are meant to
+load on first use (the LALR parser, the optimizer, the backends, NumPy, and
+for compile_source argparse). Exits with status 1 if one is loaded, or if the
+import takes longer than --budget-ms.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --runs 10 --budget-ms 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMPILE = "from zara import compile_source; compile_source('int x = 1;')"
+# Modules a plain compile_source must not import
+DEFERRED = ("argparse", "numpy", "hashlib", "concurrent.futures", "zara.zara_grammar", "zara.lalr", "zara.optimizer",
+            "zara.loops", "zara.ssa", "zara.temp_allocator", "zara.vm", "zara.jit", "zara.python_backend",
+            "zara.runtime", "zara.compile_cache", "zara.zir")
+
+
+def import_times(statement):
+    """Return {module: (self microseconds, cumulative microseconds)} for one run of statement."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def wall_time(arguments):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *arguments], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def loaded_modules(statement, modules):
+    """Return those of modules that are imported once statement has run in a fresh interpreter."""
+    check = f"import sys\n{statement}\nprint(' '.join(m for m in {modules!r} if m in sys.modules), file=sys.stderr)"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return result.stderr.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="interpreters started per measurement; medians are shown")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if importing zara.compiler takes longer")
+    parser.add_argument("--top", type=int, default=8, help="modules to list by their own import time")
+    args = parser.parse_args()
+
+    runs = [import_times("import zara.compiler") for _ in range(args.runs)]
+    package = statistics.median(run["zara.compiler"][1] for run in runs) / 1000
+    own = {name: statistics.median(run.get(name, (0, 0))[0] for run in runs) for name in runs[0]}
+    print(f"import zara.compiler: {package:.1f} ms")
+    for name, microseconds in sorted(own.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:32} {microseconds / 1000:6.2f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "one.zara")
+        with open(path, "w") as f:
+            f.write("int x = 1;\n")
+        empty = statistics.median(wall_time(["-c", "pass"]) for _ in range(args.runs))
+        for name, arguments in (("compile_source of one line", ["-c", COMPILE]),
+                                ("python -m zara on a one-line file", ["-m", "zara", path])):
+            seconds = statistics.median(wall_time(arguments) for _ in range(args.runs))
+            print(f"{name:34} {seconds * 1000:6.1f} ms ({(seconds - empty) * 1000:.1f} ms over an empty interpreter)")
+
+        # The command line needs argparse; nothing else deferred should load at -O0
+        command_line = f"from zara.compiler import main\nmain([{path!r}])"
+        loaded = sorted(set(loaded_modules(COMPILE, DEFERRED))
+                        | set(loaded_modules(command_line, [m for m in DEFERRED if m != "argparse"])))
+    print(f"deferred modules loaded by a compile: {', '.join(loaded) or 'none'}")
+
+    failed = bool(loaded)
+    if args.budget_ms is not None and package > args.budget_ms:
+        print(f"import takes {package:.1f} ms, over the budget of {args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Peak memory of the streaming compile pipeline.
+
+Generates Zara sources of growing size, compiles each one with compile_stream
+(through an mmap) and reports the tracemalloc peak. The streaming peak should
+stay flat while the in-memory pipeline grows with the input. Each repeat of
+the body has literals of its own, so the constants of the program grow with
+it as the names do not.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_streaming --sizes-mb 1 2 4
+"""
+import argparse
+import mmap
+import os
+import tempfile
+import time
+import tracemalloc
+
+from zara.compiler import compile_source, compile_stream
+
+HEADER = '''int x = 0;
+float y = 1.5;
+string s = "a";
+'''
+
+BODY = '''x = x + 1 * (x - 2);
+if (x > 3) {
+    y = y * 2.0;
+} else {
+    s = "b";
+}
+do {
+    x = x - 1;
+} while (x > 0);
+'''
+
+
+class NullSink:
+    """Counts the TAC lines written to it and throws them away."""
+
+    def __init__(self):
+        self.lines = 0
+
+    def write(self, text):
+        self.lines += 1
+
+
+def numbered_body(number):
+    """BODY with a float and a string literal no other repeat has."""
+    return BODY.replace("2.0", f"{number}.5").replace('"b"', f'"b{number}"')
+
+
+def write_source(path, size_mb):
+    repeats = max(1, int(size_mb * 1024 * 1024 / len(BODY)))
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for number in range(repeats):
+            f.write(numbered_body(number))
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def stream_file(path):
+    sink = NullSink()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        compile_stream(source, sink)
+    return sink.lines
+
+
+def compile_file(path):
+    with open(path) as f:
+        return len(compile_source(f.read()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--in-memory", action="store_true", help="also measure compile_source for comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(directory, f"program_{size_mb}.zara")
+            write_source(path, size_mb)
+            lines, seconds, peak = measure(lambda: stream_file(path))
+            print(f"{size_mb:6.1f} MB  streaming: {lines} TAC lines in {seconds:.2f} s, peak {peak / 1024:.0f} KiB")
+            if args.in_memory:
+                count, seconds, peak = measure(lambda: compile_file(path))
+                print(f"{size_mb:6.1f} MB  in-memory: {count} TAC lines in {seconds:.2f} s, peak {peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
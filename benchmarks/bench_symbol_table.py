@@ -0,0 +1,102 @@
+"""Symbol lookups in deeply nested scopes.
+
+Compares SymbolTable, whose lookups index a binding array by interned id,
+against a chain of per-scope dicts searched from the innermost scope outward,
+which is what a lookup costs without the undo log. Then checks a whole
+program of deeply nested blocks with many declarations.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_symbol_table --depth 200 --names 20
+"""
+import argparse
+import time
+
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.symbol_table import SymbolTable
+from zara.semantic_analyzer import SemanticAnalyzer
+
+
+class ChainedScopes:
+    """Baseline: one dict per scope, looked up innermost first."""
+
+    def __init__(self):
+        self.scopes = [{}]
+
+    def push_scope(self):
+        self.scopes.append({})
+
+    def pop_scope(self):
+        self.scopes.pop()
+
+    def declare(self, name, symbol_type):
+        self.scopes[-1][name] = symbol_type
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+
+def workload(table, depth, names, lookups):
+    """Open depth scopes declaring names variables each, looking up outer-scope names at every level."""
+    outermost = [f"v0_{j}" for j in range(names)]
+    for level in range(depth):
+        table.push_scope()
+        for j in range(names):
+            table.declare(f"v{level}_{j}", "int")
+        for _ in range(lookups):
+            for name in outermost:
+                table.lookup(name)
+    for _ in range(depth):
+        table.pop_scope()
+
+
+def nested_source(depth, names):
+    """A program of depth nested if blocks, each declaring names variables and using the outermost ones."""
+    lines = []
+    for level in range(depth):
+        indent = "    " * level
+        lines.append(f"{indent}if (1 < 2) {{")
+        for j in range(names):
+            value = f"v0_{j} + {j}" if level else f"{j}"
+            lines.append(f"{indent}    int v{level}_{j} = {value};")
+    for level in reversed(range(depth)):
+        lines.append("    " * level + "}")
+    return "\n".join(lines) + "\n"
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=200)
+    parser.add_argument("--names", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+
+    count = args.depth * args.lookups * args.names
+    print(f"{args.depth} nested scopes, {args.names} declarations each, {count} lookups of outermost names")
+    for label, make in (("chained dicts", ChainedScopes), ("SymbolTable", SymbolTable)):
+        seconds = timed(lambda: workload(make(), args.depth, args.names, args.lookups))
+        print(f"  {label:13}: {seconds:6.3f} s  {count / seconds:12,.0f} lookups/s")
+
+    # Parsing recurses once per block, so keep whole programs within the recursion limit
+    depth = min(args.depth, 100)
+    code = nested_source(depth, args.names)
+    lexer = Lexer(code)
+    tree = Parser(lexer.tokenize()).parse()
+    table = SymbolTable(lexer.names)
+    seconds = timed(lambda: SemanticAnalyzer(table).analyze(tree))
+    print(f"Analyzed {depth} nested blocks with {depth * args.names} declarations in {seconds:.3f} s; "
+          f"{len(lexer.names)} interned names, {table.max_slots} storage slots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Memory and emit throughput of the columnar Quads store versus lists of lists.
+
+The baseline is TACGenerator as it was before Quads: one 4-element list per
+instruction, with t{n} and L{n} strings for temps and labels. Both generators
+translate the same syntax tree and must print the same TAC.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tac_ir --size-mb 1
+"""
+import argparse
+import time
+import tracemalloc
+
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.tac_generator import TACGenerator, format_instruction
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+class ListTACGenerator(TACGenerator):
+    """TACGenerator emitting [op, arg1, arg2, result] lists."""
+
+    def __init__(self):
+        super().__init__()
+        self.instructions = []
+
+    def new_temp(self):
+        self.temp_counter += 1
+        return f"t{self.temp_counter}"
+
+    def new_label(self):
+        self.label_counter += 1
+        return f"L{self.label_counter}"
+
+    def variable(self, name):
+        return name
+
+    def emit(self, op, arg1=None, arg2=None, result=None):
+        self.instructions.append([op, arg1, arg2, result])
+
+    def visit_Literal(self, node):
+        return f'"{node.value}"' if isinstance(node.value, str) else node.value
+
+
+def build_tree(size_mb):
+    code = HEADER + BODY * max(1, int(size_mb * 1024 * 1024 / len(BODY)))
+    lexer = Lexer(code)
+    return Parser(lexer.tokenize()).parse(), lexer.names
+
+
+def measure(make_generator, tree):
+    tracemalloc.start()
+    instructions = make_generator().generate(tree)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Time a second run without tracing, which slows allocation-heavy code unevenly
+    generator = make_generator()
+    start = time.perf_counter()
+    generator.generate(tree)
+    seconds = time.perf_counter() - start
+    return instructions, seconds, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tree, names = build_tree(args.size_mb)
+    lists, list_seconds, list_size = measure(ListTACGenerator, tree)
+    quads, quad_seconds, quad_size = measure(lambda: TACGenerator(names=names), tree)
+    count = len(quads)
+
+    if list(map(format_instruction, lists)) != list(map(format_instruction, quads)):
+        raise AssertionError("Quads and list-of-lists print different TAC")
+
+    print(f"{count} instructions, same TAC from both")
+    for label, seconds, size in (("list of lists", list_seconds, list_size), ("Quads", quad_seconds, quad_size)):
+        print(f"  {label:13}: {size / (1024 * 1024):7.2f} MiB  {size / count:6.1f} B/instruction  "
+              f"{count / seconds:12,.0f} instructions/s")
+    print(f"  Reduction: {list_size / quad_size:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
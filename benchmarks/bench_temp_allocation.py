@@ -0,0 +1,43 @@
+"""Temps before and after recycling, and the time recycling takes.
+
+Compiles one generated program at each optimization level, then recycles its
+temps with TempAllocator and reports how many distinct temps there were before
+and after, and how long the allocation took.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_temp_allocation --size-mb 0.5
+"""
+import argparse
+
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.tac_generator import TACGenerator
+from zara.optimizer import PassManager, OPT_LEVELS
+from zara.temp_allocator import TempAllocator
+from benchmarks.bench_optimizer import EXTRA
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=0.5)
+    args = parser.parse_args()
+
+    unit = BODY + EXTRA
+    code = HEADER + unit * max(1, int(args.size_mb * 1024 * 1024 / len(unit)))
+    lexer = Lexer(code)
+    tree = Parser(lexer.tokenize()).parse()
+
+    for level in sorted(OPT_LEVELS):
+        generator = TACGenerator(names=lexer.names)
+        quads = generator.generate(tree)
+        PassManager(level).run(quads)
+        allocator = TempAllocator()
+        allocator.run(quads)
+        print(f"-O{level}: {len(quads):9} instructions, {allocator.temps_before:8} temps before, "
+              f"{allocator.temps_after:3} after, {allocator.seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
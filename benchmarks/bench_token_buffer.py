@@ -0,0 +1,60 @@
+"""Memory of a list of Token objects versus a compact TokenBuffer.
+
+Both representations are built from the same source and checked to produce the
+same TAC through ParserWithTranslation before their footprint is compared.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_token_buffer --size-mb 4
+"""
+import argparse
+import time
+import tracemalloc
+
+from zara.lexer import Lexer
+from zara.symbol_table import SymbolTable
+from zara.tac_generator import ParserWithTranslation
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+def build_source(size_mb):
+    return HEADER + BODY * max(1, int(size_mb * 1024 * 1024 / len(BODY)))
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tokens = build()
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tokens, seconds, size
+
+
+def translate(tokens):
+    translator = ParserWithTranslation(tokens, SymbolTable())
+    translator.parse()
+    return list(translator.tac.instructions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    args = parser.parse_args()
+
+    code = build_source(args.size_mb)
+    token_list, list_seconds, list_size = measure(lambda: Lexer(code).tokenize())
+    token_buffer, buffer_seconds, buffer_size = measure(lambda: Lexer(code).tokenize_buffer())
+    count = len(token_list)
+
+    if translate(token_list) != translate(token_buffer):
+        raise AssertionError("TokenBuffer and token list translate to different TAC")
+
+    print(f"Source: {len(code) / (1024 * 1024):.2f} MB, {count} tokens, same TAC from both")
+    print(f"  list[Token]: {list_size / (1024 * 1024):8.2f} MiB  {list_size / count:6.1f} B/token  built in {list_seconds:.2f} s")
+    print(f"  TokenBuffer: {buffer_size / (1024 * 1024):8.2f} MiB  {buffer_size / count:6.1f} B/token  built in {buffer_seconds:.2f} s")
+    print(f"  Reduction: {list_size / buffer_size:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Vectorized elementwise loops against the same loops run element by element.
+
+Parses each loop of LOOPS, runs it through the vectorizer, and times it on
+arrays of --length elements both as a whole-array VectorLoop and as the scalar
+loop, checking that both leave the same values. The last loop carries a
+dependency from one iteration to the next and must stay scalar.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_vectorize --length 1000000
+"""
+import argparse
+import time
+
+from zara import runtime
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.runtime import ZaraArray
+from zara.ast_nodes import VectorLoop
+from zara.vectorizer import Vectorizer, run, run_scalar
+
+LOOPS = {
+    "multiply": "for (int i = 0; i < n; i++) { c[i] = a[i] * b[i]; }",
+    "axpy": "for (int i = 0; i < n; i++) { c[i] = k * a[i] + b[i]; }",
+    "stencil": "for (int i = 1; i < n - 1; i++) { c[i] = (a[i - 1] + a[i] + a[i + 1]) / 3.0; }",
+    "two statements": "for (int i = 0; i < n; i++) { c[i] = a[i] - b[i]; d[i] = c[i] * c[i]; }",
+    "prefix sum": "for (int i = 1; i < n; i++) { a[i] = a[i - 1] + b[i]; }",
+}
+
+
+def arrays(length):
+    values = [float(i % 1000) / 7.0 for i in range(length)]
+    variables = {name: ZaraArray("float", values) for name in "abcd"}
+    variables.update(n=length, k=2.5)
+    return variables
+
+
+def timed(function, node, variables):
+    start = time.perf_counter()
+    function(node, variables)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--length", type=int, default=1000000)
+    args = parser.parse_args()
+    print(f"buffers: {'NumPy' if runtime.numpy is not None else 'array module'}, {args.length} elements")
+
+    print(f"{'loop':16} {'scalar':>9} {'vector':>9} {'speedup':>8}")
+    vectorizer = Vectorizer()
+    for name, source in LOOPS.items():
+        loop = vectorizer.rewrite(Parser(Lexer(source).tokenize()).parse()).body[0]
+        if not isinstance(loop, VectorLoop):
+            print(f"{name:16} kept scalar")
+            continue
+        scalar, vector = arrays(args.length), arrays(args.length)
+        scalar_seconds = timed(run_scalar, loop, scalar)
+        vector_seconds = timed(run, loop, vector)
+        if any(scalar[array].tolist() != vector[array].tolist() for array in "abcd"):
+            raise AssertionError(f"{name}: the vectorized loop gave different values")
+        print(f"{name:16} {scalar_seconds:8.3f}s {vector_seconds:8.3f}s {scalar_seconds / vector_seconds:7.1f}x")
+    for line in vectorizer.report():
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Execution speed of the bytecode VM.
+
+Compiles a few Zara programs that spend their time in loops, arithmetic and
+branches, assembles them and runs them on the VM, reporting the instructions
+executed and instructions per second at each optimization level.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_vm --scale 1
+"""
+import argparse
+import time
+
+from zara.compiler import compile_source
+from zara.optimizer import OPT_LEVELS
+from zara.vm import VM, assemble
+
+# Each program is formatted with n, its iteration count
+PROGRAMS = {
+    "loop": '''
+int sum = 0;
+for (int i = 0; i < {n}; i = i + 1) {{
+    sum = sum + i;
+}}
+''',
+    "arithmetic": '''
+int a = 3;
+int b = 7;
+float x = 0.5;
+int i = 0;
+do {{
+    a = (a * 3 + b * 5 - 7) - (a * 3 + b * 5 - 7) + a + 1;
+    b = b * 2 - b;
+    x = x * 1.0001 + 0.25 * 2.0;
+    i = i + 1;
+}} while (i < {n});
+''',
+    "branches": '''
+int n = 27;
+int steps = 0;
+int i = 0;
+do {{
+    if (n / 2 * 2 == n) {{
+        n = n / 2;
+    }} else {{
+        n = n * 3 + 1;
+    }}
+    if (n == 1) {{
+        n = 27;
+    }}
+    steps = steps + 1;
+    i = i + 1;
+}} while (i < {n});
+''',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the iteration counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per program; the fastest is reported")
+    args = parser.parse_args()
+
+    n = max(1, int(200000 * args.scale))
+    print(f"{'program':12} {'level':>5} {'bytecode':>9} {'executed':>11} {'seconds':>8} {'instr/s':>12}")
+    for name, source in PROGRAMS.items():
+        for level in sorted(OPT_LEVELS):
+            vm = VM(assemble(compile_source(source.format(n=n), opt_level=level)))
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                vm.run()
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+            print(f"{name:12} {'-O' + str(level):>5} {len(vm.bytecode):9} {vm.executed:11} {best:8.3f} "
+                  f"{vm.executed / best:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
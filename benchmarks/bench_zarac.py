@@ -0,0 +1,86 @@
+"""Throughput of the zarac driver against the number of worker processes.
+
+Writes --files generated sources to a temporary directory and compiles them
+all with zarac.compile_all at each worker count, reporting files per second
+and the speedup and parallel efficiency over one worker. The worker counts
+default to the powers of two up to the number of CPUs.
+
+Then compiles --small-files distinct two-line sources with one worker three
+times: without a cache, into an empty --cache-dir (cold) and again from it
+(warm). A cold build should cost a constant amount more per file, and a warm
+one less than compiling from scratch.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_zarac --files 256 --size-kb 32 --small-files 3000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from zara.zarac import collect, compile_all
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+def worker_counts(cpus):
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=256)
+    parser.add_argument("--size-kb", type=float, default=32)
+    parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    parser.add_argument("--jobs", type=int, nargs="+", default=None, help="worker counts to try")
+    parser.add_argument("--small-files", type=int, default=3000, help="two-line files for the cache runs")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    jobs = args.jobs or worker_counts(cpus)
+    code = HEADER + BODY * max(1, int(args.size_kb * 1024 / len(BODY)))
+    with tempfile.TemporaryDirectory() as directory:
+        for number in range(args.files):
+            with open(os.path.join(directory, f"file{number:05}.zara"), "w") as f:
+                f.write(code)
+        tasks = [(source, output, args.opt_level, False, None) for source, output in collect([directory])]
+        print(f"{len(tasks)} files of {len(code) / 1024:.0f} KB, {cpus} CPUs")
+        print(f"{'workers':>7} {'seconds':>8} {'files/s':>8} {'speedup':>8} {'efficiency':>10}")
+        baseline = None
+        for count in jobs:
+            start = time.perf_counter()
+            failed = sum(result.status != "compiled" for result in compile_all(tasks, count))
+            seconds = time.perf_counter() - start
+            if failed:
+                raise AssertionError(f"{failed} files did not compile")
+            baseline = baseline or seconds
+            speedup = baseline / seconds
+            print(f"{count:7} {seconds:8.2f} {len(tasks) / seconds:8.1f} {speedup:7.2f}x {speedup / count:9.0%}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = os.path.join(directory, "sources")
+        os.mkdir(sources)
+        for number in range(args.small_files):
+            with open(os.path.join(sources, f"file{number:05}.zara"), "w") as f:
+                f.write(f"int x = {number};\nint y = x + {number};\n")
+        cache_dir = os.path.join(directory, "cache")
+        print(f"{args.small_files} two-line files, 1 worker")
+        for name, cache in (("no cache", None), ("cold cache", cache_dir), ("warm cache", cache_dir)):
+            # Each run writes new files, since replacing existing ones costs more on some file systems
+            pairs = collect([sources], os.path.join(directory, name.replace(" ", "-")))
+            tasks = [(source, output, args.opt_level, False, cache) for source, output in pairs]
+            start = time.perf_counter()
+            failed = sum(result.status != "compiled" for result in compile_all(tasks, 1))
+            seconds = time.perf_counter() - start
+            if failed:
+                raise AssertionError(f"{failed} files did not compile")
+            print(f"{name:>10} {seconds:8.2f} s {len(tasks) / seconds:8.1f} files/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Getting a compiled program ready to run: from source, from the compile cache and from a .zir file.
+
+Compiles one generated program, writes it as text TAC, as a warm compile
+cache entry and as a .zir file, then reports the best time over --repeat runs
+of each way of getting it back: compiling the source again, loading the
+cached TAC, opening the .zir file (which maps it, checks its CRC-32 and
+the byte fields and tables, but decodes nothing), reading one
+instruction from it, reading all its rows, and copying it into
+Quads. The last lines time the VM assembling its bytecode from fresh Quads
+and from the mapped file, which is what starting a run costs on a host that
+only has the .zir file. Checks that the file gives back the same rows,
+constants and names.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_zir --size-mb 1
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from zara import zir
+from zara.compile_cache import CompileCache
+from zara.compiler import compile_source
+from zara.vm import assemble
+from zara.zarac import write_output
+from benchmarks.bench_streaming import HEADER, BODY
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def open_and_read(path, read):
+    with zir.ZirFile(path) as program:
+        return read(program)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each step; the best is kept")
+    args = parser.parse_args()
+
+    code = HEADER + BODY * max(1, int(args.size_mb * 1024 * 1024 / len(BODY)))
+    with tempfile.TemporaryDirectory() as directory:
+        quads = compile_source(code, opt_level=args.opt_level)
+        tac_path, zir_path = os.path.join(directory, "program.tac"), os.path.join(directory, "program.zir")
+        write_output(tac_path, quads)
+        writing, _ = best_time(lambda: zir.write(zir_path, quads), args.repeat)
+        cache_dir = os.path.join(directory, "cache")
+        compile_source(code, opt_level=args.opt_level, cache=CompileCache(cache_dir))
+        cache_size = CompileCache(cache_dir).size()
+
+        with zir.ZirFile(zir_path) as program:
+            if (program.rows() != quads.rows() or list(program.names.names) != quads.names.names
+                    or [program.constant(i) for i in range(program.constant_count)] != quads.constants):
+                raise AssertionError("the .zir file differs from the program written to it")
+
+        steps = [
+            ("compile source", lambda: compile_source(code, opt_level=args.opt_level)),
+            ("load from cache", lambda: compile_source(code, opt_level=args.opt_level,
+                                                       cache=CompileCache(cache_dir))),
+            ("open .zir", lambda: open_and_read(zir_path, len)),
+            ("open, read one", lambda: open_and_read(zir_path, lambda program: program[len(program) // 2])),
+            ("open, read rows", lambda: open_and_read(zir_path, zir.ZirFile.rows)),
+            ("open, to Quads", lambda: open_and_read(zir_path, zir.ZirFile.to_quads)),
+            ("assemble Quads", lambda: assemble(quads)),
+            ("open, assemble", lambda: open_and_read(zir_path, assemble)),
+        ]
+        times = {name: best_time(step, args.repeat)[0] for name, step in steps}
+        sizes = {"source": len(code.encode("utf-8")), "text TAC": os.path.getsize(tac_path),
+                 "cache entries": cache_size, ".zir": os.path.getsize(zir_path)}
+
+    print(f"{sizes['source'] / 1e6:.1f} MB of source, {len(quads)} instructions at -O{args.opt_level}; "
+          + ", ".join(f"{name} {size / 1e6:.2f} MB" for name, size in sizes.items() if name != "source"))
+    print(f"write .zir         {writing * 1000:10.3f} ms")
+    compiling = times["compile source"]
+    for name, seconds in times.items():
+        print(f"{name:18} {seconds * 1000:10.3f} ms  {compiling / seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Seeded generator of valid Zara programs of a chosen size and shape.
+
+generate() returns the source of a program with the given number of top-level
+declarations, expressions of about expression_length operands, and blocks
+(if/else, do-while and for) nested depth deep. Every name is declared before
+it is used and every expression is well typed, so the program compiles
+cleanly. Loops count down counters nothing else assigns, and values grow at
+most linearly (a product always has a literal factor, a concatenation at most
+one variable), so the program also runs to the end. The same seed and shape
+always give the same program.
+
+Methods and classes make valid syntax, but semantic analysis does not support
+them yet, so programs that have any only go as far as the parser.
+
+Run from the repository root to write a program to standard output:
+
+    python -m benchmarks.workload --seed 1 --declarations 200 --depth 4
+"""
+import argparse
+import random
+
+TYPES = ("int", "float", "string")
+OPERATORS = {"int": "+-*", "float": "+-*", "string": "+"}
+INDENT = "    "
+
+
+class Workload:
+    """Writes one program; generate() is the way to use it."""
+
+    def __init__(self, seed, expression_length, depth, statements):
+        self.random = random.Random(seed)
+        self.expression_length = expression_length
+        self.depth = depth
+        self.statements = statements  # Statements in each block
+        self.lines = []
+        self.scopes = [{data_type: [] for data_type in TYPES}]  # Visible variables by type, innermost last
+        self.counter = 0  # Names are numbered so that no declaration hides another
+        self.counters = set()  # Loop counters, which are read but never assigned
+
+    def name(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, level, line):
+        self.lines.append(INDENT * level + line)
+
+    def visible(self, data_type):
+        return [name for scope in self.scopes for name in scope[data_type]]
+
+    def literal(self, data_type):
+        if data_type == "int":
+            return str(self.random.randrange(100))
+        if data_type == "float":
+            return f"{self.random.randrange(1000) / 10:.1f}"
+        return f'"{self.random.choice("abcdefgh")}"'
+
+    def operand(self, data_type):
+        names = self.visible(data_type)
+        if names and self.random.random() < 0.7:
+            return self.random.choice(names)
+        return self.literal(data_type)
+
+    def expression(self, data_type, length=None):
+        """Return an expression of data_type with about length operands, some of them parenthesized."""
+        if length is None:
+            length = max(1, self.expression_length + self.random.randint(-1, 1))
+        if data_type == "string":
+            parts = [self.literal(data_type) for _ in range(length)]
+            parts[self.random.randrange(length)] = self.operand(data_type)
+            return " + ".join(parts)
+        if length == 1:
+            return self.operand(data_type)
+        op = self.random.choice(OPERATORS[data_type])
+        if op == "*":
+            text = f"{self.expression(data_type, length - 1)} * {self.literal(data_type)}"
+        else:
+            left = self.random.randint(1, length - 1)
+            text = f"{self.expression(data_type, left)} {op} {self.expression(data_type, length - left)}"
+        return f"({text})" if self.random.random() < 0.3 else text
+
+    def condition(self):
+        data_type = self.random.choice(("int", "float"))
+        op = self.random.choice(("<", ">", "=="))
+        return f"{self.expression(data_type, max(1, self.expression_length // 2))} {op} {self.literal(data_type)}"
+
+    def declaration(self, level):
+        data_type = self.random.choice(TYPES)
+        value = self.expression(data_type)  # Before declaring, so the name is not used in its own initializer
+        name = self.name(data_type[0])
+        self.scopes[-1][data_type].append(name)
+        self.emit(level, f"{data_type} {name} = {value};")
+
+    def assignment(self, level):
+        targets = {data_type: [name for name in self.visible(data_type) if name not in self.counters]
+                   for data_type in TYPES}
+        data_type = self.random.choice(TYPES)
+        names = targets[data_type]
+        if not names:
+            self.declaration(level)
+            return
+        self.emit(level, f"{self.random.choice(names)} = {self.expression(data_type)};")
+
+    def block(self, level, depth):
+        """Write the statements of a block, one of which opens a nested block while depth is left."""
+        self.scopes.append({data_type: [] for data_type in TYPES})
+        nested = self.random.randrange(self.statements) if depth > 0 else -1
+        for index in range(self.statements):
+            if index == nested:
+                self.control(level, depth)
+            elif self.random.random() < 0.3:
+                self.declaration(level)
+            else:
+                self.assignment(level)
+        self.scopes.pop()
+
+    def control(self, level, depth):
+        """Write an if/else, a do-while or a for loop whose blocks nest depth deep, counting its own."""
+        kind = self.random.choice(("if", "do", "for"))
+        if kind == "if":
+            self.emit(level, f"if ({self.condition()}) {{")
+            self.block(level + 1, depth - 1)
+            if self.random.random() < 0.5:
+                self.emit(level, "} else {")
+                self.block(level + 1, depth - 1)
+            self.emit(level, "}")
+        elif kind == "do":
+            counter = self.name("c")
+            self.counters.add(counter)
+            self.emit(level, f"int {counter} = {self.random.randint(1, 3)};")
+            self.scopes[-1]["int"].append(counter)
+            self.emit(level, "do {")
+            self.block(level + 1, depth - 1)
+            self.emit(level + 1, f"{counter} = {counter} - 1;")
+            self.emit(level, f"}} while ({counter} > 0);")
+        else:
+            counter = self.name("i")
+            self.counters.add(counter)
+            self.emit(level, f"for (int {counter} = 0; {counter} < {self.random.randint(1, 3)}; {counter}++) {{")
+            self.scopes.append({"int": [counter], "float": [], "string": []})
+            self.block(level + 1, depth - 1)
+            self.scopes.pop()
+            self.emit(level, "}")
+
+    def method(self, level):
+        """Write a method over two parameters; its body does not see the program's variables."""
+        data_type = self.random.choice(("int", "float"))
+        first, second = self.name("p"), self.name("p")
+        self.emit(level, f"{data_type} {self.name('m')}({data_type} {first}, {data_type} {second}) {{")
+        scopes, self.scopes = self.scopes, [{"int": [], "float": [], "string": [], data_type: [first, second]}]
+        self.block(level + 1, min(self.depth, 2))
+        self.emit(level + 1, f"return {self.expression(data_type)};")
+        self.scopes = scopes
+        self.emit(level, "}")
+
+    def cls(self):
+        """Write a class with a field, a constructor and one method."""
+        name = self.name("C")
+        field = self.name("f")
+        self.emit(0, f"class {name} {{")
+        self.emit(1, f"int {field};")
+        self.emit(1, f"{name}(int value) {{")
+        self.emit(2, f"this.{field} = value;")
+        self.emit(1, "}")
+        self.method(1)
+        self.emit(0, "}")
+
+
+def generate(seed=0, declarations=100, expression_length=4, depth=2, blocks=20, statements=4, methods=0, classes=0):
+    """Return the source of a Zara program.
+
+    declarations and blocks are the top-level variable declarations and control
+    statements, in a shuffled order after the first few declarations; each block
+    holds statements statements, and blocks nest depth deep (1 for no nesting).
+    methods are top-level methods, and each of the classes holds a field, a
+    constructor and a method.
+    """
+    workload = Workload(seed, expression_length, depth, max(1, statements))
+    lead = min(declarations, 3)  # Give the first expressions some variables to use
+    items = ["declaration"] * (declarations - lead) + ["block"] * blocks
+    workload.random.shuffle(items)
+    for item in ["declaration"] * lead + items:
+        if item == "declaration":
+            workload.declaration(0)
+        else:
+            workload.control(0, max(1, depth))
+    for _ in range(methods):
+        workload.method(0)
+    for _ in range(classes):
+        workload.cls()
+    return "\n".join(workload.lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--declarations", type=int, default=100)
+    parser.add_argument("--expression-length", type=int, default=4, help="operands per expression, about")
+    parser.add_argument("--depth", type=int, default=2, help="nesting depth of if/do-while/for blocks (1 for none)")
+    parser.add_argument("--blocks", type=int, default=20, help="top-level control statements")
+    parser.add_argument("--statements", type=int, default=4, help="statements in each block")
+    parser.add_argument("--methods", type=int, default=0)
+    parser.add_argument("--classes", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.seed, args.declarations, args.expression_length, args.depth, args.blocks,
+                   args.statements, args.methods, args.classes), end="")
+
+
+if __name__ == "__main__":
+    main()
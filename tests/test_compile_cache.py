@@ -0,0 +1,37 @@
+"""Cache entries of the wrong shape are misses rather than errors.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import marshal
+import sys
+import tempfile
+import unittest
+import zlib
+
+from zara import compile_cache
+from zara.compile_cache import CompileCache
+from zara.compiler import compile_source
+
+SOURCE = "int x = 1 + 2;\n"
+
+
+class EntryShapeTest(unittest.TestCase):
+    def test_an_entry_of_any_other_shape_is_a_miss(self):
+        header = (compile_cache.FORMAT_VERSION, sys.byteorder)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = CompileCache(directory)
+            key, phase = cache.key(SOURCE), cache.tac_phase(0, False)
+            compile_source(SOURCE, cache=cache)
+            self.assertIsNotNone(cache.read(key, phase))
+            for fields in (7, {1: 2, 3: 4}, [*header, phase, b""], "abcd", (*header, phase),
+                           (*header, phase, None), (*header, phase, (1, 2)), (*header, "ast", b"")):
+                with open(cache.path(key, phase), "wb") as f:
+                    f.write(zlib.compress(marshal.dumps(fields)))
+                with self.subTest(fields=fields):
+                    self.assertIsNone(cache.load(key, phase))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Long operator chains and deep nesting, compiled end to end without recursion.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import tempfile
+import unittest
+
+from zara import vm
+from zara.compile_cache import CompileCache
+from zara.compiler import compile_source
+
+
+class DeepExpressionTest(unittest.TestCase):
+    def test_a_chain_of_100000_operands_compiles_and_runs(self):
+        quads = compile_source("int y = " + " + ".join(["1"] * 100000) + ";")
+        self.assertEqual(len(quads), 100000)
+        self.assertEqual(vm.run(quads), {"y": 100000})
+
+    def test_nesting_3000_deep_compiles_and_runs_through_the_cache(self):
+        source = "int z = " + "(1 + " * 3000 + "1" + ")" * 3000 + ";"
+        with tempfile.TemporaryDirectory() as directory:
+            cold = compile_source(source, opt_level=1, cache=CompileCache(directory))
+            cache = CompileCache(directory)
+            warm = compile_source(source, opt_level=2, cache=cache)  # Misses the TAC, loads the tree
+            self.assertEqual(cache.stats["ast"].hits, 1)
+        for quads in (cold, warm):
+            self.assertEqual(vm.run(quads), {"z": 3001})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Streamed tokens against the tokens of the whole source in memory.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import io
+import unittest
+
+from zara.lexer import Lexer, TokenType, stream_tokens
+
+SOURCES = [
+    'string s = "abc;\nint x = 1;\nstring t = "ok";\n',
+    'string a = "x\\"y";\nstring b = "p\\\n";\n"',
+    'int x = 1; "',
+]
+
+
+def spans(tokens):
+    return [(token.type, token.value, token.start, token.end) for token in tokens]
+
+
+class UnterminatedStringTest(unittest.TestCase):
+    def test_streamed_tokens_match_for_every_chunk_size(self):
+        for source in SOURCES:
+            expected = spans(Lexer(source).tokenize())
+            self.assertEqual(spans(Lexer(source, engine="legacy").tokenize()), expected)
+            for chunk_size in (1, 2, 3, 64):
+                with self.subTest(source=source, chunk_size=chunk_size):
+                    self.assertEqual(spans(stream_tokens(io.StringIO(source), chunk_size)), expected)
+
+    def test_an_unterminated_string_ends_at_its_line(self):
+        tokens = Lexer('string s = "abc;\nint x = 1;\n').tokenize()
+        self.assertEqual((tokens[3].type, tokens[3].value), (TokenType.UNKNOWN, '"abc;'))
+        self.assertEqual([token.value for token in tokens[4:]], ["int", "x", "=", 1, ";"])
+
+    def test_input_after_an_unterminated_string_is_not_held_back(self):
+        source = io.StringIO('string s = "abc;\nint x = 1;\n' + "int y = 2;\n" * 1000)
+        tokens = stream_tokens(source, 64)
+        for _ in range(10):
+            next(tokens)
+        self.assertLess(source.tell(), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+"""Constant folding against the values the program computes unoptimized.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import math
+import unittest
+
+from zara import vm
+from zara.compiler import compile_source
+
+
+class FoldTest(unittest.TestCase):
+    def test_negative_zero_keeps_its_sign(self):
+        source = "float z = 0.0;\nfloat n = 0.0 * (0.0 - 1.0);\n"
+        for level in (0, 1, 2, 3):
+            with self.subTest(level=level):
+                values = vm.run(compile_source(source, opt_level=level))
+                self.assertEqual((values["z"], values["n"]), (0.0, 0.0))
+                self.assertEqual(math.copysign(1.0, values["z"]), 1.0)
+                self.assertEqual(math.copysign(1.0, values["n"]), -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
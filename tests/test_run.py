@@ -0,0 +1,42 @@
+"""Programs that fail as they run, on every backend.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from zara.compiler import main
+
+FAILING = {
+    "division by zero": "int a = 1;\nint z = 0;\nint q = a / z;\n",
+    "variable used before it is given a value": "int x;\nint y = x + 1;\n",
+    "array index out of range": "array<int> a = [1, 2];\nint y = a[5];\n",
+    "pop of an empty stack": "stack<int> s;\nint y = s.pop();\n",
+    "int too big for array<int>": "array<int> a = [4611686018427387904];\na[0] = a[0] * 4;\n",
+}
+
+
+class RuntimeErrorTest(unittest.TestCase):
+    def test_runtime_errors_are_reported_with_a_failing_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "program.zara")
+            for name, source in FAILING.items():
+                with open(path, "w") as f:
+                    f.write(source)
+                for backend in ("vm", "jit", "python"):
+                    with self.subTest(name, backend=backend):
+                        output, errors = io.StringIO(), io.StringIO()
+                        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+                            status = main([path, "--run", "--backend", backend])
+                        self.assertEqual(status, 1)
+                        self.assertEqual(output.getvalue(), "")
+                        self.assertTrue(errors.getvalue().startswith(f"{path}: runtime error: "), errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Vectorized loops against the scalar loops they replace.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from zara import vm
+from zara.compiler import compile_source
+from zara.runtime import ZaraArray, INT64_MIN, INT64_MAX
+from zara.tac_ir import OPCODE_OF
+from zara.vectorizer import loop_of, run, run_scalar
+
+PRODUCT = "for (int i = 0; i < n; i = i + 1) { c[i] = a[i] * b[i]; }"
+
+
+def int_arrays(left, right):
+    return {"n": len(left), "a": ZaraArray("int", left), "b": ZaraArray("int", right),
+            "c": ZaraArray("int", [0] * len(left))}
+
+
+class IntOverflowTest(unittest.TestCase):
+    """array<int> holds 64-bit ints, and NumPy wraps them around where the scalar loop raises OverflowError."""
+
+    def run_both(self, left, right):
+        """Run PRODUCT whole-array and element by element; return both results, or the error both raised."""
+        outcomes = []
+        for runner in (run, run_scalar):
+            variables = int_arrays(left, right)
+            try:
+                runner(loop_of(PRODUCT), variables)
+                outcomes.append(variables["c"].tolist())
+            except OverflowError:
+                outcomes.append((OverflowError, variables["c"].tolist()))
+        return outcomes
+
+    def test_overflowing_product_raises_as_the_scalar_loop_does(self):
+        big = 1 << 40
+        vector, scalar = self.run_both([3, big, 5], [7, big, 11])
+        self.assertEqual(vector, scalar)
+        self.assertEqual(vector, (OverflowError, [21, 0, 0]))
+
+    def test_products_near_the_limit_are_exact(self):
+        root = 3037000499  # root * root is just below 2**63
+        vector, scalar = self.run_both([root, -root, 2], [root, root, 3])
+        self.assertEqual(vector, scalar)
+        self.assertEqual(vector, [root * root, -root * root, 6])
+
+    def test_elementwise_operations_never_wrap(self):
+        cases = [("+", [INT64_MAX], [1]), ("-", [INT64_MIN], [1]), ("*", [1 << 32], [1 << 31]),
+                 ("/", [INT64_MIN], [-1])]
+        for op, left, right in cases:
+            with self.subTest(op=op), self.assertRaises(OverflowError):
+                ZaraArray("int", left).elementwise(op, ZaraArray("int", right))
+        with self.assertRaises(OverflowError):
+            ZaraArray("int", [1]).elementwise("+", 1 << 63)
+
+    def test_sum_raises_rather_than_wrap(self):
+        big = 1 << 62
+        with self.assertRaises(OverflowError):
+            ZaraArray("int", [big] * 3).sum()
+        self.assertEqual(ZaraArray("int", [INT64_MAX, 1, -1]).sum(), INT64_MAX)
+        self.assertEqual(ZaraArray("int", [INT64_MIN, INT64_MAX]).sum(), -1)
+        self.assertEqual(ZaraArray("int", []).sum(), 0)
+
+
+class CompiledVectorLoopTest(unittest.TestCase):
+    SOURCE = """
+        array<float> a = [1.0, 2.0, 3.0, 4.0];
+        array<float> c = [0.0, 0.0, 0.0, 0.0];
+        int n = a.length();
+        int j;
+        for (j = 1; j < n - 1; j++) { c[j] = (a[j - 1] + a[j] + a[j + 1]) / 3.0; }
+        for (int i = 0; i < n; i++) { a[i] = a[i] * 0.5 + 2.0; }
+    """
+
+    def test_o3_runs_vector_loops_with_the_results_of_scalar_loops(self):
+        vectorized = compile_source(self.SOURCE, opt_level=3)
+        self.assertEqual(list(vectorized.ops).count(OPCODE_OF['vector']), 2)
+        self.assertEqual(vm.run(vectorized), vm.run(compile_source(self.SOURCE)))
+
+
+if __name__ == "__main__":
+    unittest.main()
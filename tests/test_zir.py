@@ -0,0 +1,98 @@
+"""Damaged .zir files fail with ValueError when they are opened or read, never with another error.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from zara import zir
+from zara.compiler import compile_source, main
+
+SOURCE = """
+int x = 1;
+string s = "a";
+array<int> a = [1, 2];
+if (x > 0) { x = x + a[1]; } else { s = s + "b"; }
+"""
+
+
+def sealed(data):
+    """Return data with the CRC-32 in its header recomputed, as a writer with a bug would leave it."""
+    fields = list(zir.HEADER.unpack_from(data))
+    fields[-1] = zlib.crc32(data[zir.HEADER.size:], zlib.crc32(data[:zir.CHECKED_HEADER]))
+    return zir.HEADER.pack(*fields) + data[zir.HEADER.size:]
+
+
+class DamagedFileTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "program.zir")
+        self.good = zir.encode(compile_source(SOURCE))
+        (_, _, _, _, self.instructions, self.code, _, self.constants, _, self.label_table, _, self.string_table,
+         _, _) = zir.HEADER.unpack_from(self.good)
+
+    def opens(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+        try:
+            with zir.ZirFile(self.path) as program:
+                program.rows()
+                list(program)
+                program.to_quads()
+        except ValueError as error:
+            return str(error)
+        return None
+
+    def test_every_single_byte_change_is_found_or_harmless(self):
+        self.assertIsNone(self.opens(self.good))
+        padding = range(zir.CHECKED_HEADER + 4, zir.HEADER.size)  # After the CRC-32; never read
+        for position in range(len(self.good)):
+            data = bytearray(self.good)
+            data[position] ^= 0x10
+            with self.subTest(position=position):
+                if position in padding:
+                    self.assertIsNone(self.opens(bytes(data)))
+                else:  # Reported as damaged, or as another format or version for the first bytes
+                    self.assertIsNotNone(self.opens(bytes(data)))
+
+    def test_out_of_range_fields_with_a_matching_checksum(self):
+        size = zir.INSTRUCTION.size
+        cases = {
+            "unknown opcode": (self.code, 200),
+            "unknown operand kind": (self.code + 1, 7),
+            "out of range": (self.code + 4, 250),
+            "unknown constant type": (self.constants, 9),
+            "string offsets out of order": (self.string_table + 4, 255),
+            "label table does not match": (self.label_table + 4 * 1, 0),
+        }
+        for problem, (position, value) in cases.items():
+            data = bytearray(self.good)
+            if problem == "out of range":  # A name operand's index, past the last name
+                position = next(self.code + index * size + 4 for index in range(self.instructions)
+                                if data[self.code + index * size + 1] == zir.NAME)
+            data[position] = value
+            with self.subTest(problem):
+                self.assertIn(problem, self.opens(sealed(bytes(data))))
+
+    def test_the_command_line_reports_a_damaged_file(self):
+        data = bytearray(self.good)
+        data[self.code] ^= 0x10
+        with open(self.path, "wb") as f:
+            f.write(data)
+        for arguments in ([], ["--run"]):
+            errors = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(errors):
+                self.assertEqual(main([self.path, *arguments]), 1)
+            self.assertIn("damaged .zir file", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+"""The Zara compiler.
+
+Importing zara or any of its modules only defines names: no phase runs, and
+nothing is printed or built, until a compile is asked for. compile_source and
+compile_stream can be imported from here and load zara.compiler on first use.
+
+    python -m zara program.zara -O 2 --run
+    python -m zara.zarac src/ -j 8
+"""
+
+__all__ = ["compile_source", "compile_stream"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from zara import compiler
+        return getattr(compiler, name)
+    raise AttributeError(f"module 'zara' has no attribute {name!r}")
@@ -0,0 +1,6 @@
+"""python -m zara: compile one Zara file; see zara.compiler.main."""
+import sys
+
+from zara.compiler import main
+
+sys.exit(main())
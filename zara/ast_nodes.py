@@ -0,0 +1,140 @@
+"""Abstract syntax tree for Zara programs.
+
+Parser builds the tree once; SemanticAnalyzer and TACGenerator walk it as
+NodeVisitor subclasses. Nodes use __slots__ to keep large trees small. start
+and end are character offsets of the source the node came from, or None when
+the tokens carried no offsets.
+"""
+
+
+class Node:
+    __slots__ = ("start", "end")
+    fields = ()
+
+    def __init__(self, *values, start=None, end=None):
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+        self.start = start
+        self.end = end
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.fields)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{type(self).__name__}({values})"
+
+
+class Program(Node):
+    __slots__ = fields = ("body",)
+
+
+class VarDecl(Node):
+    __slots__ = fields = ("data_type", "name", "value")
+
+
+class Assign(Node):
+    # target is a Name, Member or Index node; x++ is parsed as x = x + 1
+    __slots__ = fields = ("target", "value")
+
+
+class ExprStatement(Node):
+    __slots__ = fields = ("expr",)
+
+
+class If(Node):
+    __slots__ = fields = ("condition", "body", "orelse")
+
+
+class DoWhile(Node):
+    __slots__ = fields = ("body", "condition")
+
+
+class For(Node):
+    # init is a VarDecl, an expression statement or None; condition and update may be None
+    __slots__ = fields = ("init", "condition", "update", "body")
+
+
+class VectorLoop(Node):
+    # A For loop that vectorizer proved runs as whole-array operations; loop is the original.
+    # statements are its Assign nodes, index runs from lower up to before upper, and declared
+    # is whether the loop header declares index rather than assigning an outer variable.
+    __slots__ = fields = ("loop", "index", "declared", "lower", "upper", "statements")
+
+
+class Return(Node):
+    __slots__ = fields = ("value",)
+
+
+class MethodDecl(Node):
+    # params is a list of (type, name) pairs; return_type is None for constructors
+    __slots__ = fields = ("return_type", "name", "params", "body")
+
+
+class ClassDecl(Node):
+    __slots__ = fields = ("name", "members")
+
+
+class BinOp(Node):
+    __slots__ = fields = ("op", "left", "right")
+
+
+class Literal(Node):
+    __slots__ = fields = ("value",)
+
+
+class Name(Node):
+    __slots__ = fields = ("id",)
+
+
+class Call(Node):
+    __slots__ = fields = ("func", "args")
+
+
+class Member(Node):
+    __slots__ = fields = ("obj", "name")
+
+
+class Index(Node):
+    __slots__ = fields = ("target", "index")
+
+
+class New(Node):
+    __slots__ = fields = ("class_name", "args")
+
+
+class ArrayLiteral(Node):
+    # data_type is None until SemanticAnalyzer sets the array type the literal makes
+    __slots__ = fields = ("elements", "data_type")
+
+
+# Node types that can appear on the left of '='
+LVALUES = (Name, Member, Index)
+
+
+class UnsupportedError(Exception):
+    """A construct the parser accepts that the compiler cannot translate, such as a method or a class."""
+
+
+class NodeVisitor:
+    """Calls visit_<NodeClass>(node) for each node passed to visit()."""
+
+    def visit(self, node):
+        method = getattr(self, "visit_" + type(node).__name__, None)
+        if method is None:
+            return self.generic_visit(node)
+        return method(node)
+
+    def generic_visit(self, node):
+        """Visit the child nodes of a node that has no visit_ method of its own."""
+        for name in node.fields:
+            value = getattr(node, name)
+            for child in value if isinstance(value, list) else (value,):
+                if isinstance(child, Node):
+                    self.visit(child)
+
+    def visit_Program(self, node):
+        for statement in node.body:
+            self.visit(statement)
+
@@ -0,0 +1,198 @@
+"""Control-flow graph of three-address code.
+
+CFG splits TAC into basic blocks: maximal runs of instructions entered only at
+the top and left only at the bottom. A block starts at the first instruction,
+at every label and after every jump. Blocks are connected by the jumps and by
+falling through to the next block.
+
+The CFG is built over rows from Quads.rows(), so block boundaries are
+instruction indices into those rows. The rows may be part of a program, as
+when a streaming compile works on one batch at a time; a jump to a label that
+is not among them leaves the graph, and a block starting with a label that no
+jump among them goes to may be entered by a jump from the rest (every label
+the generator makes but a do-while's has one jump to it).
+
+immediate_dominators() works on any graph given by successor and predecessor
+functions, so it serves for post-dominators (the dominators of the reversed
+graph) and for graphs with an extra node, as well as for a CFG itself.
+"""
+from zara.tac_ir import OPCODES, OPCODE_OF, VALUE_METHODS, VOID_METHODS, KIND_MASK, NAME, TEMP
+
+COPY, IF, GOTO, LABEL = OPCODE_OF['='], OPCODE_OF['if'], OPCODE_OF['goto'], OPCODE_OF['label']
+LOAD, STORE, NEW, VECTOR = OPCODE_OF['[]'], OPCODE_OF['[]='], OPCODE_OF['new'], OPCODE_OF['vector']
+BINARY = {OPCODE_OF[op] for op in ('+', '-', '*', '/', '>', '<', '==')}
+# Instructions assigning their result operand; a store reads it instead (a[i] = v changes a, not the variable a)
+ASSIGNING = {COPY, LOAD, NEW, VECTOR} | BINARY | {OPCODE_OF[op] for op in VALUE_METHODS}
+# The operand positions (1 arg1, 2 arg2, 3 result) each opcode reads
+READ_POSITIONS = [()] * len(OPCODES)
+for _op in BINARY | {LOAD} | {OPCODE_OF[op] for op in VOID_METHODS}:
+    READ_POSITIONS[_op] = (1, 2)
+for _op in {COPY, IF} | {OPCODE_OF[op] for op in VALUE_METHODS}:
+    READ_POSITIONS[_op] = (1,)
+READ_POSITIONS[STORE] = (1, 2, 3)
+READ_POSITIONS[NEW] = (2,)
+# A vector instruction reads the variables its loop names, which no operand shows. That is safe because the
+# passes only ever remove or rename temps, and its loop reads none.
+READ_POSITIONS = tuple(READ_POSITIONS)
+VARIABLE_KINDS = (NAME, TEMP)
+
+
+def reads(row):
+    """Return the variables (packed NAME or TEMP operands) an instruction reads."""
+    return [row[position] for position in READ_POSITIONS[row[0]] if row[position] & KIND_MASK in VARIABLE_KINDS]
+
+
+def writes(row):
+    """Return the variable an instruction assigns, or None."""
+    return row[3] if row[0] in ASSIGNING else None
+
+
+def reverse_postorder(entry, successors):
+    visited = {entry}
+    order = []
+    stack = [(entry, iter(successors(entry)))]
+    while stack:
+        node, remaining = stack[-1]
+        for successor in remaining:
+            if successor not in visited:
+                visited.add(successor)
+                stack.append((successor, iter(successors(successor))))
+                break
+        else:
+            stack.pop()
+            order.append(node)
+    order.reverse()
+    return order
+
+
+def immediate_dominators(entry, successors, predecessors):
+    """Return the immediate dominator of every node reachable from entry, and the nodes in reverse postorder.
+
+    This is the iterative algorithm of Cooper, Harvey and Kennedy.
+    """
+    order = reverse_postorder(entry, successors)
+    rank = {node: position for position, node in enumerate(order)}
+    idom = {entry: entry}
+
+    def intersect(first, second):
+        while first != second:
+            while rank[first] > rank[second]:
+                first = idom[first]
+            while rank[second] > rank[first]:
+                second = idom[second]
+        return first
+
+    changed = True
+    while changed:
+        changed = False
+        for node in order[1:]:
+            new = None
+            for predecessor in predecessors(node):
+                if predecessor in idom:
+                    new = predecessor if new is None else intersect(predecessor, new)
+            if idom.get(node) != new:
+                idom[node] = new
+                changed = True
+    return idom, order
+
+
+class BasicBlock:
+    # Instructions start to end - 1 of the rows; predecessors and successors are block indices
+    __slots__ = ("index", "start", "end", "predecessors", "successors")
+
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.predecessors = []
+        self.successors = []
+
+    def __repr__(self):
+        return f"BasicBlock({self.index}, {self.start}:{self.end}, successors={self.successors})"
+
+
+class CFG:
+    """Basic blocks of a list of TAC rows, with predecessor and successor edges."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.blocks = []
+        self.block_of_label = {}  # Packed label operand to the index of the block it starts
+        self.exits = []  # Blocks that can leave the rows, by running past the last one or jumping out
+        self.entries = []  # Blocks besides the first that jumps from outside the rows may enter
+
+        start = 0
+        count = len(rows)
+        targets = set()
+        for index in range(count):
+            op = rows[index][0]
+            if op == LABEL and index > start:
+                self.add_block(start, index)
+                start = index
+            if op == LABEL:
+                self.block_of_label[rows[index][1]] = len(self.blocks)
+            if op == IF or op == GOTO:
+                targets.add(rows[index][3])
+                self.add_block(start, index + 1)
+                start = index + 1
+        if start < count or not self.blocks:
+            self.add_block(start, count)
+
+        blocks = self.blocks
+        for block in blocks:
+            last = rows[block.end - 1] if block.end > block.start else None
+            op = last[0] if last is not None else None
+            leaves = False
+            if op == GOTO or op == IF:
+                target = self.block_of_label.get(last[3])
+                if target is not None:
+                    self.add_edge(block.index, target)
+                else:
+                    leaves = True
+            if op != GOTO:
+                if block.index + 1 < len(blocks):
+                    self.add_edge(block.index, block.index + 1)
+                else:
+                    leaves = True
+            if leaves:
+                self.exits.append(block.index)
+        self.entries = [index for label, index in self.block_of_label.items() if label not in targets and index]
+
+    @classmethod
+    def from_quads(cls, quads):
+        return cls(quads.rows())
+
+    def add_block(self, start, end):
+        self.blocks.append(BasicBlock(len(self.blocks), start, end))
+
+    def add_edge(self, source, target):
+        if target not in self.blocks[source].successors:
+            self.blocks[source].successors.append(target)
+            self.blocks[target].predecessors.append(source)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def postorder(self):
+        """Return the indices of the blocks reachable from the entry, in depth-first postorder."""
+        blocks = self.blocks
+        visited = bytearray(len(blocks))
+        order = []
+        visited[0] = 1
+        stack = [(0, iter(blocks[0].successors))]
+        while stack:
+            index, successors = stack[-1]
+            for successor in successors:
+                if not visited[successor]:
+                    visited[successor] = 1
+                    stack.append((successor, iter(blocks[successor].successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(index)
+        return order
+
+    def reverse_postorder(self):
+        order = self.postorder()
+        order.reverse()
+        return order
@@ -0,0 +1,354 @@
+"""On-disk cache of each compile phase's output, keyed by the content of the source.
+
+A CompileCache keeps files named after a SHA-256 key of the source text and of
+the compiler itself (the source of every module a compile runs), so editing
+either one misses the old entries rather than loading them. For each source it
+can hold three phases:
+
+    tokens  the token list and the identifier names
+    ast     the analyzed syntax tree; only error-free programs get one
+    tac     the TAC Quads, one per optimization level and temp recycling setting
+
+compile_source looks up the latest phase first, so a warm compile of an
+unchanged source only reads and decodes one file. Entries are marshalled
+tuples of plain values and typed-array bytes, compressed with zlib.
+
+Writes go to a temporary file that is then renamed over the entry, so
+processes sharing a cache never read a partial file, and an entry that is
+damaged or from another format version counts as a miss. The cache stays under
+max_bytes by deleting the least recently used entries; a hit updates its
+file's modification time, so every process sharing the directory sees the
+same order. Only files named like entries (ENTRY_NAME) are ever counted or
+deleted, so a cache directory can hold other files, and temporary files left
+by a writer that died are deleted once they are STALE_SECONDS old.
+
+Each CompileCache adds what it stores to a running estimate of the size and
+only scans the directory again when the estimate goes over max_bytes, so a
+store does not cost a listing of the whole cache. Stores by other processes
+are not in the estimate, so a shared cache can go over max_bytes by what they
+wrote since this process last scanned.
+"""
+import hashlib
+import marshal
+import os
+import re
+import sys
+import time
+import zlib
+from array import array
+
+from zara.lexer import Token, TokenType, TYPE_CODES, CODE_OF_TYPE, Interner
+from zara.ast_nodes import (Program, VarDecl, Assign, ExprStatement, If, DoWhile, For, VectorLoop, Return, MethodDecl,
+                       ClassDecl, BinOp, Literal, Name, Call, Member, Index, New, ArrayLiteral)
+from zara.tac_ir import Quads
+
+FORMAT_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# zlib level for entries: fast to write, and still several times smaller than the raw arrays
+COMPRESSION = 1
+# Files that are cache entries: a SHA-256 key and a phase name
+ENTRY_NAME = re.compile(r"[0-9a-f]{64}\.(?:tokens|ast|tac-O\d+(?:-recycled)?)")
+# Temporary files of entries are <entry>.<pid>.tmp; one this old was left by a writer that died
+TEMPORARY_NAME = re.compile(ENTRY_NAME.pattern + r"\.\d+\.tmp")
+STALE_SECONDS = 3600
+
+# Modules whose source decides what a compile produces
+COMPILER_MODULES = ("lexer", "parser", "zara_grammar", "lalr", "ast_nodes", "symbol_table", "semantic_analyzer",
+                    "container_types", "tac_ir", "tac_generator", "optimizer", "loops", "ssa", "cfg",
+                    "dataflow", "temp_allocator", "vectorizer", "compiler", "compile_cache")
+
+# Node classes by their code in an encoded tree
+NODE_TYPES = (Program, VarDecl, Assign, ExprStatement, If, DoWhile, For, VectorLoop, Return, MethodDecl, ClassDecl,
+              BinOp, Literal, Name, Call, Member, Index, New, ArrayLiteral)
+NODE_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+# Codes of the records of an encoded tree that are not nodes
+VALUE, LIST = -1, -2
+
+_compiler_version = None
+
+
+def compiler_version():
+    """Return a digest of the source of the compiler modules, computed once per process."""
+    global _compiler_version
+    if _compiler_version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for module in COMPILER_MODULES:
+            with open(os.path.join(directory, module + ".py"), "rb") as f:
+                digest.update(f.read())
+        _compiler_version = digest.hexdigest()
+    return _compiler_version
+
+
+def interner(identifiers):
+    """Return an Interner holding identifiers with the ids they had when they were cached."""
+    names = Interner()
+    for name in identifiers:
+        names.intern(name)
+    return names
+
+
+def encode_tokens(tokens, names):
+    values = [token.value for token in tokens]
+    types = bytes(CODE_OF_TYPE[token.type] for token in tokens)
+    starts = array('I', (token.start for token in tokens))
+    ends = array('I', (token.end for token in tokens))
+    return types, values, starts.tobytes(), ends.tobytes(), names.names
+
+
+def decode_tokens(data):
+    types, values, starts, ends, identifiers = data
+    names = interner(identifiers)
+    offsets = []
+    for column in (starts, ends):
+        offsets.append(array('I'))
+        offsets[-1].frombytes(column)
+    identifier, interned, ids = TokenType.IDENTIFIER, names.names, names.ids
+    tokens = []
+    for code, value, start, end in zip(types, values, *offsets):
+        token_type = TYPE_CODES[code]
+        if token_type is identifier:
+            value = interned[ids[value]]  # Share one string per name, as the lexer does
+        tokens.append(Token(token_type, value, start, end))
+    return tokens, names
+
+
+def encode_node(tree):
+    """Encode a tree as a flat list of records in postorder, so neither encoding nor marshal recurses.
+
+    A node becomes (code, start, end) after the records of its fields, a list (LIST, length)
+    after those of its items, and anything else (a name, a literal value, None or a
+    (type, name) parameter pair) (VALUE, value).
+    """
+    records = []
+    append = records.append
+    pending = [(tree, False)]
+    while pending:
+        value, fields_done = pending.pop()
+        if fields_done:
+            append((LIST, len(value)) if isinstance(value, list) else (NODE_CODES[type(value)], value.start, value.end))
+        elif isinstance(value, list):
+            pending.append((value, True))
+            pending += ((item, False) for item in reversed(value))
+        elif type(value) in NODE_CODES:
+            pending.append((value, True))
+            pending += ((getattr(value, field), False) for field in reversed(value.fields))
+        else:
+            append((VALUE, value))
+    return records
+
+
+def decode_node(records):
+    values = []
+    for record in records:
+        code = record[0]
+        if code == VALUE:
+            values.append(record[1])
+        elif code == LIST:
+            count = record[1]
+            items = values[len(values) - count:]
+            del values[len(values) - count:]
+            values.append(items)
+        else:
+            node_type = NODE_TYPES[code]
+            count = len(node_type.fields)
+            fields = values[len(values) - count:]
+            del values[len(values) - count:]
+            values.append(node_type(*fields, start=record[1], end=record[2]))
+    return values[0]
+
+
+def encode_quads(quads):
+    return (quads.ops.tobytes(), quads.kinds.tobytes(), quads.args.tobytes(), quads.names.names,
+            quads.constants)
+
+
+def decode_quads(data):
+    ops, kinds, args, identifiers, constants = data
+    quads = Quads(interner(identifiers))
+    quads.ops.frombytes(ops)
+    quads.kinds.frombytes(kinds)
+    quads.args.frombytes(args)
+    for value in constants:
+        quads.const(value)
+    return quads
+
+
+def encode(phase, value):
+    if phase == "tokens":
+        return encode_tokens(*value)
+    if phase == "ast":
+        tree, names = value
+        return encode_node(tree), names.names
+    return encode_quads(value)
+
+
+def decode(phase, data):
+    if phase == "tokens":
+        return decode_tokens(data)
+    if phase == "ast":
+        tree, identifiers = data
+        return decode_node(tree), interner(identifiers)
+    return decode_quads(data)
+
+
+class PhaseStats:
+    __slots__ = ("hits", "misses", "seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0  # Spent reading and decoding, on hits and misses alike
+
+
+class CompileCache:
+    """A directory of compile phase outputs with least-recently-used eviction."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {}  # Phase name to its PhaseStats
+        self.stores = 0
+        self.bytes_written = 0
+        self.evictions = 0
+        self.estimated_size = None  # Bytes in the directory at the last scan plus those stored since
+
+    def key(self, code):
+        """Return the key of a source string under the current compiler."""
+        digest = hashlib.sha256(compiler_version().encode("ascii"))
+        digest.update(code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def tac_phase(self, opt_level, recycle_temps):
+        """Return the phase name of TAC compiled with the given options."""
+        return f"tac-O{opt_level}{'-recycled' if recycle_temps else ''}"
+
+    def path(self, key, phase):
+        return os.path.join(self.directory, f"{key}.{phase}")
+
+    def phase_stats(self, phase):
+        stats = self.stats.get(phase)
+        if stats is None:
+            stats = self.stats[phase] = PhaseStats()
+        return stats
+
+    def load(self, key, phase):
+        """Return the cached output of a phase, or None on a miss.
+
+        tokens load as (token list, Interner), ast as (Program, Interner) and TAC phases as Quads.
+        """
+        stats = self.phase_stats(phase)
+        start = time.perf_counter()
+        value = self.read(key, phase)
+        stats.seconds += time.perf_counter() - start
+        if value is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return value
+
+    def read(self, key, phase):
+        path = self.path(key, phase)
+        try:
+            with open(path, "rb") as f:
+                fields = marshal.loads(zlib.decompress(f.read()))
+            # A damaged or foreign file can unmarshal to any value
+            if not (isinstance(fields, tuple) and len(fields) == 4
+                    and fields[:3] == (FORMAT_VERSION, sys.byteorder, phase)):
+                return None
+            value = decode(phase, fields[3])
+        except (OSError, ValueError, EOFError, TypeError, IndexError, KeyError, zlib.error):
+            return None
+        try:
+            os.utime(path)  # Most recently used
+        except OSError:
+            pass
+        return value
+
+    def store(self, key, phase, value):
+        """Write the output of a phase atomically, then evict old entries if the cache is over its size."""
+        payload = zlib.compress(marshal.dumps((FORMAT_VERSION, sys.byteorder, phase, encode(phase, value))),
+                                COMPRESSION)
+        path = self.path(key, phase)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(payload)
+            os.replace(temporary, path)
+        except OSError:
+            return  # A read-only location only costs a recompile next time
+        self.stores += 1
+        self.bytes_written += len(payload)
+        if self.estimated_size is None or self.estimated_size + len(payload) > self.max_bytes:
+            self.evict()
+        else:
+            self.estimated_size += len(payload)  # Overwriting an entry counts it twice, which only scans sooner
+
+    def entries(self, remove_stale=False):
+        """Return (modification time, size, path) for every finished entry.
+
+        With remove_stale, also delete the temporary files of writes that never finished.
+        """
+        entries = []
+        try:
+            scan = os.scandir(self.directory)
+        except OSError:
+            return entries
+        now = time.time()
+        with scan:
+            for entry in scan:
+                name = entry.name
+                if ENTRY_NAME.fullmatch(name):
+                    try:
+                        info = entry.stat()
+                    except OSError:
+                        continue  # Evicted by another process meanwhile
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+                elif remove_stale and TEMPORARY_NAME.fullmatch(name):
+                    try:
+                        if now - entry.stat().st_mtime > STALE_SECONDS:
+                            os.remove(entry.path)
+                    except OSError:
+                        pass  # Renamed into place or removed meanwhile
+        return entries
+
+    def size(self):
+        """Return the bytes the entries take up."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Delete least recently used entries, and stale temporary files, until the cache fits in max_bytes."""
+        entries = self.entries(remove_stale=True)
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            self.estimated_size = total
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass  # Another process removed it first
+            total -= size
+        self.estimated_size = total
+
+    def clear(self):
+        """Delete every entry, leaving any other files in the directory."""
+        self.estimated_size = None
+        for _, _, path in self.entries(remove_stale=True):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def report(self):
+        """Return the hits and misses of each phase as lines of text."""
+        lines = [f"{'cache phase':16} {'hits':>6} {'misses':>7} {'ms':>9}"]
+        for phase, stats in self.stats.items():
+            lines.append(f"{phase:16} {stats.hits:6} {stats.misses:7} {stats.seconds * 1000:9.2f}")
+        lines.append(f"stored {self.stores} entries ({self.bytes_written} bytes), evicted {self.evictions}")
+        return lines
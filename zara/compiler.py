@@ -0,0 +1,394 @@
+"""Compiler driver that runs every phase over a Zara program.
+
+The source is parsed once into a syntax tree that semantic analysis and TAC
+generation both walk. compile_source works on a source string held in memory.
+compile_stream reads a file object or mmap in chunks and checks, translates and
+writes out each top-level statement as soon as it is parsed, so its peak memory
+does not grow with the size of the source.
+
+Both raise on the first error unless given a Diagnostics collection, in which
+case every syntax and semantic error is recorded there and no TAC is produced
+once one has been found.
+
+Importing this module loads only the phases every compile runs. The LALR
+parser, the optimizer, the temp allocator and the backends are imported the
+first time a compile or the command line asks for them, which keeps short
+compiles from paying for what they do not use.
+"""
+import sys
+from functools import partial
+
+from zara.lexer import Lexer, LineTable, Interner, stream_tokens, CHUNK_SIZE
+from zara.diagnostics import Diagnostics
+from zara.symbol_table import SymbolTable
+from zara.parser import Parser
+from zara.semantic_analyzer import SemanticAnalyzer
+from zara.tac_generator import TACGenerator, format_instruction
+
+
+# Parser engines: hand-written recursive descent, or table-driven LALR(1)
+PARSERS = ("recursive", "lalr")
+
+# Optimization level from which vectorizable loops are rewritten into whole-array operations before TAC is made
+VECTORIZE_LEVEL = 3
+
+
+def make_parser(parser, tokens, diagnostics=None):
+    if parser == "lalr":
+        from zara.zara_grammar import LALRParser
+        return LALRParser(tokens, diagnostics)
+    if parser != "recursive":
+        raise ValueError(f"Unknown parser '{parser}', expected one of {PARSERS}.")
+    return Parser(tokens, diagnostics)
+
+
+def make_optimizer(opt_level):
+    if not opt_level:
+        return None
+    from zara.optimizer import PassManager
+    return PassManager(opt_level)
+
+
+def make_vectorizer(opt_level):
+    if opt_level < VECTORIZE_LEVEL:
+        return None
+    from zara.vectorizer import Vectorizer
+    return Vectorizer()
+
+
+def make_allocator(recycle_temps):
+    if not recycle_temps:
+        return None
+    from zara.temp_allocator import TempAllocator
+    return TempAllocator()
+
+
+class Unrecorded:
+    """Stands in for Instrumentation.phase when nothing is recorded."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exception):
+        return False
+
+
+UNRECORDED = Unrecorded()
+
+
+def unrecorded(name):
+    return UNRECORDED
+
+
+def compile_source(code, parser="recursive", diagnostics=None, opt_level=0, recycle_temps=False, cache=None,
+                   instrumentation=None, optimizer=None, allocator=None):
+    """Compile a source string and return its TAC instructions, or None if errors were recorded.
+
+    With recycle_temps, temps whose values are dead are reused (see temp_allocator).
+    The optimizer and allocator for opt_level and recycle_temps are made here unless given,
+    as the command line does to report their statistics.
+    With a compile_cache.CompileCache as cache, each phase is loaded from it when the
+    same source was compiled before, and stored there otherwise. An
+    instrumentation.Instrumentation records the time, memory and output sizes of each phase.
+    """
+    phase = instrumentation.phase if instrumentation is not None else unrecorded
+    key = cached_phase = None
+    if cache is not None:
+        with phase("cache"):
+            key, cached_phase = cache.key(code), cache.tac_phase(opt_level, recycle_temps)
+            quads = cache.load(key, cached_phase)
+        if quads is not None:
+            if instrumentation is not None:
+                instrumentation.count("quads", len(quads))
+            return quads
+    analyzed = analyze_source(code, parser, diagnostics, cache, key, instrumentation)
+    if analyzed is None:
+        return None
+    tree, names = analyzed
+    vectorizer = make_vectorizer(opt_level)
+    if vectorizer is not None:
+        with phase("vectorize"):
+            vectorizer.rewrite(tree)  # After the checked tree is cached, which every level shares
+    generator = TACGenerator(names=names)
+    with phase("generate"):
+        quads = generator.generate(tree)
+    if optimizer is None:
+        optimizer = make_optimizer(opt_level)
+    if optimizer is not None:
+        with phase("optimize"):
+            optimizer.run(quads)
+    if allocator is None:
+        allocator = make_allocator(recycle_temps)
+    if allocator is not None:
+        with phase("allocate"):
+            allocator.run(quads)
+    if instrumentation is not None:
+        instrumentation.count("quads", len(quads))
+        instrumentation.count("temps", generator.temp_counter)
+        instrumentation.count("labels", generator.label_counter)
+        if allocator is not None:
+            instrumentation.count("temps_after_recycling", allocator.temps_after)
+    if cache is not None:
+        with phase("cache"):
+            cache.store(key, cached_phase, quads)
+    return quads
+
+
+def analyze_source(code, parser, diagnostics, cache, key, instrumentation=None):
+    """Return the checked syntax tree of a source string and its names, or None if errors were recorded."""
+    phase = instrumentation.phase if instrumentation is not None else unrecorded
+    lexed = None
+    if cache is not None:
+        with phase("cache"):
+            analyzed = cache.load(key, "ast")
+            if analyzed is None:
+                lexed = cache.load(key, "tokens")
+        if analyzed is not None:
+            return analyzed
+    if lexed is None:
+        with phase("lex"):
+            lexer = Lexer(code)
+            lexed = lexer.tokenize(), lexer.names
+        if cache is not None:
+            with phase("cache"):
+                cache.store(key, "tokens", lexed)
+    tokens, names = lexed
+    symbol_table = SymbolTable(names)  # Indexed by the ids the lexer gave identifiers
+    if diagnostics is not None and diagnostics.lines is None:
+        diagnostics.lines = LineTable(code)
+    with phase("parse"):
+        tree = make_parser(parser, tokens, diagnostics).parse()
+    with phase("analyze"):
+        SemanticAnalyzer(symbol_table, diagnostics).analyze(tree)
+    if instrumentation is not None:
+        from zara.instrumentation import count_nodes
+        instrumentation.count("tokens", len(tokens))
+        instrumentation.count("ast_nodes", count_nodes(tree))
+        instrumentation.count("symbols", symbol_table.declared)
+        instrumentation.count("names", len(names))
+    if diagnostics is not None and diagnostics.count:
+        return None
+    if cache is not None:
+        with phase("cache"):
+            cache.store(key, "ast", (tree, names))
+    return tree, names
+
+
+def compile_stream(source, sink, chunk_size=CHUNK_SIZE, diagnostics=None, optimizer=None, allocator=None,
+                   instrumentation=None, vectorizer=None):
+    """Compile a file object or mmap, writing TAC lines to sink as they are produced.
+
+    An optimizer.PassManager given as optimizer optimizes each batch of statements before it is written,
+    and a temp_allocator.TempAllocator given as allocator recycles the temps of each batch.
+    A vectorizer.Vectorizer rewrites the loops of each statement once it is checked.
+    With an instrumentation.Instrumentation, lexing and parsing are recorded together as the parse
+    phase, since tokens are read as the parser asks for them; flush covers optimizing, recycling
+    temps and writing.
+    """
+    names = Interner()
+    symbol_table = SymbolTable(names)
+    analyzer = SemanticAnalyzer(symbol_table, diagnostics)
+    tac = TACGenerator(sink=sink, names=names, optimizer=optimizer, allocator=allocator)
+    tokens = stream_tokens(source, chunk_size, names)
+    if instrumentation is None:
+        for statement in Parser(tokens, diagnostics).iter_statements():
+            analyzer.analyze(statement)
+            if diagnostics is not None and diagnostics.count:
+                continue  # Keep checking, but the output would be wrong
+            if vectorizer is not None:
+                statement = vectorizer.rewrite(statement)
+            tac.visit(statement)
+            tac.flush()
+        tac.finish()
+        return
+
+    from zara.instrumentation import timed_iterator, counted
+    phase = instrumentation.phase
+    tokens = counted(instrumentation, "tokens", tokens)
+    for statement in timed_iterator(instrumentation, "parse", Parser(tokens, diagnostics).iter_statements()):
+        instrumentation.count("statements")
+        with phase("analyze"):
+            analyzer.analyze(statement)
+        if diagnostics is not None and diagnostics.count:
+            continue
+        if vectorizer is not None:
+            with phase("vectorize"):
+                statement = vectorizer.rewrite(statement)
+        with phase("generate"):
+            tac.visit(statement)
+        with phase("flush"):
+            tac.flush()
+    with phase("flush"):
+        tac.finish()
+    instrumentation.count("symbols", symbol_table.declared)
+    instrumentation.count("quads", tac.written)
+    instrumentation.count("temps", tac.temp_counter)
+    instrumentation.count("labels", tac.label_counter)
+
+
+def main(argv=None):
+    """Run the command line: compile one file and print, write (-o) or run its TAC; return the exit status."""
+    import argparse
+    from zara.opt_levels import OPT_LEVELS
+
+    arguments = argparse.ArgumentParser(prog="zara", description="Compile a Zara program to three-address code.")
+    arguments.add_argument("file", help="a .zara source, or a .zir file compiled with -o to print or run")
+    arguments.add_argument("-O", dest="opt_level", type=int, choices=sorted(OPT_LEVELS), default=0,
+                           help=f"optimization level (default 0); from {VECTORIZE_LEVEL} on, elementwise array loops "
+                                "run as whole-array operations")
+    arguments.add_argument("--recycle-temps", action="store_true", help="reuse temps whose values are dead")
+    arguments.add_argument("--pass-stats", action="store_true",
+                           help="print optimizer statistics to stderr (when printing TAC)")
+    arguments.add_argument("--run", action="store_true",
+                           help="run the program and print its variables instead of its TAC")
+    arguments.add_argument("--backend", choices=("vm", "jit", "python"), default="vm",
+                           help="what --run executes: VM bytecode, VM bytecode with hot loops traced and compiled, "
+                                "or translated Python (default vm)")
+    arguments.add_argument("-o", "--output", metavar="PATH.zir",
+                           help="write the compiled program to a binary .zir file instead of printing its TAC")
+    arguments.add_argument("--cache-dir", help="reuse the output of earlier compiles of the same source from here")
+    arguments.add_argument("--cache-stats", action="store_true", help="print cache hits and misses to stderr")
+    arguments.add_argument("--stats", nargs="?", const="text", choices=("text", "json"),
+                           help="print the time of each phase and the sizes it produced to stderr, "
+                                "as a table or (--stats=json) one line of JSON")
+    arguments.add_argument("--stats-memory", action="store_true",
+                           help="with --stats, also trace the peak memory of each phase (much slower)")
+    args = arguments.parse_args(argv)
+
+    diagnostics = Diagnostics(args.file)
+    ran = True  # False once a --run stops on a runtime error
+    cache = None
+    if args.cache_dir:
+        from zara.compile_cache import CompileCache
+        cache = CompileCache(args.cache_dir)
+    instrumentation = None
+    if args.stats:
+        from zara.instrumentation import Instrumentation
+        instrumentation = Instrumentation(memory=args.stats_memory)
+    if args.file.endswith(".zir"):
+        return run_compiled(args, instrumentation)
+    optimizer = make_optimizer(args.opt_level)  # None, and nothing imported, at -O0
+    allocator = make_allocator(args.recycle_temps)
+    compiled = {"diagnostics": diagnostics, "opt_level": args.opt_level, "recycle_temps": args.recycle_temps,
+                "cache": cache, "instrumentation": instrumentation, "optimizer": optimizer, "allocator": allocator}
+    with open(args.file, "rb") as source:
+        if args.run:
+            quads = compile_source(source.read().decode("utf-8"), **compiled)
+            if quads is not None:
+                if args.output:
+                    write_zir(args.output, quads, instrumentation)
+                ran = run_program(quads, args.backend, args.file, instrumentation)
+        elif cache is not None or args.output:
+            # The whole source is compiled in memory, so that its TAC can be cached or written out
+            quads = compile_source(source.read().decode("utf-8"), **compiled)
+            if quads is not None and args.output:
+                write_zir(args.output, quads, instrumentation)
+            elif quads is not None:
+                for inst in quads:
+                    print(format_instruction(inst))
+        else:
+            compile_stream(source, sys.stdout, diagnostics=diagnostics, optimizer=optimizer, allocator=allocator,
+                           instrumentation=instrumentation, vectorizer=make_vectorizer(args.opt_level))
+            if diagnostics.count:
+                source.seek(0)
+                diagnostics.lines = LineTable(source.read().decode("utf-8"))
+    for line in diagnostics.report():
+        print(line, file=sys.stderr)
+    if args.pass_stats and not args.run:
+        if cache is not None and cache.stats.get(cache.tac_phase(args.opt_level, args.recycle_temps)).hits:
+            print("pass stats: the TAC was loaded from the compile cache, so no pass ran", file=sys.stderr)
+        else:
+            for stage in (optimizer, allocator):
+                if stage is not None:
+                    for line in stage.report():
+                        print(line, file=sys.stderr)
+    if args.cache_stats and cache is not None:
+        for line in cache.report():
+            print(line, file=sys.stderr)
+    report_stats(args, instrumentation)
+    return 1 if diagnostics.count or not ran else 0
+
+
+def report_stats(args, instrumentation):
+    if instrumentation is not None:
+        instrumentation.close()
+        if args.stats == "json":
+            print(instrumentation.to_json(file=args.file), file=sys.stderr)
+        else:
+            for line in instrumentation.report():
+                print(line, file=sys.stderr)
+
+
+# What a checked program can still raise as it runs: division by zero, a variable read before it is given a value
+# (an operation on None), an array index out of range or a pop of an empty stack, an int too big for array<int>
+RUNTIME_ERRORS = (ZeroDivisionError, TypeError, IndexError, OverflowError)
+
+
+def runtime_error_message(error):
+    if isinstance(error, TypeError) and "NoneType" in str(error):
+        return f"a variable is used before it is given a value ({error})"
+    if isinstance(error, OverflowError):
+        return f"integer overflow ({error})"
+    return str(error)
+
+
+def run_program(quads, backend, filename, instrumentation=None):
+    """Run quads (or a zir.ZirFile) on a backend and print the values of their variables.
+
+    Return False, having reported it, if the program stopped on a runtime error.
+    """
+    with instrumentation.phase("run") if instrumentation is not None else unrecorded("run"):
+        if backend == "python":
+            from zara import python_backend
+            program = python_backend.compile_program(quads, filename)
+            run = program.run
+        elif backend == "jit":
+            from zara import jit
+            run = partial(jit.run, quads)
+        else:
+            from zara import vm
+            run = partial(vm.run, quads)
+        try:
+            values = run()
+        except RUNTIME_ERRORS as error:
+            print(f"{filename}: runtime error: {runtime_error_message(error)}", file=sys.stderr)
+            return False
+    for name, value in values.items():
+        print(f"{name} = {value!r}")
+    return True
+
+
+def write_zir(path, quads, instrumentation=None):
+    from zara import zir
+
+    with instrumentation.phase("write") if instrumentation is not None else unrecorded("write"):
+        zir.write(path, quads)
+
+
+def run_compiled(args, instrumentation):
+    """Print or run a program compiled to a .zir file; compile options do not apply to it."""
+    from zara.zir import ZirFile
+
+    try:
+        with instrumentation.phase("load") if instrumentation is not None else unrecorded("load"):
+            program = ZirFile(args.file)
+    except (OSError, ValueError) as error:
+        print(f"zara: {error}", file=sys.stderr)
+        return 1
+    ran = True
+    with program:
+        try:
+            if args.run:
+                ran = run_program(program, args.backend, args.file, instrumentation)
+            else:
+                for inst in program:
+                    print(format_instruction(inst))
+        except ValueError as error:  # A string or constant ZirFile found damaged when it was first read
+            print(f"zara: {error}", file=sys.stderr)
+            return 1
+    report_stats(args, instrumentation)
+    return 0 if ran else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
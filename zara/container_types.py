@@ -0,0 +1,16 @@
+"""Names of the container types array<T> and stack<T> and the element types they can hold.
+
+Kept apart from runtime, which holds the containers themselves, so that the
+semantic analyzer can check container types without loading it.
+"""
+
+ELEMENT_TYPES = {"int": int, "float": float, "string": str}
+NUMERIC = ("int", "float")
+
+
+def container_type(data_type):
+    """Split a type such as array<int> into ("array", "int"); return None for any other type."""
+    for kind in ("array", "stack"):
+        if data_type.startswith(kind + "<") and data_type.endswith(">"):
+            return kind, data_type[len(kind) + 1:-1]
+    return None
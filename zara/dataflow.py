@@ -0,0 +1,252 @@
+"""Worklist dataflow analysis over a CFG, with sets kept as integer bitsets.
+
+A Problem gives each basic block a gen and a kill set and a direction. The
+solver finds, for every block, the facts at its start and at its end:
+
+    forward:   end = gen | (start & ~kill),  start = meet of the predecessors' ends
+    backward:  start = gen | (end & ~kill),  end = meet of the successors' starts
+
+Bit i of a set stands for fact i. Python ints make union, intersection and
+difference single operations on machine words, so the cost of an analysis is
+the number of block visits times the width of the sets. Visiting blocks in
+reverse postorder (postorder for backward problems) means most blocks are
+visited only a few times.
+
+Liveness and ReachingDefinitions are built on this.
+"""
+from collections import deque
+from functools import reduce
+from operator import or_
+
+from zara.cfg import reads, writes
+from zara.tac_ir import KIND_MASK, NAME
+
+UNION, INTERSECTION = "union", "intersection"
+
+
+def bitset(indices, size):
+    """Return the bitset with the given bits set; size bounds the indices."""
+    bits = bytearray((size + 7) >> 3)
+    for index in indices:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bits_of(bits):
+    """Return the indices of the set bits of a bitset, in increasing order."""
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    return indices
+
+
+class Problem:
+    """A gen/kill dataflow problem.
+
+    gen and kill are lists of bitsets indexed by block. boundary holds at the
+    entry (forward) or at the exits (backward) of the graph. An INTERSECTION
+    problem needs universe, the set of all facts, to start its blocks from.
+    """
+
+    def __init__(self, gen, kill, forward=True, meet=UNION, boundary=0, universe=0):
+        self.gen = gen
+        self.kill = kill
+        self.forward = forward
+        self.meet = meet
+        self.boundary = boundary
+        self.universe = universe
+
+
+class Solution:
+    __slots__ = ("start", "end", "visits")
+
+    def __init__(self, start, end, visits):
+        self.start = start  # Facts at the start of each block
+        self.end = end  # Facts at the end of each block
+        self.visits = visits  # Blocks processed before the sets stopped changing
+
+
+def solve(cfg, problem):
+    """Solve a Problem over a CFG with a worklist and return the Solution."""
+    blocks = cfg.blocks
+    count = len(blocks)
+    gen, kill, boundary = problem.gen, problem.kill, problem.boundary
+    union = problem.meet == UNION
+    initial = 0 if union else problem.universe
+    if problem.forward:
+        order = cfg.reverse_postorder()
+        sources = [block.predecessors for block in blocks]
+        targets = [block.successors for block in blocks]
+        sink = [index == 0 for index in range(count)]  # Where the boundary facts flow in
+    else:
+        order = cfg.postorder()
+        sources = [block.successors for block in blocks]
+        targets = [block.predecessors for block in blocks]
+        sink = [False] * count
+        for index in cfg.exits:
+            sink[index] = True
+    # Blocks no path reaches are solved too, after the rest
+    reached = bytearray(count)
+    for index in order:
+        reached[index] = 1
+    order.extend(index for index in range(count) if not reached[index])
+
+    before = [initial] * count  # Facts flowing into each block, in the direction of the analysis
+    after = [initial] * count
+    queued = bytearray(b"\x01") * count
+    worklist = deque(order)
+    visits = 0
+    while worklist:
+        index = worklist.popleft()
+        queued[index] = 0
+        visits += 1
+        if union:
+            facts = boundary if sink[index] else 0
+            for source in sources[index]:
+                facts |= after[source]
+        else:
+            facts = boundary if sink[index] else problem.universe
+            for source in sources[index]:
+                facts &= after[source]
+        before[index] = facts
+        out = gen[index] | (facts & ~kill[index])
+        if out != after[index]:
+            after[index] = out
+            for target in targets[index]:
+                if not queued[target]:
+                    queued[target] = 1
+                    worklist.append(target)
+
+    if problem.forward:
+        return Solution(before, after, visits)
+    return Solution(after, before, visits)
+
+
+def block_summaries(cfg):
+    """Return, for each block, the variables it reads before writing them and the variables it writes."""
+    rows = cfg.rows
+    exposed, written = [], []
+    for block in cfg.blocks:
+        reads_first, writes_here = [], set()
+        for index in range(block.start, block.end):
+            row = rows[index]
+            for operand in reads(row):
+                if operand not in writes_here:
+                    reads_first.append(operand)
+            target = writes(row)
+            if target is not None:
+                writes_here.add(target)
+        exposed.append(reads_first)
+        written.append(writes_here)
+    return exposed, written
+
+
+def nonlocal_variables(exposed):
+    """Return the variables some block reads before writing them, in order of first appearance.
+
+    Only these carry values from one block to another; every other variable,
+    like almost every temp, is written and then read within a single block.
+    """
+    seen = {}
+    for reads_first in exposed:
+        for operand in reads_first:
+            seen.setdefault(operand, len(seen))
+    return list(seen)
+
+
+class Liveness:
+    """Variables that may be read later, at the start and end of every block.
+
+    Only variables that are live across some block boundary get a bit, so the
+    sets stay small however many temps the code has; variables[i] is the packed
+    operand of bit i. Unless live_at_exit (packed operands) is given, named
+    variables are live when the program ends, since they are its results.
+    """
+
+    def __init__(self, cfg, live_at_exit=None):
+        self.cfg = cfg
+        exposed, written = block_summaries(cfg)
+        if live_at_exit is None:
+            live_at_exit = {operand for operands in written for operand in operands if operand & KIND_MASK == NAME}
+        self.variables = nonlocal_variables(exposed + [sorted(live_at_exit)])
+        self.bit_of = bit_of = {operand: bit for bit, operand in enumerate(self.variables)}
+        size = len(self.variables)
+
+        gen = [bitset([bit_of[operand] for operand in reads_first], size) for reads_first in exposed]
+        kill = [bitset([bit_of[operand] for operand in writes_here if operand in bit_of], size)
+                for writes_here in written]
+        boundary = bitset([bit_of[operand] for operand in live_at_exit], size)
+        self.solution = solve(cfg, Problem(gen, kill, forward=False, boundary=boundary))
+        self.live_in = self.solution.start
+        self.live_out = self.solution.end
+
+    def live_variables(self, bits):
+        """Return the packed operands of the variables in a live set."""
+        variables = self.variables
+        return {variables[bit] for bit in bits_of(bits)}
+
+    def live_after(self, block):
+        """Return the set of live variables after each instruction of a block, in instruction order."""
+        rows = self.cfg.rows
+        live = self.live_variables(self.live_out[block.index])
+        result = []
+        for index in range(block.end - 1, block.start - 1, -1):
+            result.append(frozenset(live))
+            row = rows[index]
+            target = writes(row)
+            if target is not None:
+                live.discard(target)
+            live.update(reads(row))
+        result.reverse()
+        return result
+
+
+class ReachingDefinitions:
+    """Definitions (instructions assigning a variable) that may reach the start and end of every block.
+
+    Bit i stands for the instruction at definitions[i]. Only definitions of
+    variables that some block reads before writing are tracked, since no other
+    definition can be read outside its own block. The definitions of each
+    variable get consecutive bits, so all of them together are one bit range.
+    """
+
+    def __init__(self, cfg):
+        rows = cfg.rows
+        self.cfg = cfg
+        exposed, _ = block_summaries(cfg)
+        by_variable = {operand: [] for operand in nonlocal_variables(exposed)}
+        for index, row in enumerate(rows):
+            target = writes(row)
+            if target in by_variable:
+                by_variable[target].append(index)
+        self.definitions = []
+        bit_of = {}  # Instruction index to definition bit
+        ranges = {}  # Variable to (first bit, number of definitions)
+        for target, indices in by_variable.items():
+            ranges[target] = (len(self.definitions), len(indices))
+            for index in indices:
+                bit_of[index] = len(self.definitions)
+                self.definitions.append(index)
+        self.bit_of = bit_of
+
+        # kill may include a block's own gen bits, since gen is added back after kill is applied
+        kill_all = {target: ((1 << number) - 1) << first for target, (first, number) in ranges.items()}
+        gen, kill = [], []
+        for block in cfg.blocks:
+            last = {}  # Variable to its last tracked definition in the block
+            for index in range(block.start, block.end):
+                bit = bit_of.get(index)
+                if bit is not None:
+                    last[rows[index][3]] = bit
+            gen.append(reduce(or_, (1 << bit for bit in last.values()), 0))
+            kill.append(reduce(or_, (kill_all[target] for target in last)) if last else 0)
+        self.solution = solve(cfg, Problem(gen, kill, forward=True))
+        self.reach_in = self.solution.start
+        self.reach_out = self.solution.end
+
+    def reaching(self, block):
+        """Return the instruction indices of the tracked definitions reaching the start of a block."""
+        definitions = self.definitions
+        return sorted(definitions[bit] for bit in bits_of(self.reach_in[block.index]))
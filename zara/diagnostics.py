@@ -0,0 +1,73 @@
+"""Structured compiler diagnostics.
+
+Phases that are given a Diagnostics collection record their errors there and
+carry on, instead of raising on the first one, so one pass over a file reports
+all of its errors. Each diagnostic keeps the source span it refers to.
+"""
+
+# Errors recorded per file before the rest are only counted
+DEFAULT_LIMIT = 100
+
+
+class Diagnostic:
+    __slots__ = ("phase", "message", "start", "end")
+
+    def __init__(self, phase, message, start=None, end=None):
+        self.phase = phase  # "syntax" or "semantic"
+        self.message = message
+        self.start = start  # Character offsets into the source, or None if unknown
+        self.end = end
+
+    def __repr__(self):
+        return f"Diagnostic({self.phase!r}, {self.message!r}, {self.start}, {self.end})"
+
+
+class Diagnostics:
+    """Collects diagnostics for one source file, keeping at most limit of them."""
+
+    def __init__(self, filename="<source>", limit=DEFAULT_LIMIT, lines=None):
+        self.filename = filename
+        self.limit = limit
+        self.lines = lines  # A lexer.LineTable for turning offsets into line and column
+        self.items = []
+        self.suppressed = 0
+
+    def add(self, phase, message, start=None, end=None):
+        if len(self.items) < self.limit:
+            self.items.append(Diagnostic(phase, message, start, end))
+        else:
+            self.suppressed += 1
+
+    @property
+    def full(self):
+        """Whether the limit has been reached, so phases can stop looking for more."""
+        return len(self.items) >= self.limit
+
+    @property
+    def count(self):
+        return len(self.items) + self.suppressed
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def format(self, diagnostic):
+        """Render a diagnostic as 'file:line:column: phase error: message'."""
+        location = self.filename
+        if diagnostic.start is not None:
+            if self.lines is not None:
+                line, column = self.lines.position(diagnostic.start)
+                location += f":{line}:{column}"
+            else:
+                location += f":@{diagnostic.start}"
+        return f"{location}: {diagnostic.phase} error: {diagnostic.message}"
+
+    def report(self):
+        """Return the formatted diagnostics, in source order, as a list of lines."""
+        ordered = sorted(self.items, key=lambda d: (d.start is None, d.start or 0))
+        lines = [self.format(diagnostic) for diagnostic in ordered]
+        if self.suppressed:
+            lines.append(f"{self.filename}: {self.suppressed} more errors not shown")
+        return lines
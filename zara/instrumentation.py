@@ -0,0 +1,209 @@
+"""Per-phase timing, memory and counters for compiles.
+
+An Instrumentation is handed to compile_source or compile_stream, which wrap
+each phase (lex, parse, analyze, generate, optimize, allocate, and cache
+lookups) in instrumentation.phase(name). A phase entered more than once, as
+in a streaming compile that parses and translates one statement at a time,
+adds up into one PhaseRecord of its calls, wall time and CPU time. With
+memory=True, tracemalloc also records the peak bytes allocated during each
+phase; tracing slows the compile several times over, so it is off by default.
+
+Counters hold sizes the compile produced: tokens, tree nodes, declared
+symbols, instructions, temps and labels.
+
+Hooks let external profilers follow the phases. A hook is any object with
+start(phase) and finish(phase, record) methods, called around every entry to
+a phase; CProfileHook is one that profiles chosen phases with cProfile.
+
+When no Instrumentation is given, the compile runs its usual code and records
+nothing; the only cost left is a check of one argument per phase.
+"""
+import json
+import time
+import tracemalloc
+from operator import attrgetter
+
+from zara.ast_nodes import Node
+
+
+class PhaseRecord:
+    __slots__ = ("calls", "wall", "cpu", "peak")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0  # Seconds
+        self.cpu = 0.0  # Seconds of CPU time in this process
+        self.peak = 0  # Most bytes allocated at once during any one call, when memory is traced
+
+    def as_dict(self):
+        return {"calls": self.calls, "wall_seconds": self.wall, "cpu_seconds": self.cpu, "peak_bytes": self.peak}
+
+
+class Phase:
+    """The context manager Instrumentation.phase returns; one is kept per phase name and reused,
+    so entering a phase once per statement allocates nothing."""
+
+    __slots__ = ("instrumentation", "name", "record", "wall", "cpu", "base")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.record = PhaseRecord()
+
+    def __enter__(self):
+        instrumentation = self.instrumentation
+        for hook in instrumentation.hooks:
+            hook.start(self.name)
+        if instrumentation.memory:
+            instrumentation.trace()
+            tracemalloc.reset_peak()
+            self.base = tracemalloc.get_traced_memory()[0]
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exception):
+        wall = time.perf_counter()
+        record = self.record
+        record.cpu += time.process_time() - self.cpu
+        record.wall += wall - self.wall
+        record.calls += 1
+        instrumentation = self.instrumentation
+        if instrumentation.memory:
+            record.peak = max(record.peak, tracemalloc.get_traced_memory()[1] - self.base)
+        for hook in instrumentation.hooks:
+            hook.finish(self.name, record)
+        return False
+
+
+class Instrumentation:
+    """Records the phases of one or more compiles."""
+
+    def __init__(self, memory=False, hooks=()):
+        self.memory = memory
+        self.hooks = list(hooks)
+        self.phases = {}  # Phase name to its Phase, in the order phases were first entered
+        self.counters = {}
+        self.started_tracing = False
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def phase(self, name):
+        """Return a context manager recording the time, and with memory the peak allocation, of its block.
+
+        A phase must not be entered again while it is already open.
+        """
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+        return phase
+
+    def trace(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def count(self, name, amount=1):
+        """Add amount to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        self.counters[name] = value
+
+    def close(self):
+        """Stop tracemalloc if this instrumentation started it."""
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def as_dict(self):
+        return {
+            "phases": {name: phase.record.as_dict() for name, phase in self.phases.items()},
+            "counters": dict(self.counters),
+            "wall_seconds": sum(phase.record.wall for phase in self.phases.values()),
+            "cpu_seconds": sum(phase.record.cpu for phase in self.phases.values()),
+        }
+
+    def to_json(self, **extra):
+        """Return the records as one line of JSON, with any extra fields (such as the file name) first."""
+        return json.dumps({**extra, **self.as_dict()}, sort_keys=False)
+
+    def report(self):
+        """Return the phase records and counters as lines of text."""
+        lines = [f"{'phase':16} {'calls':>7} {'wall ms':>10} {'cpu ms':>10}" + (f" {'peak KB':>10}" if self.memory else "")]
+        for name, phase in self.phases.items():
+            record = phase.record
+            line = f"{name:16} {record.calls:7} {record.wall * 1000:10.2f} {record.cpu * 1000:10.2f}"
+            if self.memory:
+                line += f" {record.peak / 1024:10.1f}"
+            lines.append(line)
+        if self.counters:
+            lines.append(", ".join(f"{name} {value}" for name, value in self.counters.items()))
+        return lines
+
+
+def timed_iterator(instrumentation, name, iterable):
+    """Yield the items of iterable, recording the time spent producing each one as phase name."""
+    iterator = iter(iterable)
+    while True:
+        with instrumentation.phase(name):
+            item = next(iterator, StopIteration)
+        if item is StopIteration:
+            return
+        yield item
+
+
+def counted(instrumentation, name, iterable):
+    """Yield the items of iterable, adding how many there were to counter name at the end."""
+    count = 0
+    for count, item in enumerate(iterable, 1):
+        yield item
+    instrumentation.count(name, count)
+
+
+def count_nodes(tree):
+    """Return the number of nodes in a syntax tree."""
+    getters = {}  # Node class to (attrgetter of its fields, whether it has just one)
+    count = 0
+    stack = [tree]
+    push, extend = stack.append, stack.extend
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Node):
+            count += 1
+            fields = value.fields
+            if not fields:
+                continue
+            getter = getters.get(fields)
+            if getter is None:
+                getter = getters[fields] = attrgetter(*fields), len(fields) == 1
+            values, single = getter
+            if single:
+                push(values(value))
+            else:
+                extend(values(value))
+        elif isinstance(value, list):
+            extend(value)
+    return count
+
+
+class CProfileHook:
+    """Profiles the given phases, or every phase, with cProfile; stats() returns a pstats.Stats."""
+
+    def __init__(self, phases=None):
+        import cProfile
+        self.phases = set(phases) if phases is not None else None
+        self.profile = cProfile.Profile()
+
+    def start(self, phase):
+        if self.phases is None or phase in self.phases:
+            self.profile.enable()
+
+    def finish(self, phase, record):
+        if self.phases is None or phase in self.phases:
+            self.profile.disable()
+
+    def stats(self):
+        import pstats
+        return pstats.Stats(self.profile)
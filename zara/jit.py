@@ -0,0 +1,248 @@
+"""Tracing JIT for the bytecode VM.
+
+TracingVM runs Bytecode like VM does, and also counts how often each backward
+jump is taken. Once a loop has gone round HOT_LOOP times, the VM records the
+instructions of its next iteration, the trace: one straight path from the
+loop header back to it, with the direction each conditional jump took.
+
+The trace is then compiled into a Python closure specialized on the types its
+registers held when recording began. It loads the registers into locals,
+checks their types once on entry, and then runs iteration after iteration
+with no dispatch at all. Every conditional jump in the trace becomes a guard:
+if it goes the other way than when recorded, the closure writes the locals
+back to the registers and returns the instruction to resume at, and the VM
+carries on with its generic loop from there.
+
+Only loops whose registers hold ints and floats, and that use no containers,
+are compiled, and only when every register keeps its type from one iteration
+to the next, so the entry
+check covers all of them. Anything else runs on the generic path, with the
+same results.
+"""
+import operator
+
+from zara.python_backend import literal
+from zara.vm import (VM, MOVE, ADD, SUB, MUL, DIV, LT, GT, EQ, LT_JUMP, GT_JUMP, EQ_JUMP, NOT_LT_JUMP, NOT_GT_JUMP,
+                NOT_EQ_JUMP, JUMP_UNLESS, JUMP_IF, JUMP, LOAD, STORE, CALL, VECTOR, CALL_VOID, assemble, divide)
+
+# Backward jumps taken before a loop is traced
+HOT_LOOP = 50
+# Instructions a trace may have; longer recordings are abandoned
+MAX_TRACE = 4000
+# Recordings abandoned, or entry checks failed, before a loop is no longer traced
+MAX_ATTEMPTS = 3
+
+OPERATIONS = {
+    ADD: operator.add, SUB: operator.sub, MUL: operator.mul, DIV: divide,
+    LT: lambda left, right: int(left < right),
+    GT: lambda left, right: int(left > right),
+    EQ: lambda left, right: int(left == right),
+    LOAD: operator.getitem,
+    CALL: lambda function, argument: function(argument),
+}
+CONDITIONS = {
+    LT_JUMP: operator.lt, GT_JUMP: operator.gt, EQ_JUMP: operator.eq,
+    NOT_LT_JUMP: lambda left, right: not left < right,
+    NOT_GT_JUMP: lambda left, right: not left > right,
+    NOT_EQ_JUMP: lambda left, right: not left == right,
+    JUMP_UNLESS: lambda value, _: not value,
+    JUMP_IF: lambda value, _: bool(value),
+}
+# Python for each operation and jump condition, over the operands a and b
+OPERATION_CODE = {ADD: "{a} + {b}", SUB: "{a} - {b}", MUL: "{a} * {b}",
+                  LT: "int({a} < {b})", GT: "int({a} > {b})", EQ: "int({a} == {b})"}
+CONDITION_CODE = {LT_JUMP: "{a} < {b}", GT_JUMP: "{a} > {b}", EQ_JUMP: "{a} == {b}",
+                  NOT_LT_JUMP: "not {a} < {b}", NOT_GT_JUMP: "not {a} > {b}", NOT_EQ_JUMP: "not {a} == {b}",
+                  JUMP_UNLESS: "not {a}", JUMP_IF: "{a}"}
+NUMBERS = (int, float)
+
+
+def result_type(op, left, right):
+    """Return the type an operation gives on operands of the given types."""
+    if op in (LT, GT, EQ):
+        return int
+    return int if left is int and right is int else float
+
+
+def compile_trace(header, trace, entry_types, constants):
+    """Compile a recorded trace into a closure, or return None if it cannot be specialized.
+
+    trace holds (pc, (op, a, b, c), taken) for each instruction run; entry_types
+    are the types of the registers when it began and constants maps the
+    registers no instruction writes to their values.
+    """
+    types = {}
+    live_in, written = [], []
+
+    def read(register):
+        if register in constants:
+            kind = type(constants[register])
+        elif register in types:
+            kind = types[register]
+        else:
+            kind = types[register] = entry_types[register]
+            live_in.append(register)
+        if kind not in NUMBERS:
+            raise TypeError(f"Register {register} holds a {kind.__name__}.")
+        return kind
+
+    def write(register, kind):
+        if register not in written:
+            written.append(register)
+        types[register] = kind
+
+    def name(register):
+        return literal(constants[register]) if register in constants else f"r{register}"
+
+    body = []
+    exits = {}  # Line in body of each guard to the instruction to resume at when it fails
+    try:
+        for pc, (op, a, b, c), taken in trace:
+            if op == MOVE:
+                write(c, read(a))
+                body.append(f"{name(c)} = {name(a)}")
+            elif op in OPERATION_CODE or op == DIV:
+                left, right = read(a), read(b)
+                if op == DIV:
+                    code = "divide({a}, {b})" if left is int and right is int else "{a} / {b}"
+                else:
+                    code = OPERATION_CODE[op]
+                write(c, result_type(op, left, right))
+                body.append(f"{name(c)} = " + code.format(a=name(a), b=name(b)))
+            elif op in CONDITION_CODE:
+                read(a)
+                if op not in (JUMP_UNLESS, JUMP_IF):
+                    read(b)
+                condition = CONDITION_CODE[op].format(a=name(a), b=name(b))
+                exits[len(body)] = pc + 1 if taken else c
+                body.append(f"if not ({condition}):" if taken else f"if {condition}:")
+            elif op != JUMP:
+                return None  # Container instructions only run on the generic path
+    except TypeError:
+        return None
+    if any(types[register] is not entry_types[register] for register in live_in if register in written):
+        return None  # A register changes type across iterations
+
+    loaded = live_in + [register for register in written if register not in live_in]
+    store = "; ".join(f"registers[{register}] = r{register}" for register in written) or "pass"
+    lines = ["def trace(registers):"]
+    lines += [f"    r{register} = registers[{register}]" for register in loaded]
+    if live_in:
+        checks = " or ".join(f"type(r{register}) is not {entry_types[register].__name__}" for register in live_in)
+        lines.append(f"    if {checks}:")
+        lines.append(f"        return {header}")
+    lines.append("    while True:")
+    for position, line in enumerate(body):
+        lines.append("        " + line)
+        if position in exits:
+            lines.append(f"            {store}")
+            lines.append(f"            return {exits[position]}")
+    namespace = {"divide": divide}
+    exec("\n".join(lines) + "\n", namespace)
+    return namespace["trace"]
+
+
+class TracingVM(VM):
+    """A VM that compiles the traces of hot loops into Python closures."""
+
+    def __init__(self, bytecode, hot_loop=HOT_LOOP):
+        super().__init__(bytecode)
+        self.hot_loop = hot_loop
+        written = {instruction[3] for instruction in self.instructions
+                   if instruction[0] == MOVE or instruction[0] == VECTOR or instruction[0] in OPERATIONS}
+        self.constants = {register: value for register, value in enumerate(bytecode.registers)
+                          if value is not None and register not in written}
+        self.hits = {}  # Loop header to backward jumps taken to it
+        self.attempts = {}  # Loop header to abandoned recordings and failed entries
+        self.traces = {}  # Loop header to its compiled trace
+        self.recording = None  # Instructions of the trace being recorded
+        self.recording_header = None
+        self.entry_types = None
+        self.trace_runs = 0  # Times the last run() entered a compiled trace
+
+    def run(self):
+        """Run the program from the start with fresh registers and return the values of its variables.
+
+        executed counts only the instructions run outside compiled traces.
+        """
+        instructions = self.instructions
+        registers = list(self.bytecode.registers)
+        operations, conditions = OPERATIONS, CONDITIONS
+        end = len(instructions)
+        pc = 0
+        executed = 0
+        self.trace_runs = 0
+        while pc < end:
+            instruction = instructions[pc]
+            op, a, b, c = instruction
+            executed += 1
+            taken = False
+            if op == MOVE:
+                registers[c] = registers[a]
+            elif op == JUMP:
+                taken = True
+            elif op in operations:
+                registers[c] = operations[op](registers[a], registers[b])
+            elif op == STORE:
+                registers[c][registers[b]] = registers[a]
+            elif op == CALL_VOID:
+                registers[a](registers[b], registers[c])
+            elif op == VECTOR:
+                registers[c] = registers[a](registers)
+            else:
+                taken = conditions[op](registers[a], registers[b])
+            if self.recording is not None:
+                self.recording.append((pc, instruction, taken))
+            if not taken:
+                pc += 1
+            elif c > pc:
+                pc = c
+            else:
+                pc = self.back_edge(registers, c)
+            if self.recording and (pc == self.recording_header or len(self.recording) > MAX_TRACE or pc >= end):
+                self.stop_recording(pc)
+        self.registers = registers
+        self.executed = executed
+        return self.values()
+
+    def back_edge(self, registers, header):
+        """Take a backward jump to header and return the instruction to go on from."""
+        if self.recording is not None:
+            if header == self.recording_header:
+                return header
+            self.stop_recording(None)  # An inner loop, which gets traced on its own
+        trace = self.traces.get(header)
+        if trace is not None:
+            self.trace_runs += 1
+            pc = trace(registers)
+            if pc == header and self.fail(header):
+                del self.traces[header]  # Its entry types keep failing
+            return pc
+        hits = self.hits.get(header, 0) + 1
+        self.hits[header] = hits
+        if hits >= self.hot_loop and self.attempts.get(header, 0) < MAX_ATTEMPTS:
+            self.recording = []
+            self.recording_header = header
+            self.entry_types = [type(value) for value in registers]
+        return header
+
+    def stop_recording(self, pc):
+        header, trace = self.recording_header, self.recording
+        self.recording = self.recording_header = None
+        compiled = compile_trace(header, trace, self.entry_types, self.constants) if pc == header else None
+        if compiled is None:
+            self.hits[header] = 0
+            self.fail(header)
+        else:
+            self.traces[header] = compiled
+
+    def fail(self, header):
+        """Count a failed attempt at tracing header, and return whether it should no longer be traced."""
+        attempts = self.attempts.get(header, 0) + 1
+        self.attempts[header] = attempts
+        return attempts >= MAX_ATTEMPTS
+
+
+def run(quads):
+    """Assemble and run quads with tracing, returning the values of their variables."""
+    return TracingVM(assemble(quads)).run()
@@ -0,0 +1,509 @@
+"""LALR(1) parser generator and table-driven parser.
+
+A Grammar is a list of rules (lhs, rhs, action) or (lhs, rhs, action, prec).
+rhs is a space-separated string of symbols: quoted symbols such as '(' and
+ALL-CAPS names such as IDENTIFIER are terminals, everything else is a
+nonterminal. action receives the list of values of the rhs symbols and returns
+the value of the lhs. precedence lists (assoc, terminals) pairs from the loosest
+to the tightest binding, as in yacc; a rule takes the precedence of its last
+terminal unless prec names another terminal.
+
+Tables are built from the LR(0) item sets, with lookaheads found by spontaneous
+generation and propagation (Dragon book, section 4.7.5). Shift-reduce conflicts
+are resolved by precedence where both sides have one and by shifting otherwise;
+every conflict is recorded in Tables.conflicts. Tables are flat integer arrays
+indexed by state and symbol id, and can be cached on disk keyed by a hash of
+the grammar so that they are only built when the grammar changes.
+"""
+import hashlib
+import marshal
+import os
+import sys
+import zlib
+from array import array
+
+END = "$end"
+ACCEPT = "$accept"
+FORMAT_VERSION = 1
+
+
+def is_terminal(symbol):
+    return symbol.startswith("'") or symbol.isupper() or symbol == END
+
+
+class Grammar:
+    def __init__(self, rules, precedence=(), start=None):
+        self.start = start or rules[0][0]
+        self.precedence = [(assoc, tuple(terminals)) for assoc, terminals in precedence]
+
+        # Production 0 is the augmented start rule $accept -> start
+        names = [(ACCEPT, (self.start,), None)]
+        self.actions = [None]
+        for rule in rules:
+            lhs, rhs, action = rule[:3]
+            prec = rule[3] if len(rule) > 3 else None
+            names.append((lhs, tuple(rhs.split()), prec))
+            self.actions.append(action)
+        self.rules = names
+
+        terminals = [END]
+        nonterminals = [ACCEPT]
+        for lhs, rhs, _ in names:
+            if lhs not in nonterminals:
+                nonterminals.append(lhs)
+        for _, rhs, _ in names:
+            for symbol in rhs:
+                if is_terminal(symbol):
+                    if symbol not in terminals:
+                        terminals.append(symbol)
+                elif symbol not in nonterminals:
+                    raise ValueError(f"Nonterminal '{symbol}' has no rules.")
+
+        # Terminals get ids 0..T-1 and nonterminals T..T+N-1
+        self.terminals = terminals
+        self.nonterminals = nonterminals
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(terminals + nonterminals)}
+        self.prod_lhs = [self.symbol_ids[lhs] for lhs, _, _ in names]
+        self.prod_rhs = [tuple(self.symbol_ids[symbol] for symbol in rhs) for _, rhs, _ in names]
+        self.prod_prec = [prec for _, _, prec in names]
+
+    def terminal_id(self, name):
+        """Return the id of a terminal given without quotes, such as 'if' or IDENTIFIER."""
+        symbol_ids = self.symbol_ids
+        return symbol_ids.get(f"'{name}'", symbol_ids.get(name))
+
+    def digest(self):
+        """Hash of everything the tables depend on; actions do not change the tables."""
+        text = repr((FORMAT_VERSION, self.start, self.rules, self.precedence))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Conflict:
+    __slots__ = ("state", "terminal", "kind", "productions", "resolution", "by_precedence")
+
+    def __init__(self, state, terminal, kind, productions, resolution, by_precedence):
+        self.state = state
+        self.terminal = terminal
+        self.kind = kind  # "shift/reduce" or "reduce/reduce"
+        self.productions = productions
+        self.resolution = resolution  # "shift", "reduce <n>" or "error"
+        self.by_precedence = by_precedence
+
+    def __repr__(self):
+        how = "by precedence" if self.by_precedence else "by default"
+        return (f"{self.kind} conflict in state {self.state} on {self.terminal} "
+                f"(productions {self.productions}): {self.resolution} {how}")
+
+
+class Tables:
+    """ACTION and GOTO tables as flat arrays.
+
+    action[state * nterminals + terminal] is s + 1 to shift to state s, -(p + 1)
+    to reduce by production p (production 0 means accept), or 0 for an error.
+    goto[state * nnonterminals + nonterminal - nterminals] is the next state.
+    """
+
+    def __init__(self, digest, nterminals, nnonterminals, action, goto, prod_lhs, prod_len, conflicts):
+        self.digest = digest
+        self.nterminals = nterminals
+        self.nnonterminals = nnonterminals
+        self.action = action
+        self.goto = goto
+        self.prod_lhs = prod_lhs
+        self.prod_len = prod_len
+        self.conflicts = conflicts
+
+    @property
+    def nstates(self):
+        return len(self.action) // self.nterminals
+
+    def unresolved_conflicts(self):
+        return [conflict for conflict in self.conflicts if not conflict.by_precedence]
+
+
+def build_tables(grammar):
+    """Build the LALR(1) ACTION and GOTO tables for a grammar."""
+    nterminals = len(grammar.terminals)
+    nsymbols = nterminals + len(grammar.nonterminals)
+    prod_lhs, prod_rhs = grammar.prod_lhs, grammar.prod_rhs
+
+    # Items are integers: item_base[p] + dot
+    item_base, item_prod, item_dot = [], [], []
+    for p, rhs in enumerate(prod_rhs):
+        item_base.append(len(item_prod))
+        for dot in range(len(rhs) + 1):
+            item_prod.append(p)
+            item_dot.append(dot)
+    item_next = [prod_rhs[p][dot] if dot < len(prod_rhs[p]) else None
+                 for p, dot in zip(item_prod, item_dot)]
+    prods_of = {nt: [] for nt in range(nterminals, nsymbols)}
+    for p, lhs in enumerate(prod_lhs):
+        prods_of[lhs].append(p)
+
+    # Nullable nonterminals and FIRST sets
+    nullable = set()
+    first = {nt: set() for nt in prods_of}
+    changed = True
+    while changed:
+        changed = False
+        for p, rhs in enumerate(prod_rhs):
+            lhs = prod_lhs[p]
+            before = len(first[lhs])
+            for symbol in rhs:
+                if symbol < nterminals:
+                    first[lhs].add(symbol)
+                    break
+                first[lhs] |= first[symbol]
+                if symbol not in nullable:
+                    break
+            else:
+                if lhs not in nullable:
+                    nullable.add(lhs)
+                    changed = True
+            if len(first[lhs]) != before:
+                changed = True
+
+    # FIRST of what follows the next symbol of each item, and whether it can be empty
+    first_after = []
+    for item, next_symbol in enumerate(item_next):
+        if next_symbol is None or next_symbol < nterminals:
+            first_after.append(None)
+            continue
+        found, empty = set(), True
+        for symbol in prod_rhs[item_prod[item]][item_dot[item] + 1:]:
+            if symbol < nterminals:
+                found.add(symbol)
+                empty = False
+                break
+            found |= first[symbol]
+            if symbol not in nullable:
+                empty = False
+                break
+        first_after.append((frozenset(found), empty))
+
+    # Start items of every nonterminal reachable through leftmost derivations
+    nt_closure = {}
+    for nt in prods_of:
+        seen, stack, items = {nt}, [nt], []
+        while stack:
+            for p in prods_of[stack.pop()]:
+                item = item_base[p]
+                items.append(item)
+                symbol = item_next[item]
+                if symbol is not None and symbol >= nterminals and symbol not in seen:
+                    seen.add(symbol)
+                    stack.append(symbol)
+        nt_closure[nt] = items
+
+    def closure0(kernel):
+        items = list(kernel)
+        added = set(kernel)
+        for item in kernel:
+            symbol = item_next[item]
+            if symbol is not None and symbol >= nterminals:
+                for extra in nt_closure[symbol]:
+                    if extra not in added:
+                        added.add(extra)
+                        items.append(extra)
+        return items
+
+    def closure1(lookaheads):
+        """LR(1) closure of {item: set of lookaheads}; -1 stands for the propagation marker."""
+        work = list(lookaheads)
+        while work:
+            item = work.pop()
+            symbol = item_next[item]
+            if symbol is None or symbol < nterminals:
+                continue
+            found, empty = first_after[item]
+            new = found | lookaheads[item] if empty else found
+            for p in prods_of[symbol]:
+                target = item_base[p]
+                current = lookaheads.setdefault(target, set())
+                if not new <= current:
+                    current |= new
+                    work.append(target)
+        return lookaheads
+
+    # LR(0) item sets
+    kernels = [(item_base[0],)]
+    state_of_kernel = {kernels[0]: 0}
+    transitions = []
+    index = 0
+    while index < len(kernels):
+        moves = {}
+        for item in closure0(kernels[index]):
+            symbol = item_next[item]
+            if symbol is not None:
+                moves.setdefault(symbol, []).append(item + 1)
+        row = {}
+        for symbol, items in moves.items():
+            kernel = tuple(sorted(set(items)))
+            if kernel not in state_of_kernel:
+                state_of_kernel[kernel] = len(kernels)
+                kernels.append(kernel)
+            row[symbol] = state_of_kernel[kernel]
+        transitions.append(row)
+        index += 1
+
+    # Lookaheads of kernel items, by spontaneous generation and propagation
+    lookahead = [{item: set() for item in kernel} for kernel in kernels]
+    lookahead[0][item_base[0]].add(0)  # $end follows the start item
+    propagate = []
+    for state, kernel in enumerate(kernels):
+        for item in kernel:
+            targets = []
+            for closed, marks in closure1({item: {-1}}).items():
+                symbol = item_next[closed]
+                if symbol is None:
+                    continue
+                target_state = transitions[state][symbol]
+                spontaneous = marks - {-1}
+                lookahead[target_state][closed + 1] |= spontaneous
+                if -1 in marks:
+                    targets.append((target_state, closed + 1))
+            propagate.append((state, item, targets))
+    changed = True
+    while changed:
+        changed = False
+        for state, item, targets in propagate:
+            source = lookahead[state][item]
+            for target_state, target_item in targets:
+                target = lookahead[target_state][target_item]
+                if not source <= target:
+                    target |= source
+                    changed = True
+
+    # Precedence levels as (level, assoc); names that are not terminals can still be used as prec
+    prec_by_name = {}
+    for level, (assoc, terminals) in enumerate(grammar.precedence, start=1):
+        for name in terminals:
+            prec_by_name[name] = (level, assoc)
+    term_prec = {grammar.terminal_id(name): level for name, level in prec_by_name.items()
+                 if grammar.terminal_id(name) is not None}
+    prod_prec = []
+    for p, rhs in enumerate(prod_rhs):
+        if grammar.prod_prec[p] is not None:
+            prod_prec.append(prec_by_name.get(grammar.prod_prec[p]))
+            continue
+        terminals = [symbol for symbol in rhs if symbol < nterminals and symbol in term_prec]
+        prod_prec.append(term_prec[terminals[-1]] if terminals else None)
+
+    names = grammar.terminals + grammar.nonterminals
+    nnonterminals = nsymbols - nterminals
+    action = array('i', [0]) * (len(kernels) * nterminals)
+    goto = array('i', [-1]) * (len(kernels) * nnonterminals)
+    conflicts = []
+    for state, kernel in enumerate(kernels):
+        base = state * nterminals
+        for symbol, target in transitions[state].items():
+            if symbol < nterminals:
+                action[base + symbol] = target + 1
+            else:
+                goto[state * nnonterminals + symbol - nterminals] = target
+        closed = closure1({item: set(lookahead[state][item]) for item in kernel})
+        for item in sorted(closed):
+            if item_next[item] is not None:
+                continue
+            p = item_prod[item]
+            for terminal in sorted(closed[item]):
+                existing = action[base + terminal]
+                if existing == 0:
+                    action[base + terminal] = -(p + 1)
+                elif existing < 0:
+                    other = -existing - 1
+                    winner = min(p, other)
+                    action[base + terminal] = -(winner + 1)
+                    conflicts.append(Conflict(state, names[terminal], "reduce/reduce", (other, p),
+                                              f"reduce {winner}", False))
+                else:
+                    rule, token = prod_prec[p], term_prec.get(terminal)
+                    if rule is None or token is None:
+                        conflicts.append(Conflict(state, names[terminal], "shift/reduce", (p,), "shift", False))
+                    elif rule[0] > token[0] or (rule[0] == token[0] and token[1] == "left"):
+                        action[base + terminal] = -(p + 1)
+                        conflicts.append(Conflict(state, names[terminal], "shift/reduce", (p,), f"reduce {p}", True))
+                    elif rule[0] == token[0] and token[1] == "nonassoc":
+                        action[base + terminal] = 0
+                        conflicts.append(Conflict(state, names[terminal], "shift/reduce", (p,), "error", True))
+                    else:
+                        conflicts.append(Conflict(state, names[terminal], "shift/reduce", (p,), "shift", True))
+
+    return Tables(grammar.digest(), nterminals, nnonterminals, action, goto,
+                  array('i', prod_lhs), array('i', (len(rhs) for rhs in prod_rhs)), conflicts)
+
+
+def save_tables(tables, path):
+    """Write tables to path atomically, so concurrent readers never see a partial file."""
+    conflicts = [(c.state, c.terminal, c.kind, c.productions, c.resolution, c.by_precedence)
+                 for c in tables.conflicts]
+    payload = marshal.dumps((FORMAT_VERSION, sys.byteorder, tables.digest, tables.nterminals,
+                             tables.nnonterminals, tables.action.tobytes(), tables.goto.tobytes(),
+                             tables.prod_lhs.tobytes(), tables.prod_len.tobytes(), conflicts))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(zlib.compress(payload, 9))
+    os.replace(temporary, path)
+
+
+def load_tables(path, digest):
+    """Read tables written by save_tables, or return None if the file is missing, stale or damaged."""
+    try:
+        with open(path, "rb") as f:
+            fields = marshal.loads(zlib.decompress(f.read()))
+    except (OSError, ValueError, EOFError, TypeError, zlib.error):
+        return None
+    if len(fields) != 10 or fields[:3] != (FORMAT_VERSION, sys.byteorder, digest):
+        return None
+    _, _, _, nterminals, nnonterminals, action, goto, prod_lhs, prod_len, conflicts = fields
+    arrays = []
+    for data in (action, goto, prod_lhs, prod_len):
+        values = array('i')
+        values.frombytes(data)
+        arrays.append(values)
+    return Tables(digest, nterminals, nnonterminals, *arrays, [Conflict(*c) for c in conflicts])
+
+
+def load_or_build(grammar, cache_dir, name):
+    """Load the tables for grammar from cache_dir, building and caching them on a miss."""
+    digest = grammar.digest()
+    path = os.path.join(cache_dir, f"{name}.{digest[:16]}.lalr")
+    tables = load_tables(path, digest)
+    if tables is None:
+        tables = build_tables(grammar)
+        try:
+            save_tables(tables, path)
+        except OSError:
+            pass  # A read-only location only costs a rebuild next time
+    return tables
+
+
+class Recovery:
+    """Symbols for panic-mode error recovery, given by name.
+
+    After an error the parser pops back to the innermost state that can start
+    one of the resume nonterminals, then skips input through the next
+    terminator, or up to an unmatched closing bracket; bracketed groups met on
+    the way are skipped whole.
+    """
+
+    def __init__(self, resume, terminator, opening, closing):
+        self.resume = resume
+        self.terminator = terminator
+        self.opening = opening
+        self.closing = closing
+
+
+class LRParser:
+    """Runs the shift-reduce loop over integer states and symbol ids."""
+
+    def __init__(self, grammar, tables, recovery=None):
+        self.grammar = grammar
+        self.tables = tables
+        self.recovery = recovery
+
+    def parse(self, tokens, terminal_of, on_error=None):
+        """Parse tokens, using terminal_of(token) to get each token's terminal id.
+
+        Without on_error the first syntax error is raised. Otherwise each error is
+        passed to on_error(message, token) and parsing resumes after it, which needs
+        a Recovery; None is returned if the input ends before the parser can resume.
+        """
+        tables = self.tables
+        action, goto = tables.action, tables.goto
+        nterminals, nnonterminals = tables.nterminals, tables.nnonterminals
+        prod_lhs, prod_len = tables.prod_lhs, tables.prod_len
+        actions = self.grammar.actions
+
+        def lookup(token):
+            if token is None:
+                return 0
+            if on_error is None:
+                return terminal_of(token)
+            try:
+                return terminal_of(token)
+            except SyntaxError:
+                return -1  # Not a terminal of the grammar, so an error in every state
+
+        states = [0]
+        values = [None]
+        tokens = iter(tokens)
+        token = next(tokens, None)
+        terminal = lookup(token)
+        while True:
+            entry = action[states[-1] * nterminals + terminal] if terminal >= 0 else 0
+            try:
+                if entry > 0:
+                    states.append(entry - 1)
+                    values.append(token)
+                    token = next(tokens, None)
+                    terminal = lookup(token)
+                    continue
+                elif entry < 0:
+                    production = -entry - 1
+                    if production == 0:
+                        return values[-1]
+                    length = prod_len[production]
+                    if length:
+                        args = values[-length:]
+                        del states[-length:]
+                        del values[-length:]
+                    else:
+                        args = []
+                    values.append(actions[production](args))
+                    states.append(goto[states[-1] * nnonterminals + prod_lhs[production] - nterminals])
+                    continue
+                raise SyntaxError(self.error_message(states[-1], token))
+            except SyntaxError as error:
+                if on_error is None:
+                    raise
+                on_error(str(error), token)
+                if token is None:
+                    return None
+                token, terminal = self.recover(states, values, token, terminal, tokens, lookup)
+
+    def recover(self, states, values, token, terminal, tokens, lookup):
+        """Unwind the stacks and skip input after an error; return the token to resume at."""
+        tables, grammar, recovery = self.tables, self.grammar, self.recovery
+        nterminals, nnonterminals = tables.nterminals, tables.nnonterminals
+        resume = [grammar.symbol_ids[name] - nterminals for name in recovery.resume]
+        terminator, opening, closing = (grammar.terminal_id(name) for name in
+                                        (recovery.terminator, recovery.opening, recovery.closing))
+        while len(states) > 1 and all(tables.goto[states[-1] * nnonterminals + symbol] < 0 for symbol in resume):
+            del states[-1]
+            del values[-1]
+        row = states[-1] * nterminals
+        nesting = 0
+        while token is not None:
+            if terminal == opening:
+                nesting += 1
+            elif terminal == closing:
+                if nesting == 0:
+                    if not tables.action[row + closing]:
+                        token = next(tokens, None)  # A closing bracket with no group to close
+                    break
+                nesting -= 1
+                if nesting == 0:
+                    token = next(tokens, None)
+                    terminal = lookup(token)
+                    # Keep skipping if the group is followed by more of the broken statement, like an else
+                    if terminal < 0 or (token is not None and not tables.action[row + terminal]):
+                        continue
+                    return token, terminal
+            elif terminal == terminator and nesting == 0:
+                token = next(tokens, None)
+                break
+            token = next(tokens, None)
+            terminal = lookup(token)
+        return token, lookup(token)
+
+    def expected(self, state):
+        """Return the terminals the parser can accept in a state."""
+        row = self.tables.action[state * self.tables.nterminals:(state + 1) * self.tables.nterminals]
+        return [self.grammar.terminals[terminal] for terminal, entry in enumerate(row) if entry]
+
+    def error_message(self, state, token):
+        expected = ", ".join(self.expected(state))
+        found = "end of input" if token is None else repr(token)
+        return f"Unexpected {found}, expected one of: {expected}"
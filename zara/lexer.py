@@ -0,0 +1,414 @@
+import codecs
+import re
+from array import array
+from bisect import bisect_right
+from collections import deque
+from enum import Enum
+
+class TokenType(Enum):
+    KEYWORD = "KEYWORD"
+    IDENTIFIER = "IDENTIFIER"
+    OPERATOR = "OPERATOR"
+    DATA_TYPE = "DATA_TYPE"
+    LITERAL = "LITERAL"
+    DELIMITER = "DELIMITER"
+    UNKNOWN = "UNKNOWN"
+
+KEYWORDS = {"if", "else", "do", "while", "for", "return", "class", "new", "this"}
+OPERATORS = {"=", "+", "-", "*", "/", "==", ">", "<", "++"}
+DATA_TYPES = {"int", "float", "string", "array", "stack", "void", "function"}
+DELIMITERS = {"(", ")", "{", "}", ";", ",", "[", "]", "."}
+
+# Regular expressions for literals
+NUMBER_PATTERN = re.compile(r"\b\d+(\.\d+)?\b")  # Integer or float numbers
+STRING_PATTERN = re.compile(r'"([^"\\\n]|\\[^\n])*"')  # Strings enclosed in double quotes, within one line
+# A quote with no closing quote on its line, taken up to the end of the line as one unknown token
+UNTERMINATED_STRING_PATTERN = re.compile(r'"[^\n]*')
+IDENTIFIER_PATTERN = re.compile(r"\b[a-zA-Z_]\w*\b")  # Identifiers (variable names)
+
+# Operators sorted longest first so that '==' is never split into two '='
+OPERATORS_LONGEST_FIRST = sorted(OPERATORS, key=lambda op: (-len(op), op))
+
+# Keywords and data types are lexed as words and then resolved by a dict lookup
+WORD_TYPES = {word: TokenType.KEYWORD for word in KEYWORDS}
+WORD_TYPES.update({word: TokenType.DATA_TYPE for word in DATA_TYPES})
+
+# One compiled alternation with a named group per token class, used by the regex engine.
+# The sub-patterns are the same ones the legacy engine applies one at a time.
+# Whitespace and // comments are matched without a group name, so they show up with lastgroup None.
+TOKEN_PATTERNS = {
+    'DELIMITER': "[" + "".join(re.escape(d) for d in sorted(DELIMITERS)) + "]",
+    'OPERATOR': "|".join(re.escape(op) for op in OPERATORS_LONGEST_FIRST),
+    'NUMBER': NUMBER_PATTERN.pattern,
+    'STRING': STRING_PATTERN.pattern,
+    'WORD': IDENTIFIER_PATTERN.pattern,
+    'UNKNOWN': UNTERMINATED_STRING_PATTERN.pattern + "|.",
+}
+TOKEN_PATTERN = re.compile(
+    r"\s+|//[^\n]*|" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_PATTERNS.items()),
+    re.DOTALL,
+)
+
+ENGINES = ("regex", "legacy")
+
+# Operators that compare two expressions in a condition
+RELATIONAL_OPERATORS = {"==", ">", "<"}
+
+# Characters read per chunk when streaming tokens from a file
+CHUNK_SIZE = 1 << 16
+
+# Token types by their one-byte code in a TokenBuffer
+TYPE_CODES = list(TokenType)
+CODE_OF_TYPE = {token_type: code for code, token_type in enumerate(TYPE_CODES)}
+
+class Token:
+    # start and end are character offsets into the source, or None for hand-built tokens
+    __slots__ = ("type", "value", "start", "end")
+
+    def __init__(self, type, value, start=None, end=None):
+        self.type = type
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        if self.type is TokenType.UNKNOWN and self.value.startswith('"'):
+            return f"unterminated string {self.value}"
+        return f"{self.type}: {self.value}"
+
+class Interner:
+    """Numbers identifiers in order of first appearance and keeps one copy of each name.
+
+    The lexer interns every identifier as it reads it, so identifier tokens with
+    the same name share one string object, and the symbol table can index its
+    bindings by the small integer id of a name.
+    """
+
+    def __init__(self):
+        self.ids = {}  # Name to id
+        self.names = []  # Id to name
+
+    def intern(self, name):
+        """Return the id of a name, giving it the next id if it is new."""
+        index = self.ids.get(name)
+        if index is None:
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+class TokenStream:
+    """Reads tokens from any iterable through a small lookahead buffer."""
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.buffer = deque()
+
+    def peek(self, offset=0):
+        """Return the token offset places ahead without consuming it, or None past the end."""
+        buffer = self.buffer
+        while len(buffer) <= offset:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            buffer.append(token)
+        return buffer[offset]
+
+    def advance(self):
+        """Consume the current token."""
+        if self.buffer:
+            self.buffer.popleft()
+        else:
+            next(self.tokens, None)
+
+
+def literal_value(text):
+    """Convert the source text of a number or string literal to its value."""
+    if text[0] == '"':
+        return text.strip('"')
+    return float(text) if '.' in text else int(text)
+
+
+def make_token(kind, text, start=None, end=None, names=None):
+    """Build a token from a TOKEN_PATTERN group name and the text it matched, interning identifiers into names."""
+    if kind == 'WORD':
+        token_type = WORD_TYPES.get(text, TokenType.IDENTIFIER)
+        if names is not None and token_type is TokenType.IDENTIFIER:
+            text = names.names[names.intern(text)]
+        return Token(token_type, text, start, end)
+    if kind == 'NUMBER' or kind == 'STRING':
+        return Token(TokenType.LITERAL, literal_value(text), start, end)
+    return Token(TokenType[kind], text, start, end)
+
+
+class LineTable:
+    """Maps character offsets to (line, column) by binary search over line start offsets."""
+
+    def __init__(self, code):
+        self.line_starts = array('I', [0])
+        self.line_starts.extend(match.end() for match in re.finditer("\n", code))
+
+    def position(self, offset):
+        """Return the 1-based (line, column) of a character offset."""
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
+class TokenBuffer:
+    """Struct-of-arrays token storage for large inputs.
+
+    Each token costs one type code byte and two 4-byte offsets into the source; the
+    source itself is shared, not copied. Indexing or iterating builds a Token on
+    demand, decoding its value from the source only then, so the parsers can read
+    a TokenBuffer exactly like a list of tokens.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = LineTable(code)
+
+        add_type, add_start, add_end = self.types.append, self.starts.append, self.ends.append
+        word_types = WORD_TYPES
+        codes = {kind: CODE_OF_TYPE[TokenType[kind]] for kind in ('DELIMITER', 'OPERATOR', 'UNKNOWN')}
+        codes['NUMBER'] = codes['STRING'] = CODE_OF_TYPE[TokenType.LITERAL]
+        word_codes = {word: CODE_OF_TYPE[token_type] for word, token_type in word_types.items()}
+        identifier = CODE_OF_TYPE[TokenType.IDENTIFIER]
+        for match in TOKEN_PATTERN.finditer(code):
+            kind = match.lastgroup
+            if kind is None:  # Whitespace or comment
+                continue
+            start, end = match.span()
+            if kind == 'WORD':
+                add_type(word_codes.get(match.group(kind), identifier))
+            else:
+                add_type(codes[kind])
+            add_start(start)
+            add_end(end)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        start, end = self.starts[index], self.ends[index]
+        token_type = TYPE_CODES[self.types[index]]
+        text = self.code[start:end]
+        return Token(token_type, literal_value(text) if token_type is TokenType.LITERAL else text, start, end)
+
+    def __iter__(self):
+        code, types, starts, ends = self.code, self.types, self.starts, self.ends
+        literal = TokenType.LITERAL
+        for index in range(len(types)):
+            start, end = starts[index], ends[index]
+            token_type = TYPE_CODES[types[index]]
+            text = code[start:end]
+            yield Token(token_type, literal_value(text) if token_type is literal else text, start, end)
+
+    def text(self, index):
+        """Return the source text of a token."""
+        return self.code[self.starts[index]:self.ends[index]]
+
+    def position(self, index):
+        """Return the 1-based (line, column) where a token starts."""
+        return self.lines.position(self.starts[index])
+
+    @property
+    def nbytes(self):
+        """Bytes used by the token arrays and the line table, not counting the shared source."""
+        arrays = (self.types, self.starts, self.ends, self.lines.line_starts)
+        return sum(len(a) * a.itemsize for a in arrays)
+
+
+def stream_tokens(source, chunk_size=CHUNK_SIZE, names=None):
+    """Yield tokens from a file object or mmap, reading it chunk by chunk.
+
+    Only the current chunk and the token being matched are held in memory. A match
+    that ends near the end of the buffer is held back until more input arrives,
+    since the next chunk could extend it (a longer number, '==' or a closing quote).
+    A string cannot span lines, so an unterminated one is known at the end of its
+    line and input after it is never held back longer than that.
+    """
+    decoder = None
+    buffer = ""
+    position = 0
+    base = 0  # Offset of buffer[0] in the whole source
+    while True:
+        chunk = source.read(chunk_size)
+        at_end = not chunk
+        if isinstance(chunk, (bytes, bytearray)):  # Binary file or mmap
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = decoder.decode(chunk, final=at_end)
+
+        # Keep one character before the resume position so that \b sees its context
+        keep = max(position - 1, 0)
+        buffer = buffer[keep:] + chunk
+        position -= keep
+        base += keep
+
+        for match in TOKEN_PATTERN.finditer(buffer, position):
+            kind = match.lastgroup
+            if not at_end and match.end() > len(buffer) - 2:
+                break
+            position = match.end()
+            if kind is not None:
+                yield make_token(kind, match.group(kind), base + match.start(), base + position, names)
+
+        if at_end:
+            return
+
+
+class Lexer:
+    def __init__(self, code, engine="regex", names=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown lexer engine '{engine}', expected one of {ENGINES}.")
+        self.code = code
+        self.engine = engine
+        self.tokens = []
+        self.names = names if names is not None else Interner()  # Every identifier seen, by id
+
+    def tokenize(self):
+        """Tokenize the code with the selected engine."""
+        if self.engine == "legacy":
+            return self.tokenize_legacy()
+        return self.tokenize_regex()
+
+    def tokenize_regex(self):
+        """Tokenize the code in a single pass over one compiled alternation."""
+        # Locals avoid repeated global and attribute lookups in the hot loop
+        append = self.tokens.append
+        word_types = WORD_TYPES
+        ids, names = self.names.ids, self.names.names
+        identifier, delimiter, operator, literal, unknown = (
+            TokenType.IDENTIFIER, TokenType.DELIMITER, TokenType.OPERATOR, TokenType.LITERAL, TokenType.UNKNOWN)
+        for match in TOKEN_PATTERN.finditer(self.code):
+            kind = match.lastgroup
+            if kind is None:  # Whitespace or comment
+                continue
+            text = match.group(kind)
+            start, end = match.span()
+            if kind == 'WORD':
+                token_type = word_types.get(text)
+                if token_type is None:  # Identifier; intern it
+                    index = ids.get(text)
+                    if index is None:
+                        ids[text] = len(names)
+                        names.append(text)
+                    else:
+                        text = names[index]
+                    token_type = identifier
+                append(Token(token_type, text, start, end))
+            elif kind == 'DELIMITER':
+                append(Token(delimiter, text, start, end))
+            elif kind == 'OPERATOR':
+                append(Token(operator, text, start, end))
+            elif kind == 'NUMBER':
+                append(Token(literal, float(text) if '.' in text else int(text), start, end))
+            elif kind == 'STRING':
+                append(Token(literal, text.strip('"'), start, end))
+            else:
+                append(Token(unknown, text, start, end))
+        return self.tokens
+
+    def tokenize_buffer(self):
+        """Tokenize the code into a compact TokenBuffer instead of a list of tokens."""
+        return TokenBuffer(self.code)
+
+    def tokenize_legacy(self):
+        """Tokenize the code character by character, trying each pattern in turn."""
+        # Remove any surrounding whitespace and iterate over the code
+        index = 0
+        while index < len(self.code):
+            char = self.code[index]
+
+            # Skip whitespace
+            if char.isspace():
+                index += 1
+                continue
+
+            # Skip comments up to the end of the line
+            if self.code.startswith("//", index):
+                end = self.code.find("\n", index)
+                index = len(self.code) if end == -1 else end
+                continue
+
+            # Check for delimiters
+            if char in DELIMITERS:
+                self.tokens.append(Token(TokenType.DELIMITER, char, index, index + 1))
+                index += 1
+                continue
+
+            # Check for operators (could be multi-character like '==')
+            elif any(self.code.startswith(op, index) for op in OPERATORS):
+                for op in OPERATORS_LONGEST_FIRST:
+                    if self.code.startswith(op, index):
+                        self.tokens.append(Token(TokenType.OPERATOR, op, index, index + len(op)))
+                        index += len(op)
+                        break
+                continue
+
+            # Check for literals (numbers)
+            elif NUMBER_PATTERN.match(self.code, index):
+                match = NUMBER_PATTERN.match(self.code, index)
+                number = match.group(0)
+                self.tokens.append(Token(TokenType.LITERAL, float(number) if '.' in number else int(number),
+                                         index, index + len(number)))
+                index += len(number)
+                continue
+
+            # Check for string literals
+            elif STRING_PATTERN.match(self.code, index):
+                match = STRING_PATTERN.match(self.code, index)
+                string_literal = match.group(0).strip('"')
+                self.tokens.append(Token(TokenType.LITERAL, string_literal, index, match.end()))
+                index += len(match.group(0))
+                continue
+
+            # Check for identifiers or keywords
+            elif IDENTIFIER_PATTERN.match(self.code, index):
+                match = IDENTIFIER_PATTERN.match(self.code, index)
+                identifier = match.group(0)
+                if identifier in KEYWORDS:
+                    self.tokens.append(Token(TokenType.KEYWORD, identifier, index, match.end()))
+                elif identifier in DATA_TYPES:
+                    self.tokens.append(Token(TokenType.DATA_TYPE, identifier, index, match.end()))
+                else:
+                    identifier = self.names.names[self.names.intern(identifier)]
+                    self.tokens.append(Token(TokenType.IDENTIFIER, identifier, index, match.end()))
+                index += len(identifier)
+                continue
+
+            # If none of the above, mark as unknown and move forward
+            else:
+                end = UNTERMINATED_STRING_PATTERN.match(self.code, index).end() if char == '"' else index + 1
+                self.tokens.append(Token(TokenType.UNKNOWN, self.code[index:end], index, end))
+                index = end
+
+        return self.tokens
+
+
+# Tests
+
+if __name__ == "__main__":
+    # Sample Zara code to tokenize
+    zara_code = '''
+    int x = 5;
+    float y = 3.14;
+    string greeting = "Hello, Zara!";
+    if (x > 0) {
+        greeting = "Positive";
+    }
+    '''
+
+    # Create and run the lexer
+    lexer = Lexer(zara_code)
+    tokens = lexer.tokenize()
+
+    # Print out the tokens
+    print("Tokens:")
+    for token in tokens:
+        print(token)
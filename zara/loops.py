@@ -0,0 +1,254 @@
+"""Natural loops of three-address code, and the loop passes of the optimizer.
+
+A back edge is an edge to a block that dominates its source; the natural
+loop of a back edge is its target, the header, with every block that reaches
+the source without passing through the header. Back edges to one header make
+one loop. Dominators are a forward dataflow problem (see dataflow), solved
+over the same bitsets as liveness.
+
+Two passes build on find_loops():
+
+    licm                moves computations whose operands the loop never
+                        changes to the loop's preheader, so they run once
+    strength-reduction  finds basic induction variables (variables the loop
+                        only ever changes by adding or subtracting an int
+                        constant) and replaces i * k, for an int constant k,
+                        by a temp that is increased by c * k wherever i is
+                        increased by c
+
+Only temps are moved, and only temps are created. The generator writes each
+temp once and reads it within the statement that computes it, so computing
+one before the loop cannot change what a variable holds, even when the loop
+body never runs. Named variables stay where they are.
+
+Code is put where it runs once each time the loop is entered: before the
+header's label when the only way in from outside is falling into it, or
+before the goto that jumps to the header (as the goto a for loop starts
+with). A loop entered any other way is left alone.
+"""
+from zara.cfg import CFG, BINARY, COPY, IF, GOTO, reads, writes
+from zara.dataflow import Problem, INTERSECTION, solve
+from zara.tac_ir import OPCODE_OF, KIND_MASK, KIND_BITS, CONST, NAME, TEMP, NO_OPERAND, temp_operand
+
+ADD, SUBTRACT, MULTIPLY, DIVIDE = OPCODE_OF['+'], OPCODE_OF['-'], OPCODE_OF['*'], OPCODE_OF['/']
+
+
+class Loop:
+    __slots__ = ("header", "blocks", "latches")
+
+    def __init__(self, header):
+        self.header = header  # Index of the block every iteration starts at
+        self.blocks = {header}
+        self.latches = []  # Blocks with a back edge to the header
+
+    def __repr__(self):
+        return f"Loop(header={self.header}, blocks={sorted(self.blocks)}, latches={self.latches})"
+
+
+def dominators(cfg):
+    """Return, for each block, the bitset of the blocks that dominate it (itself included)."""
+    count = len(cfg.blocks)
+    gen = [1 << index for index in range(count)]
+    problem = Problem(gen, [0] * count, forward=True, meet=INTERSECTION, universe=(1 << count) - 1)
+    return solve(cfg, problem).end
+
+
+def find_loops(cfg):
+    """Return the natural loops of a CFG, each before the loops nested in it."""
+    blocks = cfg.blocks
+    dominated_by = dominators(cfg)
+    loops = {}  # Header to its Loop
+    for index in cfg.reverse_postorder():
+        for successor in blocks[index].successors:
+            if dominated_by[index] >> successor & 1:
+                loop = loops.get(successor)
+                if loop is None:
+                    loop = loops[successor] = Loop(successor)
+                loop.latches.append(index)
+                stack = [index]
+                while stack:
+                    member = stack.pop()
+                    if member not in loop.blocks:
+                        loop.blocks.add(member)
+                        stack.extend(blocks[member].predecessors)
+    return sorted(loops.values(), key=lambda loop: -len(loop.blocks))
+
+
+def entry_point(cfg, loop):
+    """Return the row index where code runs once each time the loop is entered, or None if there is none."""
+    rows, blocks = cfg.rows, cfg.blocks
+    header = blocks[loop.header]
+    outside = [index for index in header.predecessors if index not in loop.blocks]
+    if not outside:
+        return header.start if loop.header == 0 else None  # The first block is entered from above
+    if len(outside) > 1:
+        return None
+    entering = blocks[outside[0]]
+    last = rows[entering.end - 1] if entering.end > entering.start else None
+    label = rows[header.start][1] if rows[header.start][0] == OPCODE_OF['label'] else None
+    if last is not None and last[0] == GOTO:
+        return entering.end - 1  # Before the jump into the loop
+    if entering.index == loop.header - 1 and not (last is not None and last[0] == IF and last[3] == label):
+        return header.start  # Reached from above only by falling through
+    return None
+
+
+def loop_rows(cfg, loop):
+    """Return the row indices of a loop's instructions, in order."""
+    blocks = cfg.blocks
+    return sorted(index for block in loop.blocks for index in range(blocks[block].start, blocks[block].end))
+
+
+def every_iteration(cfg, loop, dominated_by):
+    """Return the blocks of a loop that run on every iteration: those that dominate all of its latches."""
+    return {block for block in loop.blocks if all(dominated_by[latch] >> block & 1 for latch in loop.latches)}
+
+
+def definition_counts(rows):
+    counts = {}
+    for row in rows:
+        target = writes(row)
+        if target is not None:
+            counts[target] = counts.get(target, 0) + 1
+    return counts
+
+
+def rebuild(rows, before=None, after=None, replaced=None, removed=()):
+    """Return rows with rows inserted before and after given indices, some replaced and some removed."""
+    before, after, replaced = before or {}, after or {}, replaced or {}
+    out = []
+    for index, row in enumerate(rows):
+        out.extend(before.get(index, ()))
+        if index not in removed:
+            out.append(replaced.get(index, row))
+        out.extend(after.get(index, ()))
+    return out
+
+
+def loop_invariant_code_motion(rows, quads):
+    """Move temps computed from values a loop never changes to the loop's preheader."""
+    cfg = CFG(rows)
+    loops = find_loops(cfg)
+    if not loops:
+        return rows, 0
+    dominated_by = dominators(cfg)
+    definitions = definition_counts(rows)
+    moved = {}  # Row index to the entry point it moves to
+    for loop in loops:
+        point = entry_point(cfg, loop)
+        if point is None:
+            continue
+        indices = [index for index in loop_rows(cfg, loop) if index not in moved]
+        written = {writes(rows[index]) for index in indices}
+        always = every_iteration(cfg, loop, dominated_by)
+        hoisted = set()  # Temps moved out of this loop
+        for block in sorted(always):
+            for index in range(cfg.blocks[block].start, cfg.blocks[block].end):
+                row = rows[index]
+                op, target = row[0], row[3]
+                if index in moved or not (op == COPY or op in BINARY):
+                    continue
+                if target & KIND_MASK != TEMP or definitions.get(target) != 1:
+                    continue
+                if op == DIVIDE and not (row[2] & KIND_MASK == CONST and quads.value(row[2]) != 0):
+                    continue  # A division that may fail must only run when the code asks for it
+                if all(operand in hoisted or operand not in written for operand in reads(row)):
+                    moved[index] = point
+                    hoisted.add(target)
+    if not moved:
+        return rows, 0
+    before = {}
+    for index in sorted(moved):
+        before.setdefault(moved[index], []).append(rows[index])
+    return rebuild(rows, before=before, removed=moved), len(moved)
+
+
+def constant_step(row, variable, quads):
+    """Return c if row is variable = variable + c or variable = variable - (-c) for an int constant, else None."""
+    op, left, right = row[0], row[1], row[2]
+    if op == ADD and right == variable:
+        left, right = right, left
+    if op not in (ADD, SUBTRACT) or left != variable or right & KIND_MASK != CONST:
+        return None
+    value = quads.value(right)
+    if type(value) is not int:
+        return None
+    return value if op == ADD else -value
+
+
+def basic_induction_variables(rows, indices, quads):
+    """Return {variable: [(row index, step)]} for the named variables a loop changes only by int constants.
+
+    A change is i = i + c or i = i - c, or a copy i = t of a temp computed as one
+    of those, with no other change to i in between (CSE leaves i++ in that form
+    when the loop condition reads the new value).
+    """
+    changes = {}
+    temps = {}  # Temp to the row computing it
+    for index in indices:
+        target = writes(rows[index])
+        if target is None:
+            continue
+        if target & KIND_MASK == NAME:
+            changes.setdefault(target, []).append(index)
+        elif target & KIND_MASK == TEMP:
+            temps[target] = index
+    induction = {}
+    for variable, defining in changes.items():
+        steps = []
+        previous = None
+        for index in defining:
+            row = rows[index]
+            computed = temps.get(row[1]) if row[0] == COPY else None
+            if computed is not None and computed < index and (previous is None or previous < computed):
+                row = rows[computed]
+            step = constant_step(row, variable, quads)
+            if step is None:
+                break
+            steps.append((index, step))
+            previous = index
+        else:
+            induction[variable] = steps
+    return induction
+
+
+def strength_reduction(rows, quads):
+    """Replace multiplications of an induction variable by an int constant with a temp increased alongside it."""
+    cfg = CFG(rows)
+    loops = find_loops(cfg)
+    if not loops:
+        return rows, 0
+    definitions = definition_counts(rows)
+    next_temp = max((operand >> KIND_BITS for row in rows for operand in row[1:] if operand & KIND_MASK == TEMP),
+                    default=0) + 1
+    before, after, replaced = {}, {}, {}
+    for loop in loops:
+        point = entry_point(cfg, loop)
+        if point is None:
+            continue
+        indices = loop_rows(cfg, loop)
+        induction = basic_induction_variables(rows, indices, quads)
+        if not induction:
+            continue
+        reduced = {}  # (variable, factor operand) to the temp that holds their product
+        for index in indices:
+            row = rows[index]
+            if row[0] != MULTIPLY or index in replaced or row[3] & KIND_MASK != TEMP or definitions.get(row[3]) != 1:
+                continue
+            variable, factor = row[1], row[2]
+            if variable not in induction:
+                variable, factor = factor, variable
+            if variable not in induction or factor & KIND_MASK != CONST or type(quads.value(factor)) is not int:
+                continue
+            product = reduced.get((variable, factor))
+            if product is None:
+                product = reduced[(variable, factor)] = temp_operand(next_temp)
+                next_temp += 1
+                before.setdefault(point, []).append([MULTIPLY, variable, factor, product])
+                for changed, step in induction[variable]:
+                    increment = quads.const(step * quads.value(factor))
+                    after.setdefault(changed, []).append([ADD, product, increment, product])
+            replaced[index] = [COPY, product, NO_OPERAND, row[3]]
+    if not replaced:
+        return rows, 0
+    return rebuild(rows, before=before, after=after, replaced=replaced), len(replaced)
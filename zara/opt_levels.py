@@ -0,0 +1,14 @@
+"""The optimization levels and the passes each one runs.
+
+Kept apart from the optimizer so that the command lines can offer -O without
+importing the passes, which only a compile at level 1 or above loads.
+"""
+
+# Passes by name, in the order a level runs them
+OPT_LEVELS = {
+    0: (),
+    1: ("constant-folding", "unreachable-code", "copy-propagation", "dead-temp-elimination"),
+    2: ("constant-folding", "unreachable-code", "copy-propagation", "cse", "dead-temp-elimination"),
+    3: ("sccp", "constant-folding", "unreachable-code", "copy-propagation", "cse", "dead-temp-elimination", "licm",
+        "strength-reduction"),
+}
@@ -0,0 +1,441 @@
+"""Optimization passes over three-address code.
+
+A PassManager runs a list of passes over a Quads store again and again until
+none of them changes anything. Each pass takes the instructions as rows of
+[opcode id, arg1, arg2, result] with packed operands (see tac_ir) and returns
+the rewritten rows and how many instructions it rewrote.
+
+Copy propagation and common subexpression elimination are local: they work
+within basic blocks, which start at a label and end after a jump. Temps are
+only ever used inside the statement that computes them, so dead-temp
+elimination can look at the whole program, or at any run of whole statements
+when a streaming compile optimizes each batch before writing it out.
+
+Level 3 adds passes over the whole control-flow graph: sparse conditional
+constant propagation, on the SSA form of the ssa module, and the loop passes of
+the loops module, loop-invariant code motion and strength reduction. At that
+level the compiler also runs the vectorizer over the syntax tree first.
+"""
+import time
+
+from zara.tac_ir import OPCODES, OPCODE_OF, KIND_MASK, KIND_BITS, CONST, TEMP, NO_OPERAND
+from zara.loops import loop_invariant_code_motion, strength_reduction
+from zara.ssa import SSA, VALUE, START
+from zara.cfg import COPY, IF, GOTO, LABEL, BINARY, ASSIGNING, READ_POSITIONS
+from zara.opt_levels import OPT_LEVELS
+# Strings make '+' order-sensitive, so it is not normalized
+COMMUTATIVE = {OPCODE_OF['*'], OPCODE_OF['==']}
+
+# Give up on reaching a fixed point after this many rounds
+MAX_ROUNDS = 20
+
+# What sparse conditional constant propagation knows of a value, besides the constant operand it always holds
+UNDEFINED, VARYING = NO_OPERAND, -1
+
+
+def fold(op, left, right):
+    """Return the value of a binary operation on two constants, or None if it must be left to run time."""
+    if type(left) is not type(right):
+        return None
+    if op == '+':
+        return left + right
+    if isinstance(left, str):
+        return None
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        if right == 0:
+            return None
+        if isinstance(left, int):
+            # Only exact quotients, which every integer division agrees on
+            return left // right if left % right == 0 else None
+        return left / right
+    if op == '>':
+        return int(left > right)
+    if op == '<':
+        return int(left < right)
+    if op == '==':
+        return int(left == right)
+    return None
+
+
+def constant_folding(rows, quads):
+    """Compute operations on constants now, and resolve conditional jumps on constants."""
+    out = []
+    rewrites = 0
+    for row in rows:
+        op, arg1, arg2, result = row
+        if op in BINARY and arg1 & KIND_MASK == CONST and arg2 & KIND_MASK == CONST:
+            value = fold(OPCODES[op], quads.value(arg1), quads.value(arg2))
+            if value is not None:
+                row = [COPY, quads.const(value), NO_OPERAND, result]
+                rewrites += 1
+        elif op == IF and arg1 & KIND_MASK == CONST:
+            rewrites += 1
+            if not quads.value(arg1):
+                continue  # Never taken
+            row = [GOTO, NO_OPERAND, NO_OPERAND, result]
+        out.append(row)
+    return out, rewrites
+
+
+def unreachable_code(rows, quads):
+    """Remove instructions after a goto that no label leads to, and gotos to the label right after them."""
+    out = []
+    reachable = True
+    for row in rows:
+        op = row[0]
+        if op == LABEL:
+            if out and out[-1][0] == GOTO and out[-1][3] == row[1]:
+                out.pop()
+            reachable = True
+        elif not reachable:
+            continue
+        out.append(row)
+        if op == GOTO:
+            reachable = False
+    return out, 0
+
+
+def copy_propagation(rows, quads):
+    """Replace uses of copied variables by what they were copied from, within each basic block.
+
+    Afterwards, a temp that is computed and then only copied into a variable by
+    the next instruction is computed into that variable directly.
+    """
+    out = []
+    rewrites = 0
+    copies = {}  # Variable to the operand it currently holds a copy of
+    copied_into = {}  # Operand to the variables that hold copies of it
+    for row in rows:
+        op = row[0]
+        if op == LABEL:
+            copies.clear()
+            copied_into.clear()
+            out.append(row)
+            continue
+        for position in READ_POSITIONS[op]:
+            source = copies.get(row[position])
+            if source is not None:
+                row[position] = source
+                rewrites += 1
+        if op in ASSIGNING:
+            target = row[3]
+            # target changes, so it no longer holds a copy, and copies of its old value go stale
+            source = copies.pop(target, None)
+            if source is not None:
+                copied_into[source].discard(target)
+            for variable in copied_into.pop(target, ()):
+                del copies[variable]
+            if op == COPY:
+                if row[1] == target:
+                    rewrites += 1
+                    continue  # x = x
+                copies[target] = row[1]
+                copied_into.setdefault(row[1], set()).add(target)
+        out.append(row)
+        if op == IF or op == GOTO:
+            copies.clear()
+            copied_into.clear()
+
+    uses = count_temp_uses(out)
+    coalesced = []
+    for row in out:
+        previous = coalesced[-1] if coalesced else None
+        if (row[0] == COPY and previous is not None and previous[0] in BINARY and previous[3] == row[1]
+                and row[1] & KIND_MASK == TEMP and uses.get(row[1]) == 1):
+            previous[3] = row[3]
+            rewrites += 1
+            continue
+        coalesced.append(row)
+    return coalesced, rewrites
+
+
+def common_subexpressions(rows, quads):
+    """Local value numbering: reuse a value computed earlier in the block instead of computing it again."""
+    out = []
+    rewrites = 0
+    numbers = {}  # Operand to the number of the value it holds
+    expressions = {}  # (opcode, value number, value number) to the number of its result
+    holders = {}  # Value number to a variable known to hold it
+    next_number = 0
+
+    def number(operand):
+        nonlocal next_number
+        value = numbers.get(operand)
+        if value is None:
+            value = numbers[operand] = next_number
+            next_number += 1
+        return value
+
+    def assign(target, value):
+        old = numbers.get(target)
+        if old is not None and holders.get(old) == target:
+            del holders[old]
+        numbers[target] = value
+        holders.setdefault(value, target)
+
+    for row in rows:
+        op = row[0]
+        if op == LABEL:
+            numbers.clear()
+            expressions.clear()
+            holders.clear()
+        elif op in BINARY:
+            left, right = number(row[1]), number(row[2])
+            if op in COMMUTATIVE and right < left:
+                left, right = right, left
+            key = (op, left, right)
+            value = expressions.get(key)
+            holder = holders.get(value) if value is not None else None
+            if holder is not None:
+                row = [COPY, holder, NO_OPERAND, row[3]]
+                rewrites += 1
+            else:
+                value = next_number
+                next_number += 1
+                expressions[key] = value
+            assign(row[3], value)
+        elif op == COPY:
+            assign(row[3], number(row[1]))
+        elif op in ASSIGNING:
+            # Loads and method calls are never reused: a store or a pop between two of them changes what they give
+            assign(row[3], next_number)
+            next_number += 1
+        out.append(row)
+        if op == IF or op == GOTO:
+            numbers.clear()
+            expressions.clear()
+            holders.clear()
+    return out, rewrites
+
+
+def sparse_conditional_constants(rows, quads):
+    """Propagate constants over the whole program, following only the branches their values leave possible.
+
+    This is the algorithm of Wegman and Zadeck, on SSA form. Each value starts
+    UNDEFINED and can only move down to a constant and then to VARYING; a block
+    is only looked at once some edge into it can be taken, and a phi only meets
+    the values arriving over such edges. Afterwards, reads of constant values
+    read the constants, instructions computing them assign them, conditional
+    jumps on them become gotos or go away, and blocks no edge reaches are removed.
+    """
+    form = SSA(rows)
+    ssa_rows, phis, uses = form.rows, form.phis, form.uses
+    cfg = form.cfg
+    blocks = cfg.blocks
+    block_of = [0] * len(ssa_rows)
+    for block in blocks:
+        for index in range(block.start, block.end):
+            block_of[index] = block.index
+    # Values on entry could be anything
+    cells = [VARYING if definition is None else UNDEFINED for definition in form.definitions]
+    executable = bytearray(len(blocks))
+    edges = set()
+    flow = [(START, index) for index in form.starts]  # Edges found to be taken, not yet followed
+    changed = []  # Values whose cells moved down, not yet passed on to their uses
+
+    def cell_of(operand):
+        kind = operand & KIND_MASK
+        if kind == VALUE:
+            return cells[operand >> KIND_BITS]
+        return operand if kind == CONST else VARYING
+
+    def lower(value, cell):
+        old = cells[value]
+        if cell == old or cell == UNDEFINED or old == VARYING:
+            return
+        cells[value] = cell if old == UNDEFINED else VARYING  # A second, different constant means it varies
+        changed.append(value)
+
+    def visit_phi(phi):
+        cell = UNDEFINED
+        node = phi.block
+        for source, argument in zip(form.predecessors[node], phi.arguments):
+            if argument is None or (source, node) not in edges:
+                continue
+            incoming = cells[argument]
+            if incoming == UNDEFINED or incoming == cell:
+                continue
+            if cell != UNDEFINED or incoming == VARYING:
+                cell = VARYING
+                break
+            cell = incoming
+        lower(phi.target, cell)
+
+    def visit_row(index):
+        op, arg1, arg2, result = ssa_rows[index]
+        if op == COPY:
+            lower(result >> KIND_BITS, cell_of(arg1))
+        elif op in BINARY:
+            left, right = cell_of(arg1), cell_of(arg2)
+            if left == VARYING or right == VARYING:
+                lower(result >> KIND_BITS, VARYING)
+            elif left != UNDEFINED and right != UNDEFINED:
+                value = fold(OPCODES[op], quads.value(left), quads.value(right))
+                lower(result >> KIND_BITS, VARYING if value is None else quads.const(value))
+        elif op == IF:
+            node = block_of[index]
+            condition = cell_of(arg1)
+            jump = cfg.block_of_label.get(result)
+            if condition == VARYING or (condition != UNDEFINED and quads.value(condition)):
+                if jump is not None:
+                    flow.append((node, jump))
+            if condition == VARYING or (condition != UNDEFINED and not quads.value(condition)):
+                if node + 1 < len(blocks):
+                    flow.append((node, node + 1))
+        elif op in ASSIGNING:
+            lower(result >> KIND_BITS, VARYING)  # What a container holds is not followed
+
+    while flow or changed:
+        while flow:
+            source, node = flow.pop()
+            if (source, node) in edges:
+                continue
+            edges.add((source, node))
+            for phi in phis[node]:
+                visit_phi(phi)
+            if executable[node]:
+                continue
+            executable[node] = 1
+            block = blocks[node]
+            for index in range(block.start, block.end):
+                visit_row(index)
+            last = ssa_rows[block.end - 1][0] if block.end > block.start else None
+            if last != IF:
+                flow.extend((node, successor) for successor in block.successors)
+        while changed and not flow:
+            for use in uses[changed.pop()]:
+                if isinstance(use, int):
+                    if executable[block_of[use]]:
+                        visit_row(use)
+                elif executable[use.block]:
+                    visit_phi(use)
+
+    out = []
+    rewrites = 0
+    for block in blocks:
+        if not executable[block.index]:
+            continue
+        for index in range(block.start, block.end):
+            row = ssa_rows[index]
+            op = row[0]
+            if op == IF:
+                condition = cell_of(row[1])
+                if condition != VARYING and condition != UNDEFINED:
+                    rewrites += 1
+                    if quads.value(condition):
+                        out.append([GOTO, NO_OPERAND, NO_OPERAND, row[3]])
+                    continue
+            elif op == COPY or op in BINARY:
+                cell = cells[row[3] >> KIND_BITS]
+                if cell != VARYING and cell != UNDEFINED and not (op == COPY and row[1] == cell):
+                    row = [COPY, cell, NO_OPERAND, row[3]]
+                    rewrites += 1
+            for position in READ_POSITIONS[op]:
+                operand = row[position]
+                if operand & KIND_MASK == VALUE:
+                    cell = cells[operand >> KIND_BITS]
+                    if cell != VARYING and cell != UNDEFINED:
+                        row[position] = cell
+                        rewrites += 1
+            out.append(row)
+    return form.destruct(out), rewrites
+
+
+def count_temp_uses(rows):
+    uses = {}
+    for row in rows:
+        for position in READ_POSITIONS[row[0]]:
+            operand = row[position]
+            if operand & KIND_MASK == TEMP:
+                uses[operand] = uses.get(operand, 0) + 1
+    return uses
+
+
+def dead_temp_elimination(rows, quads):
+    """Remove instructions that compute temps nothing reads; variables, and container operations, are always kept."""
+    uses = count_temp_uses(rows)
+    dead = True
+    while dead:
+        dead = False
+        live = []
+        for row in rows:
+            op, arg1, arg2, result = row
+            if (op == COPY or op in BINARY) and result & KIND_MASK == TEMP and not uses.get(result):
+                for operand in (arg1, arg2):
+                    if operand & KIND_MASK == TEMP:
+                        uses[operand] -= 1
+                dead = True
+                continue
+            live.append(row)
+        rows = live
+    return rows, 0
+
+
+PASSES = {
+    "sccp": sparse_conditional_constants,
+    "constant-folding": constant_folding,
+    "unreachable-code": unreachable_code,
+    "copy-propagation": copy_propagation,
+    "cse": common_subexpressions,
+    "dead-temp-elimination": dead_temp_elimination,
+    "licm": loop_invariant_code_motion,
+    "strength-reduction": strength_reduction,
+}
+
+
+class PassStats:
+    __slots__ = ("runs", "rewrites", "removed", "seconds")
+
+    def __init__(self):
+        self.runs = 0
+        self.rewrites = 0  # Instructions changed in place
+        self.removed = 0  # Instructions deleted
+        self.seconds = 0.0
+
+
+class PassManager:
+    """Runs optimization passes over Quads until they stop changing the code."""
+
+    def __init__(self, level=2, passes=None):
+        if passes is None:
+            if level not in OPT_LEVELS:
+                raise ValueError(f"Unknown optimization level {level}, expected one of {sorted(OPT_LEVELS)}.")
+            passes = OPT_LEVELS[level]
+        self.passes = [(name, PASSES[name]) for name in passes]
+        self.stats = {name: PassStats() for name in passes}
+        self.rounds = 0
+
+    def run(self, quads):
+        """Optimize quads in place and return them."""
+        if not self.passes or not len(quads):
+            return quads
+        rows = quads.rows()
+        for _ in range(MAX_ROUNDS):
+            self.rounds += 1
+            changed = False
+            for name, function in self.passes:
+                stats = self.stats[name]
+                before = len(rows)
+                start = time.perf_counter()
+                rows, rewrites = function(rows, quads)
+                stats.seconds += time.perf_counter() - start
+                stats.runs += 1
+                stats.rewrites += rewrites
+                stats.removed += before - len(rows)
+                if rewrites or len(rows) != before:
+                    changed = True
+            if not changed:
+                break
+        quads.load_rows(rows)
+        return quads
+
+    def report(self):
+        """Return the statistics of each pass as lines of text."""
+        lines = [f"{'pass':24} {'runs':>6} {'rewritten':>10} {'removed':>9} {'ms':>9}"]
+        for name, stats in self.stats.items():
+            lines.append(f"{name:24} {stats.runs:6} {stats.rewrites:10} {stats.removed:9} {stats.seconds * 1000:9.2f}")
+        return lines
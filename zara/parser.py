@@ -0,0 +1,581 @@
+from zara.lexer import Token, TokenType, TokenStream
+from zara.ast_nodes import (Program, VarDecl, Assign, ExprStatement, If, DoWhile, For, Return, MethodDecl,
+                       ClassDecl, BinOp, Literal, Name, Call, Member, Index, New, ArrayLiteral, LVALUES)
+
+# Token types whose value is the terminal itself, like '(' or 'if', rather than data
+SYMBOL_TYPES = (TokenType.KEYWORD, TokenType.OPERATOR, TokenType.DELIMITER, TokenType.DATA_TYPE)
+
+# Binary operators by precedence, loosest first; '=' groups to the right
+ASSIGNMENT, EQUALITY, COMPARISON, SUM, PRODUCT = 1, 2, 3, 4, 5
+BINARY_PRECEDENCE = {"=": ASSIGNMENT, "==": EQUALITY, "<": COMPARISON, ">": COMPARISON,
+                     "+": SUM, "-": SUM, "*": PRODUCT, "/": PRODUCT}
+NON_ASSOCIATIVE = (EQUALITY, COMPARISON)  # Levels whose operators do not chain
+IDENTIFIER, LITERAL = TokenType.IDENTIFIER, TokenType.LITERAL
+# Brackets an expression can have open, and the delimiter that closes each
+GROUP, CALL, INDEX, ARRAY, NEW = range(5)
+CLOSING = {GROUP: ")", CALL: ")", INDEX: "]", ARRAY: "]", NEW: ")"}
+
+class Parser:
+    def __init__(self, tokens, diagnostics=None):
+        self.stream = TokenStream(tokens)
+        self.current_token = self.stream.peek()
+        # With a Diagnostics collection, syntax errors are recorded there and parsing resumes
+        # after the broken statement; without one the first error is raised.
+        self.diagnostics = diagnostics
+        self.depth = 0  # Number of blocks the parser is inside
+
+    def advance(self):
+        """Move to the next token."""
+        token = self.current_token
+        self.stream.advance()
+        self.current_token = self.stream.peek()  # None at end of input
+        return token
+
+    def parse(self):
+        """Parse the input tokens into a Program tree."""
+        return Program(list(self.iter_statements()))
+
+    def iter_statements(self):
+        """Yield top-level statements one at a time, so a caller can process them as they are parsed."""
+        while self.current_token is not None:
+            if self.diagnostics is not None and self.diagnostics.full:
+                return
+            try:
+                statement = self.item()
+            except SyntaxError as error:
+                self.recover(error)
+                continue
+            if statement is not None:
+                yield statement
+
+    def recover(self, error):
+        """Record a syntax error, then skip to the end of the broken statement (panic mode).
+
+        Tokens are skipped up to and including the next ';', or up to the '}' that closes the
+        enclosing block. A '{' met on the way is skipped through its matching '}', together with
+        any else block after it, so the body of a broken if or loop does not cause more errors.
+        """
+        if self.diagnostics is None:
+            raise error
+        token = self.current_token
+        if token is None:
+            self.diagnostics.add("syntax", str(error))
+        else:
+            self.diagnostics.add("syntax", str(error), token.start, token.end)
+        nesting = 0
+        while self.current_token is not None:
+            if self.check("{"):
+                nesting += 1
+            elif self.check("}"):
+                if nesting == 0:
+                    if self.depth == 0:
+                        self.advance()  # A stray '}' at the top level
+                    return
+                nesting -= 1
+                if nesting == 0:
+                    self.advance()
+                    if not self.check("else"):
+                        return
+                    continue
+            elif self.check(";") and nesting == 0:
+                self.advance()
+                return
+            self.advance()
+
+    def match(self, token_type):
+        """Check if current token matches a type and advance if it does."""
+        if self.current_token and self.current_token.type == token_type:
+            return self.advance()
+        raise SyntaxError(f"Expected {token_type}, got {self.current_token}")
+
+    def expect(self, value):
+        """Check if current token is the given keyword, operator or delimiter and advance if it is."""
+        if self.check(value):
+            return self.advance()
+        raise SyntaxError(f"Expected '{value}', got {self.current_token}")
+
+    def check(self, value, offset=0):
+        """Return whether the token offset places ahead is the given keyword, operator or delimiter."""
+        token = self.current_token if offset == 0 else self.stream.peek(offset)
+        return token is not None and token.value == value and token.type in SYMBOL_TYPES
+
+    def item(self):
+        """Parse a top-level item: a class, a method or a statement."""
+        if self.check("class"):
+            return self.class_declaration()
+        return self.statement(allow_methods=True)
+
+    def statements(self):
+        """Parse statements up to the end of input or the closing brace of a block."""
+        body = []
+        while self.current_token is not None and not self.check("}"):
+            try:
+                statement = self.statement()
+            except SyntaxError as error:
+                self.recover(error)
+                continue
+            if statement is not None:
+                body.append(statement)
+        return body
+
+    def statement(self, allow_methods=False):
+        """Parse a single statement, such as an expression or control structure."""
+        if self.starts_declaration():
+            return self.declaration(allow_methods)
+        elif self.check("if"):
+            return self.if_statement()
+        elif self.check("do"):
+            return self.do_while_statement()
+        elif self.check("for"):
+            return self.for_statement()
+        elif self.check("return"):
+            return self.return_statement()
+        elif self.check(";"):
+            self.advance()  # Just move past standalone semicolons
+            return None
+        else:
+            expr = self.expression()
+            end = self.expect(";")  # Expecting ';' after an expression
+            if isinstance(expr, Assign):
+                return expr
+            return ExprStatement(expr, start=expr.start, end=end.end)
+
+    def starts_declaration(self):
+        """Return whether a declaration starts here: a built-in type, or a class name followed by a name."""
+        token = self.current_token
+        if token.type == TokenType.DATA_TYPE:
+            return True
+        following = self.stream.peek(1)
+        return token.type == TokenType.IDENTIFIER and following is not None and following.type == TokenType.IDENTIFIER
+
+    def data_type(self):
+        """Parse a type such as int, array<float>, function<int, int> or a class name; return it as text."""
+        token = self.current_token
+        if token is not None and token.type == TokenType.IDENTIFIER:
+            return self.advance().value, token
+        name = self.match(TokenType.DATA_TYPE).value
+        if name in ("array", "stack"):
+            self.expect("<")
+            element, _ = self.data_type()
+            self.expect(">")
+            return f"{name}<{element}>", token
+        if name == "function":
+            self.expect("<")
+            types = [self.data_type()[0]]
+            while self.check(","):
+                self.advance()
+                types.append(self.data_type()[0])
+            self.expect(">")
+            return f"function<{','.join(types)}>", token
+        return name, token
+
+    def declaration(self, allow_methods=False):
+        """Parse a variable declaration, or a method when allowed and a parameter list follows."""
+        data_type, start = self.data_type()
+        name = self.match(TokenType.IDENTIFIER)
+        if allow_methods and self.check("("):
+            return self.method_rest(data_type, name.value, start)
+        value = None
+        if self.check("="):
+            self.advance()  # '='
+            value = self.expression()
+        end = self.expect(";")
+        return VarDecl(data_type, name.value, value, start=start.start, end=end.end)
+
+    def method_rest(self, return_type, name, start):
+        """Parse the parameter list and body of a method whose return type and name were read."""
+        self.expect("(")
+        params = []
+        if not self.check(")"):
+            params.append(self.parameter())
+            while self.check(","):
+                self.advance()
+                params.append(self.parameter())
+        self.expect(")")
+        body, end = self.block()
+        return MethodDecl(return_type, name, params, body, start=start.start, end=end.end)
+
+    def parameter(self):
+        data_type, _ = self.data_type()
+        return data_type, self.match(TokenType.IDENTIFIER).value
+
+    def class_declaration(self):
+        """Parse a class with its fields, constructors and methods."""
+        start = self.expect("class")
+        name = self.match(TokenType.IDENTIFIER).value
+        self.expect("{")
+        members = []
+        self.depth += 1
+        try:
+            while not self.check("}"):
+                if self.current_token is None:
+                    raise SyntaxError(f"Unexpected end of input in class {name}")
+                try:
+                    members.append(self.member())
+                except SyntaxError as error:
+                    self.recover(error)
+        finally:
+            self.depth -= 1
+        end = self.expect("}")
+        return ClassDecl(name, members, start=start.start, end=end.end)
+
+    def member(self):
+        """Parse a class member: a field, a method or a constructor."""
+        token = self.current_token
+        if token.type == TokenType.IDENTIFIER and self.check("(", 1):  # Constructor
+            self.advance()
+            return self.method_rest(None, token.value, token)
+        return self.declaration(allow_methods=True)
+
+    def expression(self):
+        """Parse an expression by precedence climbing, with an explicit stack instead of recursion.
+
+        Operators waiting for their right operand and brackets waiting to be closed are kept
+        on pending, so nesting is limited only by memory and each token is looked at once.
+        Assignment binds loosest and groups to the right; '==', '<' and '>' do not chain.
+        """
+        pending = []  # (precedence, op, left) for an operator; (0, bracket, items, opener, name) for a bracket
+        # Locals avoid repeated global and attribute lookups in the loop
+        symbol_types, precedences, advance = SYMBOL_TYPES, BINARY_PRECEDENCE, self.advance
+        while True:
+            # An operand, after any opening brackets
+            token = self.current_token
+            if token is None:
+                raise SyntaxError("Unexpected end of input in expression")
+            kind, value = token.type, token.value
+            if kind is IDENTIFIER or (value == "this" and kind in symbol_types):
+                advance()
+                operand = Name(value, start=token.start, end=token.end)
+            elif kind is LITERAL:
+                advance()
+                operand = Literal(value, start=token.start, end=token.end)
+            elif value == "(" and kind in symbol_types:
+                advance()
+                pending.append((0, GROUP, None, token, None))
+                continue
+            elif value == "[" and kind in symbol_types:
+                advance()
+                if not self.check("]"):
+                    pending.append((0, ARRAY, [], token, None))
+                    continue
+                end = advance()
+                operand = ArrayLiteral([], None, start=token.start, end=end.end)
+            elif value == "new" and kind in symbol_types:
+                advance()
+                class_name = self.match(TokenType.IDENTIFIER).value
+                self.expect("(")
+                if not self.check(")"):
+                    pending.append((0, NEW, [], token, class_name))
+                    continue
+                end = advance()
+                operand = New(class_name, [], start=token.start, end=end.end)
+            else:
+                raise SyntaxError(f"Unexpected token in expression: {token}")
+
+            # Postfix and binary operators and closing brackets, until something needs another operand
+            while True:
+                token = self.current_token
+                value = token.value if token is not None and token.type in symbol_types else None
+                if value == "(":
+                    advance()
+                    if not self.check(")"):
+                        pending.append((0, CALL, [], operand, None))
+                        break
+                    end = advance()
+                    operand = Call(operand, [], start=operand.start, end=end.end)
+                elif value == ".":
+                    advance()
+                    name = self.match(TokenType.IDENTIFIER)
+                    operand = Member(operand, name.value, start=operand.start, end=name.end)
+                elif value == "[":
+                    advance()
+                    pending.append((0, INDEX, None, operand, None))
+                    break
+                elif value == "++":
+                    if not isinstance(operand, LVALUES):
+                        raise SyntaxError(f"Cannot increment {type(operand).__name__}")
+                    end = advance()
+                    one = Literal(1, start=end.start, end=end.end)
+                    operand = Assign(operand, BinOp("+", operand, one, start=operand.start, end=end.end),
+                                     start=operand.start, end=end.end)
+                elif value in precedences:
+                    precedence = precedences[value]
+                    # Operators that bind at least as tightly are complete; '=' waits for its right side
+                    if pending and pending[-1][0] >= precedence:
+                        operand = self.reduce(pending, operand, precedence + (precedence == ASSIGNMENT), precedence)
+                    if precedence == ASSIGNMENT and not isinstance(operand, LVALUES):
+                        raise SyntaxError(f"Cannot assign to {type(operand).__name__}")
+                    advance()
+                    pending.append((precedence, value, operand))
+                    break
+                else:
+                    # A separator, a closing bracket or the end of the expression
+                    if not pending:
+                        return operand
+                    operand = self.reduce(pending, operand, ASSIGNMENT, None)
+                    if not pending:
+                        return operand
+                    _, bracket, items, opener, class_name = pending[-1]
+                    if value == "," and items is not None:
+                        advance()
+                        items.append(operand)
+                        break
+                    closing = CLOSING[bracket]
+                    if value != closing:
+                        raise SyntaxError(f"Expected '{closing}', got {token}")
+                    pending.pop()
+                    end = advance()
+                    if bracket == CALL:
+                        items.append(operand)
+                        operand = Call(opener, items, start=opener.start, end=end.end)
+                    elif bracket == INDEX:
+                        operand = Index(opener, operand, start=opener.start, end=end.end)
+                    elif bracket == ARRAY:
+                        items.append(operand)
+                        operand = ArrayLiteral(items, None, start=opener.start, end=end.end)
+                    elif bracket == NEW:
+                        items.append(operand)
+                        operand = New(class_name, items, start=opener.start, end=end.end)
+                    # A parenthesized expression keeps the offsets of what is inside
+
+    def reduce(self, pending, operand, limit, incoming):
+        """Complete the pending operators of precedence at least limit, with operand as the last right side.
+
+        incoming is the precedence of the operator that caused the reduction, if any; meeting
+        another comparison of the same level means comparisons were chained.
+        """
+        while pending and pending[-1][0] >= limit:
+            precedence, op, left = pending.pop()
+            if precedence == incoming and precedence in NON_ASSOCIATIVE:
+                raise SyntaxError("Comparisons cannot be chained")
+            if precedence == ASSIGNMENT:
+                operand = Assign(left, operand, start=left.start, end=operand.end)
+            else:
+                operand = BinOp(op, left, operand, start=left.start, end=operand.end)
+        return operand
+
+    def block(self):
+        """Parse a brace-delimited block of statements."""
+        self.expect("{")
+        self.depth += 1
+        try:
+            body = self.statements()  # parse the statements inside the block
+        finally:
+            self.depth -= 1
+        end = self.expect("}")
+        return body, end
+
+    def if_statement(self):
+        """Parse an if statement with optional else-if and else parts."""
+        start = self.expect("if")
+        self.expect("(")
+        condition = self.expression()
+        self.expect(")")
+        body, end = self.block()
+        orelse = None
+        if self.check("else"):
+            self.advance()  # 'else'
+            if self.check("if"):
+                nested = self.if_statement()
+                orelse, end = [nested], nested
+            else:
+                orelse, end = self.block()  # parse the else block
+        return If(condition, body, orelse, start=start.start, end=end.end)
+
+    def do_while_statement(self):
+        """Parse a do-while loop."""
+        start = self.expect("do")
+        body, _ = self.block()  # parse the body of the loop
+        self.expect("while")
+        self.expect("(")
+        condition = self.expression()
+        self.expect(")")
+        end = self.expect(";")
+        return DoWhile(body, condition, start=start.start, end=end.end)
+
+    def for_statement(self):
+        """Parse a for loop: for (init; condition; update) { ... }."""
+        start = self.expect("for")
+        self.expect("(")
+        init = None
+        if self.current_token is not None and self.starts_declaration():
+            data_type, type_token = self.data_type()
+            name = self.match(TokenType.IDENTIFIER)
+            self.expect("=")
+            value = self.expression()
+            init = VarDecl(data_type, name.value, value, start=type_token.start, end=value.end)
+        elif not self.check(";"):
+            init = self.expression()
+            if not isinstance(init, Assign):
+                init = ExprStatement(init, start=init.start, end=init.end)
+        self.expect(";")
+        condition = None if self.check(";") else self.expression()
+        self.expect(";")
+        update = None if self.check(")") else self.expression()
+        self.expect(")")
+        body, end = self.block()
+        return For(init, condition, update, body, start=start.start, end=end.end)
+
+    def return_statement(self):
+        """Parse a return statement with an optional value."""
+        start = self.expect("return")
+        value = None if self.check(";") else self.expression()
+        end = self.expect(";")
+        return Return(value, start=start.start, end=end.end)
+
+
+class RecursiveExpressionParser(Parser):
+    """Parses expressions by recursive descent, one method per precedence level.
+
+    This was Parser's expression parser before precedence climbing; each level of
+    parentheses takes several Python frames, so deep nesting exceeds the recursion
+    limit. It is kept to check and measure Parser.expression against.
+    """
+
+    def expression(self):
+        """Parse an expression; assignment binds loosest and groups to the right."""
+        left = self.equality()
+        if self.check("="):
+            if not isinstance(left, LVALUES):
+                raise SyntaxError(f"Cannot assign to {type(left).__name__}")
+            self.advance()
+            value = self.expression()
+            return Assign(left, value, start=left.start, end=value.end)
+        return left
+
+    def equality(self):
+        """Parse an equality test; '==' does not chain."""
+        left = self.comparison()
+        if self.check("=="):
+            self.advance()
+            right = self.comparison()
+            left = BinOp("==", left, right, start=left.start, end=right.end)
+            if self.check("=="):
+                raise SyntaxError("Comparisons cannot be chained")
+        return left
+
+    def comparison(self):
+        """Parse a '<' or '>' comparison; comparisons do not chain."""
+        left = self.arithmetic()
+        if self.check("<") or self.check(">"):
+            op = self.advance().value
+            right = self.arithmetic()
+            left = BinOp(op, left, right, start=left.start, end=right.end)
+            if self.check("<") or self.check(">"):
+                raise SyntaxError("Comparisons cannot be chained")
+        return left
+
+    def arithmetic(self):
+        """Parse a sum or difference of terms."""
+        left = self.term()
+        while self.check("+") or self.check("-"):
+            op = self.advance().value
+            right = self.term()
+            left = BinOp(op, left, right, start=left.start, end=right.end)
+        return left
+
+    def term(self):
+        """Parse a term within an expression (handling *, /)."""
+        left = self.factor()
+        while self.check("*") or self.check("/"):
+            op = self.advance().value
+            right = self.factor()
+            left = BinOp(op, left, right, start=left.start, end=right.end)
+        return left
+
+    def factor(self):
+        """Parse a primary expression followed by any calls, member accesses, indexes or '++'."""
+        expr = self.primary()
+        while True:
+            if self.check("("):
+                self.advance()
+                args = self.arguments(")")
+                end = self.expect(")")
+                expr = Call(expr, args, start=expr.start, end=end.end)
+            elif self.check("."):
+                self.advance()
+                name = self.match(TokenType.IDENTIFIER)
+                expr = Member(expr, name.value, start=expr.start, end=name.end)
+            elif self.check("["):
+                self.advance()
+                index = self.expression()
+                end = self.expect("]")
+                expr = Index(expr, index, start=expr.start, end=end.end)
+            elif self.check("++"):
+                if not isinstance(expr, LVALUES):
+                    raise SyntaxError(f"Cannot increment {type(expr).__name__}")
+                end = self.advance()
+                one = Literal(1, start=end.start, end=end.end)
+                expr = Assign(expr, BinOp("+", expr, one, start=expr.start, end=end.end),
+                              start=expr.start, end=end.end)
+            else:
+                return expr
+
+    def primary(self):
+        """Parse a literal, a name, a parenthesized expression, an object creation or an array literal."""
+        token = self.current_token
+        if token is None:
+            raise SyntaxError("Unexpected end of input in expression")
+        if token.type == TokenType.LITERAL:
+            self.advance()
+            return Literal(token.value, start=token.start, end=token.end)
+        elif token.type == TokenType.IDENTIFIER or self.check("this"):
+            self.advance()
+            return Name(token.value, start=token.start, end=token.end)
+        elif self.check("("):
+            self.advance()
+            expr = self.expression()
+            self.expect(")")  # Expecting ')'
+            return expr
+        elif self.check("new"):
+            self.advance()
+            class_name = self.match(TokenType.IDENTIFIER).value
+            self.expect("(")
+            args = self.arguments(")")
+            end = self.expect(")")
+            return New(class_name, args, start=token.start, end=end.end)
+        elif self.check("["):
+            self.advance()
+            elements = self.arguments("]")
+            end = self.expect("]")
+            return ArrayLiteral(elements, None, start=token.start, end=end.end)
+        else:
+            raise SyntaxError(f"Unexpected token in expression: {token}")
+
+    def arguments(self, closing):
+        """Parse a comma-separated list of expressions up to (not including) the closing delimiter."""
+        args = []
+        if not self.check(closing):
+            args.append(self.expression())
+            while self.check(","):
+                self.advance()
+                args.append(self.expression())
+        return args
+
+
+if __name__ == "__main__":
+    # Sample Zara code tokens (after lexical analysis)
+    tokens = [
+        Token(TokenType.KEYWORD, "do"),
+        Token(TokenType.DELIMITER, "{"),
+        Token(TokenType.IDENTIFIER, "x"),
+        Token(TokenType.OPERATOR, "="),
+        Token(TokenType.LITERAL, 10),
+        Token(TokenType.DELIMITER, ";"),
+        Token(TokenType.DELIMITER, "}"),
+        Token(TokenType.KEYWORD, "while"),
+        Token(TokenType.DELIMITER, "("),
+        Token(TokenType.IDENTIFIER, "x"),
+        Token(TokenType.OPERATOR, ">"),
+        Token(TokenType.LITERAL, 0),
+        Token(TokenType.DELIMITER, ")"),
+        Token(TokenType.DELIMITER, ";")
+    ]
+
+    # Parse the tokens
+    parser = Parser(tokens)
+    try:
+        print(parser.parse())
+        print("Parsing completed successfully.")
+    except SyntaxError as e:
+        print("Parsing error:", e)
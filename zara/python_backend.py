@@ -0,0 +1,343 @@
+"""Ahead-of-time translation of three-address code into Python.
+
+translate() turns the TAC of a whole program into the source of a Python
+function, main(), in which every Zara variable and temp is a local variable.
+compile_program() compiles that into a code object, so CPython's own bytecode
+runs the program with no dispatch loop of ours in between.
+
+The structured statements the generator lowered into label, goto and if quads
+are rebuilt from the control-flow graph:
+
+- a loop header, the target of a back edge from a block it dominates, becomes
+  "while True:"; jumping back to it is "continue" and leaving to the loop's
+  single exit is "break";
+- a block ending in a conditional jump becomes "if ...: ... else: ...", whose
+  arms run up to the block's immediate post-dominator, where they meet again.
+
+Code this cannot express, because a loop has several exits or the graph is
+irreducible or nests deeper than Python allows, is translated instead into a
+loop that dispatches on the number of the next basic block.
+
+A PythonProgram's code object can be cached with dumps() and loads().
+"""
+import importlib.util
+import marshal
+import math
+
+from zara.cfg import CFG, immediate_dominators
+from zara.runtime import allocate
+from zara.tac_ir import OPCODES, OPCODE_OF, VALUE_METHODS, KIND_MASK, KIND_BITS, NAME, CONST, TEMP
+from zara.vectorizer import loop_of, run_loop, variable_names
+from zara.vm import dead_conditions, divide
+
+COPY, IF, GOTO, LABEL = OPCODE_OF['='], OPCODE_OF['if'], OPCODE_OF['goto'], OPCODE_OF['label']
+LOAD, STORE, NEW, VECTOR = OPCODE_OF['[]'], OPCODE_OF['[]='], OPCODE_OF['new'], OPCODE_OF['vector']
+COMPARISONS = {OPCODE_OF['<'], OPCODE_OF['>'], OPCODE_OF['==']}
+ARITHMETIC = {OPCODE_OF[op] for op in ('+', '-', '*')}
+# Container methods that are Python's len(); the others are methods of the runtime containers
+LENGTHS = {OPCODE_OF['length'], OPCODE_OF['size']}
+EXIT = -1  # The end of the program, as a node of the post-dominator tree
+
+# Written before a marshalled code object, which only loads into the Python version that wrote it
+CACHE_MAGIC = b"ZPY1" + importlib.util.MAGIC_NUMBER
+
+
+def literal(value):
+    """Return a Python expression for a constant."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return f"float({str(value)!r})"
+    return repr(value)
+
+
+class Translator:
+    """Renders the TAC of a CFG as the body of a Python function."""
+
+    def __init__(self, cfg, quads):
+        self.cfg = cfg
+        self.rows = cfg.rows
+        self.quads = quads
+        self.dead = dead_conditions(cfg)  # Conditional jumps whose comparison can be written into the if
+        self.lines = []
+
+    def operand(self, operand):
+        kind = operand & KIND_MASK
+        if kind == NAME:
+            return "v_" + self.quads.names.names[operand >> KIND_BITS]
+        if kind == TEMP:
+            return f"t{operand >> KIND_BITS}"
+        if kind == CONST:
+            return literal(self.quads.value(operand))
+        raise ValueError(f"Operand of kind {kind} has no value.")
+
+    def variables(self):
+        """Return the Python names of the Zara variables, with the Zara names they stand for."""
+        names = {}
+        for row in self.rows:
+            for operand in row[1:]:
+                if operand & KIND_MASK == NAME:
+                    names[self.operand(operand)] = self.quads.names.names[operand >> KIND_BITS]
+            if row[0] == VECTOR:
+                for name in variable_names(loop_of(self.quads.value(row[1]))):
+                    names["v_" + name] = name
+        return names
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def statements(self, block, depth):
+        """Emit the instructions of a block up to its jump, and return the Python condition the jump tests."""
+        rows, operand = self.rows, self.operand
+        end = block.end
+        condition = None
+        if end > block.start and rows[end - 1][0] == IF:
+            end -= 1
+            previous = rows[end - 1] if end > block.start else None
+            if (end in self.dead and previous is not None and previous[0] in COMPARISONS
+                    and previous[3] == rows[end][1]):
+                condition = f"{operand(previous[1])} {OPCODES[previous[0]]} {operand(previous[2])}"
+                end -= 1
+            else:
+                condition = operand(rows[end][1])
+        for index in range(block.start, end):
+            op, arg1, arg2, result = rows[index]
+            if op == COPY:
+                self.emit(depth, f"{operand(result)} = {operand(arg1)}")
+            elif op in COMPARISONS:
+                self.emit(depth, f"{operand(result)} = int({operand(arg1)} {OPCODES[op]} {operand(arg2)})")
+            elif op == OPCODE_OF['/']:
+                self.emit(depth, f"{operand(result)} = divide({operand(arg1)}, {operand(arg2)})")
+            elif op in ARITHMETIC:
+                self.emit(depth, f"{operand(result)} = {operand(arg1)} {OPCODES[op]} {operand(arg2)}")
+            elif op == LOAD:
+                self.emit(depth, f"{operand(result)} = {operand(arg1)}[{operand(arg2)}]")
+            elif op == STORE:
+                self.emit(depth, f"{operand(result)}[{operand(arg2)}] = {operand(arg1)}")
+            elif op == NEW:
+                length = f", {operand(arg2)}" if arg2 else ""
+                self.emit(depth, f"{operand(result)} = allocate({operand(arg1)}{length})")
+            elif op == VECTOR:
+                names = variable_names(loop_of(self.quads.value(arg1)))
+                variables = ", ".join(f"{name!r}: v_{name}" for name in names)
+                self.emit(depth, f"{operand(result)} = vector({operand(arg1)}, {{{variables}}})")
+            elif op in LENGTHS:
+                self.emit(depth, f"{operand(result)} = len({operand(arg1)})")
+            elif OPCODES[op] in VALUE_METHODS:
+                self.emit(depth, f"{operand(result)} = {operand(arg1)}.{OPCODES[op]}()")
+            elif op != LABEL and op != GOTO and op != IF:
+                self.emit(depth, f"{operand(arg1)}.{OPCODES[op]}({operand(arg2)})")
+        return condition
+
+    def targets(self, block):
+        """Return where a block's jump goes (None for no jump, EXIT out of the program) and where it falls through."""
+        rows = self.cfg.rows
+        last = rows[block.end - 1] if block.end > block.start else None
+        jump = None
+        if last is not None and (last[0] == IF or last[0] == GOTO):
+            jump = self.cfg.block_of_label.get(last[3], EXIT)
+        fall = None
+        if last is None or last[0] != GOTO:
+            fall = block.index + 1 if block.index + 1 < len(self.cfg.blocks) else EXIT
+        return jump, fall
+
+
+class StructuredTranslator(Translator):
+    """Rebuilds loops and if statements; raises ValueError on control flow it cannot structure."""
+
+    def __init__(self, cfg, quads):
+        super().__init__(cfg, quads)
+        blocks = cfg.blocks
+        self.idom, order = immediate_dominators(0, lambda node: blocks[node].successors,
+                                                lambda node: blocks[node].predecessors)
+        rank = {node: position for position, node in enumerate(order)}
+
+        exits = set(cfg.exits)
+
+        def reverse_successors(node):
+            return cfg.exits if node == EXIT else blocks[node].predecessors
+
+        def reverse_predecessors(node):
+            successors = blocks[node].successors
+            return successors + [EXIT] if node in exits else successors
+
+        # Post-dominators are the dominators of the reversed graph, entered from the end of the program
+        self.ipdom, _ = immediate_dominators(EXIT, reverse_successors, reverse_predecessors)
+
+        self.loops = {}  # Header to (blocks of the loop, its exit)
+        bodies = {}
+        for node in order:
+            for successor in blocks[node].successors:
+                if rank[successor] <= rank[node]:
+                    if not self.dominates(successor, node):
+                        raise ValueError("Irreducible control flow.")
+                    body = bodies.setdefault(successor, {successor})
+                    stack = [node]
+                    while stack:
+                        member = stack.pop()
+                        if member not in body:
+                            body.add(member)
+                            stack.extend(p for p in blocks[member].predecessors if p in rank)
+        for header, body in bodies.items():
+            leaving = {successor for member in body for successor in blocks[member].successors
+                       if successor not in body}
+            if exits & body:
+                leaving.add(EXIT)
+            if len(leaving) != 1:
+                raise ValueError(f"Loop at block {header} does not have a single exit.")
+            self.loops[header] = (body, leaving.pop())
+        self.emitted = set()
+
+    def dominates(self, dominator, node):
+        idom = self.idom
+        while node != dominator:
+            if node == 0:
+                return False
+            node = idom[node]
+        return True
+
+    def translate(self):
+        self.region(0, None, None, 0)
+        return self.lines
+
+    def region(self, node, stop, loop, depth, entering=False):
+        """Emit the code from node up to stop; loop is (header, blocks, exit) of the innermost enclosing loop."""
+        blocks = self.cfg.blocks
+        while node != stop:
+            if loop is not None:
+                header, body, exit = loop
+                if node == exit:
+                    self.emit(depth, "break")
+                    return
+                if node == header and not entering:
+                    self.emit(depth, "continue")
+                    return
+                if node not in body:
+                    raise ValueError(f"Block {node} is reached from a loop it is not part of.")
+            if node == EXIT:
+                return
+            if node in self.loops and not (entering and loop is not None and node == loop[0]):
+                body, exit = self.loops[node]
+                self.emit(depth, "while True:")
+                self.region(node, None, (node, body, exit), depth + 1, entering=True)
+                node = exit
+                continue
+            entering = False
+            if node in self.emitted:
+                raise ValueError(f"Block {node} would be translated twice.")
+            self.emitted.add(node)
+            block = blocks[node]
+            condition = self.statements(block, depth)
+            jump, fall = self.targets(block)
+            if condition is None or jump == fall:
+                node = jump if jump is not None else fall
+                continue
+            merge = self.ipdom.get(node)
+            if merge is None:
+                raise ValueError(f"Block {node} never reaches the end of the program.")
+            self.emit(depth, f"if {condition}:")
+            mark = len(self.lines)
+            self.region(jump, merge, loop, depth + 1)
+            if len(self.lines) == mark:
+                self.emit(depth + 1, "pass")
+            self.emit(depth, "else:")
+            mark = len(self.lines)
+            self.region(fall, merge, loop, depth + 1)
+            if len(self.lines) == mark:
+                self.lines.pop()  # No else arm
+            node = merge
+        # Reaching stop falls out of the construct around this region
+
+
+class DispatchTranslator(Translator):
+    """Translates any control flow into a loop that selects the next basic block by number."""
+
+    def translate(self):
+        blocks = self.cfg.blocks
+        self.emit(0, "block = 0")
+        self.emit(0, "while True:")
+        for block in blocks:
+            self.emit(1, f"{'if' if block.index == 0 else 'elif'} block == {block.index}:")
+            mark = len(self.lines)
+            condition = self.statements(block, 2)
+            jump, fall = self.targets(block)
+            if condition is not None and jump != fall:
+                self.emit(2, f"if {condition}:")
+                self.goto(jump, 3)
+                self.emit(2, "else:")
+                self.goto(fall, 3)
+            else:
+                self.goto(jump if jump is not None else fall, 2)
+            if len(self.lines) == mark:
+                self.emit(2, "pass")
+        self.emit(1, "else:")
+        self.emit(2, "break")
+        return self.lines
+
+    def goto(self, node, depth):
+        self.emit(depth, "break" if node == EXIT else f"block = {node}")
+
+
+def translate(quads, structured=True):
+    """Return the Python source of a function main() that runs quads and returns their variables by name.
+
+    Also returns whether loops and if statements were rebuilt, which needs structured true.
+    """
+    cfg = CFG.from_quads(quads)
+    body = None
+    if structured:
+        try:
+            translator = StructuredTranslator(cfg, quads)
+            body = translator.translate()
+        except (ValueError, RecursionError):
+            body = None
+    if body is None:
+        translator = DispatchTranslator(cfg, quads)
+        body = translator.translate()
+        structured = False
+    variables = translator.variables()
+    lines = ["def main():"]
+    lines += [f"    {name} = None" for name in variables]
+    lines += ["    " + line for line in body]
+    returned = ", ".join(f"{zara!r}: {name}" for name, zara in variables.items())
+    lines.append(f"    return {{{returned}}}")
+    return "\n".join(lines) + "\n", structured
+
+
+class PythonProgram:
+    """A compiled program; run() calls its main() and returns the variables it assigned."""
+
+    def __init__(self, code, structured=True):
+        self.code = code  # Code object of a module defining main()
+        self.structured = structured
+        self.main = None
+
+    def run(self):
+        if self.main is None:
+            namespace = {"divide": divide, "allocate": allocate, "vector": run_loop}
+            exec(self.code, namespace)
+            self.main = namespace["main"]
+        return {name: value for name, value in self.main().items() if value is not None}
+
+    def dumps(self):
+        """Return the code object as bytes for a cache."""
+        return CACHE_MAGIC + bytes([self.structured]) + marshal.dumps(self.code)
+
+    @classmethod
+    def loads(cls, data):
+        """Rebuild a program from dumps() output; raises ValueError if another Python version wrote it."""
+        if data[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            raise ValueError("Cached code was written by a different Python version.")
+        return cls(marshal.loads(data[len(CACHE_MAGIC) + 1:]), bool(data[len(CACHE_MAGIC)]))
+
+
+def compile_program(quads, filename="<zara>", structured=True):
+    """Translate quads to Python and compile them into a PythonProgram."""
+    source, structured = translate(quads, structured)
+    try:
+        code = compile(source, filename, "exec")
+    except (SyntaxError, RecursionError, MemoryError):
+        if not structured:
+            raise
+        # Nested deeper than CPython's compiler allows
+        source, structured = translate(quads, structured=False)
+        code = compile(source, filename, "exec")
+    return PythonProgram(code, structured)
@@ -0,0 +1,370 @@
+"""Run-time values of Zara's array<T> and stack<T> types.
+
+The elements of an array<int> or array<float> are kept unboxed in one
+contiguous typed buffer: a NumPy array when NumPy is installed, and otherwise
+an array from the standard array module. array<string> keeps its elements in
+a list.
+
+With NumPy, the bulk operations (fill, copy, slice, sum and elementwise
+arithmetic) run in its C loops over the whole buffer. The array module only
+does fill, copy and slice that way: sum and elementwise arithmetic box every
+element into a Python object on the way out, which makes them slower than the
+same work on a list of floats (about half the speed in bench_runtime). Without
+NumPy a typed buffer saves memory, a quarter of what a list of boxed floats
+takes, rather than time.
+
+A stack<T> is a typed buffer with spare capacity at its end, which doubles
+when it runs out, so pushes take amortized constant time. Each push or pop is
+a call of a Python method, several times slower than list.append and
+list.pop.
+
+Elements must have exactly the element type, since Zara has no implicit
+conversions; the semantic analyzer checks this for programs, and the
+containers check it again for values stored at run time. The elements of an
+array<int> are 64-bit, and an operation on them whose result does not fit
+raises OverflowError, with NumPy (which would wrap around) as without it.
+"""
+from array import array
+from itertools import repeat
+import importlib.util
+import operator
+import sys
+
+from zara.container_types import ELEMENT_TYPES, NUMERIC, container_type
+from zara.vm import divide
+
+
+def lazy_import(name):
+    """Return a module that is only loaded when one of its attributes is first used, or None if it is missing."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# NumPy takes longer to import than the whole compiler, so it is loaded by the first container that needs it.
+# Without it, the array module holds the same buffers, with slower arithmetic.
+numpy = lazy_import("numpy")
+
+# array module typecode and NumPy dtype of the element types with a typed buffer
+TYPECODES = {"int": "q", "float": "d"}
+DTYPES = {"int": "int64", "float": "float64"}
+ZEROS = {"int": 0, "float": 0.0, "string": ""}
+
+# Range of the elements of an array<int>, which an operation on them must not leave
+INT64_MIN, INT64_MAX = -1 << 63, (1 << 63) - 1
+
+# Slots a stack starts with
+STACK_CAPACITY = 16
+
+OPERATORS = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": divide}
+
+
+def check_values(element_type, values):
+    if element_type not in ELEMENT_TYPES:
+        raise TypeError(f"Containers of {element_type} are not supported.")
+    expected = ELEMENT_TYPES[element_type]
+    found = set(map(type, values))
+    if found - {expected}:
+        wrong = next(kind for kind in found if kind is not expected)
+        raise TypeError(f"Cannot store {wrong.__name__} in a container of {element_type}.")
+
+
+def check_value(element_type, value):
+    """check_values() for one value, without building a set when the value has the element type."""
+    if type(value) is not ELEMENT_TYPES.get(element_type):
+        check_values(element_type, [value])
+
+
+def in_numpy(element_type):
+    """Return whether containers of element_type keep their elements in NumPy arrays."""
+    return numpy is not None and element_type in TYPECODES
+
+
+def scalar(element_type, value):
+    """Return an element read from a buffer as a plain Python value."""
+    return value if type(value) is ELEMENT_TYPES[element_type] else value.item()  # NumPy scalars are not
+
+
+def make_buffer(element_type, values):
+    """Return a buffer of checked values."""
+    if element_type not in TYPECODES:
+        return list(values)
+    if numpy is not None:
+        return numpy.array(values, dtype=DTYPES[element_type])
+    return array(TYPECODES[element_type], values)
+
+
+def filled(element_type, value, length):
+    if element_type not in TYPECODES:
+        return [value] * length
+    if numpy is not None:
+        return numpy.full(length, value, dtype=DTYPES[element_type])
+    return array(TYPECODES[element_type], [value]) * length
+
+
+def wrapped(op, left, right, result):
+    """Return whether NumPy int64 arithmetic may have wrapped around in computing result = left op right."""
+    if op == "+":
+        return bool(numpy.any((left ^ result) & (right ^ result) < 0))  # The sign flipped away from both operands
+    if op == "-":
+        return bool(numpy.any((left ^ right) & (left ^ result) < 0))
+    # A product is estimated in float64, with a margin for its rounding; one this close to 2**63 is not trusted
+    return bool(numpy.any(numpy.abs(numpy.multiply(left, right, dtype=numpy.float64)) >= 2.0 ** 62))
+
+
+def wrap(element_type, data):
+    """Return a ZaraArray over a buffer of checked values, without copying it."""
+    result = ZaraArray.__new__(ZaraArray)
+    result.element_type = element_type
+    result.data = data
+    return result
+
+
+class ZaraArray:
+    """A fixed-length array<T>."""
+
+    __slots__ = ("element_type", "data")
+
+    def __init__(self, element_type, values=()):
+        values = list(values) if not isinstance(values, (list, tuple)) else values
+        check_values(element_type, values)
+        self.element_type = element_type
+        self.data = make_buffer(element_type, values)
+
+    @classmethod
+    def filled(cls, element_type, value, length):
+        """Return an array of length copies of value."""
+        check_value(element_type, value)
+        return wrap(element_type, filled(element_type, value, length))
+
+    def wrap(self, data):
+        """Return a new array of this one's element type over a buffer."""
+        return wrap(self.element_type, data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def check_index(self, index):
+        if type(index) is not int:
+            raise TypeError(f"Array index must be an int, not {type(index).__name__}.")
+        if not 0 <= index < len(self.data):
+            raise IndexError(f"Array index {index} out of range for length {len(self.data)}.")
+
+    def __getitem__(self, index):
+        self.check_index(index)
+        return scalar(self.element_type, self.data[index])
+
+    def __setitem__(self, index, value):
+        self.check_index(index)
+        check_value(self.element_type, value)
+        self.data[index] = value
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        """Return the elements as a list of Python values."""
+        return self.data.tolist() if not isinstance(self.data, list) else list(self.data)
+
+    def fill(self, value):
+        """Set every element to value."""
+        check_value(self.element_type, value)
+        if in_numpy(self.element_type):
+            self.data.fill(value)
+        else:
+            self.data[:] = filled(self.element_type, value, len(self.data))
+
+    def copy(self):
+        data = self.data
+        return self.wrap(array(data.typecode, data) if isinstance(data, array) else data.copy())
+
+    def slice(self, start, stop):
+        """Return a new array of the elements from start up to stop."""
+        if not 0 <= start <= stop <= len(self.data):
+            raise IndexError(f"Slice {start}:{stop} out of range for length {len(self.data)}.")
+        part = self.data[start:stop]  # A copy, except for NumPy, where it is a view
+        return self.wrap(part.copy() if in_numpy(self.element_type) else part)
+
+    def sum(self):
+        """Return the sum of a numeric array's elements; an int sum too big for 64 bits raises OverflowError."""
+        self.check_numeric()
+        data, numpy_buffer = self.data, in_numpy(self.element_type)
+        if self.element_type == "float":
+            return data.sum().item() if numpy_buffer else sum(data, 0.0)
+        if numpy_buffer and len(data) and max(-int(data.min()), int(data.max())) * len(data) <= INT64_MAX:
+            return data.sum().item()  # No partial sum can wrap around
+        total = sum(data.tolist() if numpy_buffer else data, 0)
+        if not INT64_MIN <= total <= INT64_MAX:
+            raise OverflowError("Integer overflow in an array sum.")
+        return total
+
+    def check_numeric(self):
+        if self.element_type not in NUMERIC:
+            raise TypeError(f"Arithmetic is not defined for array<{self.element_type}>.")
+
+    def elementwise(self, op, other):
+        """Return a new array of op applied to each element and the matching element of other, or to other itself."""
+        self.check_numeric()
+        if isinstance(other, ZaraArray):
+            if other.element_type != self.element_type:
+                raise TypeError(f"Cannot combine array<{self.element_type}> with array<{other.element_type}>.")
+            if len(other) != len(self):
+                raise ValueError(f"Arrays of lengths {len(self)} and {len(other)} cannot be combined.")
+            operand = other.data
+        else:
+            check_value(self.element_type, other)
+            operand = other
+        if in_numpy(self.element_type):
+            return self.wrap(self.numpy_elementwise(op, operand))
+        right = operand if isinstance(other, ZaraArray) else repeat(operand, len(self.data))
+        return self.wrap(array(self.data.typecode, map(OPERATORS[op], self.data, right)))
+
+    def numpy_elementwise(self, op, operand):
+        left = self.data
+        integers = self.element_type == "int"
+        if integers and type(operand) is int and not INT64_MIN <= operand <= INT64_MAX:
+            raise OverflowError("Integer too large for an array<int> operation.")
+        if op == "/":
+            if numpy.any(numpy.asarray(operand) == 0):
+                raise ZeroDivisionError("Division by zero in an array.")
+            if not integers:
+                return left / operand
+            if numpy.any((left == INT64_MIN) & (numpy.asarray(operand) == -1)):
+                raise OverflowError("Integer overflow in an array division.")
+            # Truncate toward zero, as integer division does everywhere else in Zara
+            quotient = left // operand
+            return quotient + ((quotient < 0) & (quotient * operand != left))
+        result = {"+": numpy.add, "-": numpy.subtract, "*": numpy.multiply}[op](left, operand)
+        if integers and wrapped(op, left, operand, result):
+            # NumPy wraps int64 around silently, where the scalar ints of Zara would not fit the array
+            raise OverflowError("Integer overflow in an array operation.")
+        return result
+
+    def __add__(self, other):
+        return self.elementwise("+", other)
+
+    def __sub__(self, other):
+        return self.elementwise("-", other)
+
+    def __mul__(self, other):
+        return self.elementwise("*", other)
+
+    def __truediv__(self, other):
+        return self.elementwise("/", other)
+
+    def __eq__(self, other):
+        return (isinstance(other, ZaraArray) and other.element_type == self.element_type
+                and self.tolist() == other.tolist())
+
+    __hash__ = None
+
+    @property
+    def nbytes(self):
+        """Bytes in the element buffer; for array<string>, the list of references only."""
+        if isinstance(self.data, list):
+            return len(self.data) * 8
+        return self.data.nbytes if in_numpy(self.element_type) else len(self.data) * self.data.itemsize
+
+    def __repr__(self):
+        return f"array<{self.element_type}>{self.tolist()}"
+
+
+class ZaraStack:
+    """A stack<T> over a typed buffer that grows by doubling."""
+
+    __slots__ = ("element_type", "data", "size")
+
+    def __init__(self, element_type, values=()):
+        values = list(values)
+        check_values(element_type, values)
+        self.element_type = element_type
+        self.size = len(values)
+        self.data = make_buffer(element_type, values)
+        if len(values) < STACK_CAPACITY:
+            self.reserve(STACK_CAPACITY)
+
+    def reserve(self, capacity):
+        """Make room for at least capacity elements without growing again."""
+        if capacity <= len(self.data):
+            return
+        spare = filled(self.element_type, ZEROS[self.element_type], capacity - len(self.data))
+        if in_numpy(self.element_type):
+            self.data = numpy.concatenate((self.data, spare))
+        else:
+            self.data.extend(spare)
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def __len__(self):
+        return self.size
+
+    def is_empty(self):
+        return self.size == 0
+
+    def push(self, value):
+        check_value(self.element_type, value)
+        if self.size == len(self.data):
+            self.reserve(2 * len(self.data))
+        self.data[self.size] = value
+        self.size += 1
+
+    def push_all(self, values):
+        """Push every value in order, copying them into the buffer in one step."""
+        values = list(values)
+        check_values(self.element_type, values)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            self.reserve(max(needed, 2 * len(self.data)))
+        self.data[self.size:needed] = make_buffer(self.element_type, values)
+        self.size = needed
+
+    def peek(self):
+        if not self.size:
+            raise IndexError("peek at an empty stack")
+        return scalar(self.element_type, self.data[self.size - 1])
+
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from an empty stack")
+        self.size -= 1
+        return scalar(self.element_type, self.data[self.size])
+
+    def to_array(self):
+        """Return the elements, bottom first, as an array<T>."""
+        data = self.data[:self.size]
+        return wrap(self.element_type, data.copy() if in_numpy(self.element_type) else data)
+
+    def __repr__(self):
+        return f"stack<{self.element_type}>{self.to_array().tolist()}"
+
+
+def allocate(data_type, length=None):
+    """Return a new container for a type such as array<int>: an array of length zeros, or an empty stack."""
+    kind, element_type = container_type(data_type)
+    if kind == "array":
+        return wrap(element_type, filled(element_type, ZEROS.get(element_type), length or 0))
+    return ZaraStack(element_type)
+
+
+# What each container method of the TAC calls, by opcode name, with the container as the first argument
+METHODS = {"length": len, "sum": ZaraArray.sum, "fill": ZaraArray.fill, "push": ZaraStack.push,
+           "pop": ZaraStack.pop, "peek": ZaraStack.peek, "size": len}
+
+
+def new_container(data_type, values=()):
+    """Return an empty container, or one holding values, for a type such as array<int> or stack<float>."""
+    parsed = container_type(data_type)
+    if parsed is None:
+        raise TypeError(f"{data_type} is not a container type.")
+    kind, element_type = parsed
+    return ZaraArray(element_type, values) if kind == "array" else ZaraStack(element_type, values)
@@ -0,0 +1,310 @@
+from zara.lexer import RELATIONAL_OPERATORS
+from zara.ast_nodes import NodeVisitor, Program, Name, Member, BinOp, UnsupportedError
+from zara.container_types import ELEMENT_TYPES, NUMERIC, container_type
+
+# The type of [], which can be assigned to an array of any element type
+EMPTY_ARRAY = "array<>"
+
+# Methods of the containers: name to (parameter types, return type), where T is the element type
+CONTAINER_METHODS = {
+    "array": {"length": ([], "int"), "sum": ([], "T"), "fill": (["T"], "void")},
+    "stack": {"push": (["T"], "void"), "pop": ([], "T"), "peek": ([], "T"), "size": ([], "int")},
+}
+
+
+def assignable(value_type, target_type):
+    """Return whether a value of value_type can be stored in a target of target_type."""
+    if value_type == target_type:
+        return True
+    return value_type == EMPTY_ARRAY and target_type.startswith("array<")
+
+
+def check_type(data_type, node):
+    """Check that the element type of a container type is one the runtime can store."""
+    container = container_type(data_type)
+    if container is not None and container[1] not in ELEMENT_TYPES:
+        raise located(TypeError(f"{container[0]} cannot hold {container[1]}; "
+                                f"elements must be one of {', '.join(ELEMENT_TYPES)}."), node)
+
+
+def located(error, node):
+    """Attach the node an error was found at, so that its diagnostic can point there."""
+    error.node = node
+    return error
+
+
+class SemanticAnalyzer(NodeVisitor):
+    def __init__(self, symbol_table, diagnostics=None):
+        self.symbol_table = symbol_table  # Scopes are pushed and popped on it as blocks are entered and left
+        # With a Diagnostics collection, each statement's first error is recorded there and
+        # analysis moves on to the next statement; without one the first error is raised.
+        self.diagnostics = diagnostics
+
+    def analyze(self, tree):
+        """Perform semantic analysis on a Program tree, or on a single statement."""
+        self.statements(tree.body if isinstance(tree, Program) else [tree])
+
+    def statements(self, body):
+        """Analyze a list of statements, recording errors when collecting diagnostics."""
+        diagnostics = self.diagnostics
+        for statement in body:
+            if diagnostics is None:
+                self.visit(statement)
+                continue
+            if diagnostics.full:
+                return
+            try:
+                self.visit(statement)
+            except (NameError, TypeError, UnsupportedError) as error:
+                node = getattr(error, "node", None) or statement
+                diagnostics.add("semantic", str(error), node.start, node.end)
+
+    def block(self, body):
+        """Analyze the statements of a block in a scope of their own."""
+        self.symbol_table.push_scope()
+        try:
+            self.statements(body)
+        finally:
+            self.symbol_table.pop_scope()
+
+    def visit_VarDecl(self, node):
+        """Check for variable declarations."""
+        table = self.symbol_table
+        symbol = table.lookup(node.name)
+        if symbol is not None:
+            where = "this scope" if symbol.depth == table.depth else "an enclosing scope"
+            raise located(NameError(f"Variable '{node.name}' already declared in {where}."), node)
+
+        try:
+            check_type(node.data_type, node)
+            if node.value is not None:
+                value_type = self.visit(node.value)
+                if not assignable(value_type, node.data_type):
+                    raise located(TypeError(
+                        f"Type mismatch: Cannot assign {value_type} to {node.data_type}."), node.value)
+                if value_type == EMPTY_ARRAY:
+                    node.value.data_type = node.data_type  # [] makes an array of the type it is assigned to
+        finally:
+            # Declared even when the initializer is wrong, so later uses are not reported too
+            table.declare(node.name, node.data_type)  # Add variable to current scope
+
+    def visit_Assign(self, node):
+        """Check an assignment against the declared type of its target."""
+        target_type = self.visit(node.target)
+        value_type = self.visit(node.value)
+        if not assignable(value_type, target_type):
+            raise located(TypeError(f"Type mismatch: Cannot assign {value_type} to {target_type}."), node)
+        if value_type == EMPTY_ARRAY:
+            node.value.data_type = target_type
+        return target_type
+
+    def visit_ExprStatement(self, node):
+        self.visit(node.expr)
+
+    def condition(self, node):
+        """Check that a condition has a value that is true or false: a number or a string."""
+        data_type = self.visit(node)
+        if data_type == "void" or data_type == EMPTY_ARRAY or container_type(data_type) is not None:
+            raise located(TypeError(f"Cannot use {data_type} as a condition."), node)
+
+    def visit_If(self, node):
+        """Analyze an if statement."""
+        self.condition(node.condition)
+        self.block(node.body)
+        if node.orelse is not None:
+            self.block(node.orelse)
+
+    def visit_DoWhile(self, node):
+        """Analyze a do-while loop."""
+        self.block(node.body)
+        self.condition(node.condition)  # Declarations in the body are out of scope here
+
+    def visit_For(self, node):
+        """Analyze a for loop; a variable declared in its header is visible only inside the loop."""
+        self.symbol_table.push_scope()
+        try:
+            if node.init is not None:
+                self.visit(node.init)
+            if node.condition is not None:
+                self.condition(node.condition)
+            if node.update is not None:
+                self.visit(node.update)
+            self.block(node.body)
+        finally:
+            self.symbol_table.pop_scope()
+
+    def visit_BinOp(self, node):
+        """Check the operand types of a binary operator; there are no implicit conversions.
+
+        Nested operators are checked in postorder with an explicit stack, as Parser.expression
+        builds them, so long chains and deep nesting do not hit the recursion limit.
+        """
+        types = []  # Types of the operands checked so far
+        pending = [(node, False)]
+        while pending:
+            current, operands_checked = pending.pop()
+            if operands_checked:
+                right = types.pop()
+                types.append(self.binary_type(current, types.pop(), right))
+            elif type(current) is BinOp:
+                pending += ((current, True), (current.right, False), (current.left, False))
+            else:
+                types.append(self.visit(current))
+        return types[0]
+
+    def binary_type(self, node, left, right):
+        """Return the type of a binary operator applied to operands of types left and right."""
+        for operand in (left, right):
+            # Containers have no operators; arithmetic on whole arrays is what the vectorizer makes of loops
+            if operand == "void" or operand == EMPTY_ARRAY or container_type(operand) is not None:
+                raise located(TypeError(f"Operator '{node.op}' is not defined for {operand}."), node)
+        if node.op in RELATIONAL_OPERATORS:
+            if left != right:
+                raise located(TypeError(f"Type mismatch: Cannot compare {left} {node.op} {right}."), node)
+            return "int"
+        if left != right:
+            raise located(TypeError(f"Type mismatch: Cannot apply '{node.op}' to {left} and {right}."), node)
+        if left == "string" and node.op != "+":
+            raise located(TypeError(f"Operator '{node.op}' is not defined for string."), node)
+        return left
+
+    def visit_Name(self, node):
+        symbol = self.symbol_table.lookup(node.id)
+        if symbol is None:
+            raise located(NameError(f"Variable '{node.id}' not declared."), node)
+        return symbol.type
+
+    def generic_visit(self, node):
+        raise located(UnsupportedError(f"{type(node).__name__} cannot be compiled."), node)
+
+    def visit_MethodDecl(self, node):
+        raise located(UnsupportedError(
+            f"Methods are not supported: '{node.name}' cannot be compiled, only top-level statements."), node)
+
+    def visit_ClassDecl(self, node):
+        raise located(UnsupportedError(f"Classes are not supported: '{node.name}' cannot be compiled."), node)
+
+    def visit_Return(self, node):
+        raise located(UnsupportedError("'return' needs a method to return from, and methods are not supported."),
+                      node)
+
+    def visit_New(self, node):
+        raise located(UnsupportedError(f"Objects are not supported: 'new {node.class_name}' cannot be compiled."),
+                      node)
+
+    def visit_Member(self, node):
+        raise located(UnsupportedError(
+            f"Fields are not supported: '.{node.name}' can only be called, as a method of an array or stack."), node)
+
+    def visit_ArrayLiteral(self, node):
+        """An array literal has the type array<T> when every element is a T."""
+        if not node.elements:
+            node.data_type = EMPTY_ARRAY  # Until an assignment gives it the type of its target
+            return EMPTY_ARRAY
+        element_type = self.visit(node.elements[0])
+        for element in node.elements[1:]:
+            found = self.visit(element)
+            if found != element_type:
+                raise located(TypeError(
+                    f"Array elements must all have one type: found {found} after {element_type}."), element)
+        data_type = f"array<{element_type}>"
+        check_type(data_type, node)
+        node.data_type = data_type
+        return data_type
+
+    def visit_Index(self, node):
+        """Indexing an array<T> with an int gives a T."""
+        target_type = self.visit(node.target)
+        container = container_type(target_type)
+        if container is None or container[0] != "array":
+            raise located(TypeError(f"Cannot index {target_type}; only arrays can be indexed."), node)
+        index_type = self.visit(node.index)
+        if index_type != "int":
+            raise located(TypeError(f"Array index must be int, not {index_type}."), node.index)
+        return container[1]
+
+    def visit_Call(self, node):
+        """Check a call of a container method, the only calls there are."""
+        if isinstance(node.func, Name):
+            raise located(UnsupportedError(f"Functions are not supported: '{node.func.id}()' cannot be called; "
+                                           f"only the methods of arrays and stacks can."), node)
+        if not isinstance(node.func, Member):
+            raise located(UnsupportedError("Only the methods of arrays and stacks can be called."), node)
+        receiver = self.visit(node.func.obj)
+        container = container_type(receiver)
+        if container is None:
+            raise located(TypeError(f"{receiver} has no methods; only arrays and stacks do."), node)
+        kind, element_type = container
+        method = CONTAINER_METHODS[kind].get(node.func.name)
+        if method is None:
+            raise located(NameError(f"{receiver} has no method '{node.func.name}'."), node)
+        parameters, result = method
+        if node.func.name == "sum" and element_type not in NUMERIC:
+            raise located(TypeError(f"Cannot sum {receiver}."), node)
+        if len(node.args) != len(parameters):
+            raise located(TypeError(f"{node.func.name}() takes {len(parameters)} argument(s), "
+                                    f"got {len(node.args)}."), node)
+        for argument, parameter in zip(node.args, parameters):
+            expected = element_type if parameter == "T" else parameter
+            found = self.visit(argument)
+            if found != expected:
+                raise located(TypeError(f"Type mismatch: {node.func.name}() expects {expected}, got {found}."),
+                              argument)
+        return element_type if result == "T" else result
+
+    def visit_Literal(self, node):
+        return self.literal_type(node.value)
+
+    def literal_type(self, value):
+        """Return the Zara type of a literal value."""
+        if isinstance(value, str):
+            return "string"
+        elif isinstance(value, float):
+            return "float"
+        return "int"
+
+# Test
+
+if __name__ == "__main__":
+    from zara.symbol_table import SymbolTable
+    from zara.lexer import Token, TokenType
+    from zara.parser import Parser
+
+    # Sample Zara code tokens (after lexical analysis)
+    tokens = [
+        Token(TokenType.DATA_TYPE, "int"),
+        Token(TokenType.IDENTIFIER, "x"),
+        Token(TokenType.OPERATOR, "="),
+        Token(TokenType.LITERAL, 5),
+        Token(TokenType.DELIMITER, ";"),
+        Token(TokenType.DATA_TYPE, "float"),
+        Token(TokenType.IDENTIFIER, "y"),
+        Token(TokenType.OPERATOR, "="),
+        Token(TokenType.LITERAL, 3.14),
+        Token(TokenType.DELIMITER, ";"),
+        Token(TokenType.DATA_TYPE, "string"),
+        Token(TokenType.IDENTIFIER, "greeting"),
+        Token(TokenType.OPERATOR, "="),
+        Token(TokenType.LITERAL, "Hello, Zara!"),
+        Token(TokenType.DELIMITER, ";"),
+        Token(TokenType.KEYWORD, "if"),
+        Token(TokenType.DELIMITER, "("),
+        Token(TokenType.IDENTIFIER, "x"),
+        Token(TokenType.OPERATOR, ">"),
+        Token(TokenType.LITERAL, 0),
+        Token(TokenType.DELIMITER, ")"),
+        Token(TokenType.DELIMITER, "{"),
+        Token(TokenType.IDENTIFIER, "greeting"),
+        Token(TokenType.OPERATOR, "="),
+        Token(TokenType.LITERAL, "Positive"),
+        Token(TokenType.DELIMITER, ";"),
+        Token(TokenType.DELIMITER, "}"),
+    ]
+
+    # Assume we have a symbol table already created
+    symbol_table = SymbolTable()
+    # You would populate the symbol table here as necessary
+
+    # Parse the tokens and analyze the tree
+    analyzer = SemanticAnalyzer(symbol_table)
+    analyzer.analyze(Parser(tokens).parse())
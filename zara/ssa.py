@@ -0,0 +1,206 @@
+"""Static single assignment form of three-address code.
+
+In SSA form every assignment makes a new value, a numbered version of the
+variable it assigns, and every read names the one value that reaches it.
+Where control flow joins and different versions of a variable arrive, a phi
+at the start of the block picks one according to the edge taken:
+
+    x = 1                   x.1 = 1
+    if c goto L1            if c.0 goto L1
+    x = 2                   x.2 = 2
+    L1:                     L1:
+                            x.3 = phi(x.2, x.1)
+    y = x + 1               y.1 = x.3 + 1
+
+SSA builds this in the usual steps: the dominator tree (immediate_dominators()
+in cfg), dominance frontiers, phis at the iterated dominance frontiers of the
+blocks assigning a variable, and a walk down the dominator tree that renames
+every read to the value on top of the variable's stack. Phis are semi-pruned:
+only variables some block reads before writing them get any, which leaves out
+almost every temp. The walk keeps its own stack instead of recursing, since the
+dominator tree of straight-line code is as deep as the code is long.
+
+Each step is linear or close to it in the size of the code, apart from the
+phis themselves, which grow with the assignments inside branches and loops.
+
+Values are operands of their own kind, VALUE, in rows shaped like the rows of
+Quads, so passes over SSA read them as they read TAC. destruct() turns SSA back
+into plain rows by renaming each value back to its variable and dropping the
+phis. That is only right while no two versions of a variable are live at once,
+which holds for SSA as built here and after any pass that only replaces reads
+by constants and removes code, as constant propagation does; a pass that moves
+or copies values would need copies on the edges instead.
+"""
+from zara.cfg import CFG, ASSIGNING, READ_POSITIONS, immediate_dominators
+from zara.dataflow import block_summaries, nonlocal_variables
+from zara.tac_ir import KIND_MASK, KIND_BITS, LABEL, NAME, TEMP
+
+VALUE = LABEL + 1  # Kind of the operands that stand for SSA values; they never leave an SSA form
+# A node before the first block and the blocks jumps from outside the rows may enter (CFG.entries), in which
+# every variable holds the value it had on entry
+START = -1
+
+
+def dominance_frontiers(idom, order, predecessors):
+    """Return, for each node, the set of nodes where its dominance ends: the frontier of Cooper, Harvey and Kennedy."""
+    frontiers = {node: set() for node in order}
+    for node in order:
+        incoming = [predecessor for predecessor in predecessors(node) if predecessor in idom]
+        if len(incoming) < 2:
+            continue
+        for predecessor in incoming:
+            runner = predecessor
+            while runner != idom[node]:
+                frontiers[runner].add(node)
+                runner = idom[runner]
+    return frontiers
+
+
+class Phi:
+    __slots__ = ("block", "variable", "target", "arguments")
+
+    def __init__(self, block, variable, count):
+        self.block = block
+        self.variable = variable  # Packed operand of the variable it merges
+        self.target = None  # Value it defines
+        self.arguments = [None] * count  # Value arriving over each edge of SSA.predecessors[block]; None if none does
+
+    def __repr__(self):
+        return f"Phi(block={self.block}, target={self.target}, arguments={self.arguments})"
+
+
+class SSA:
+    """The SSA form of a list of TAC rows; the rows passed in are not changed.
+
+    rows holds a copy of every instruction with its variables replaced by
+    VALUE operands, except in blocks no path from START reaches, which are
+    left as they are. phis holds the phis at the start of each
+    block. For each value, variables holds the variable it is a version of,
+    definitions the index of the row assigning it, its Phi, or None for the
+    value a variable has on entry, and uses the row indices and Phis reading it.
+    """
+
+    def __init__(self, rows):
+        self.cfg = cfg = CFG(rows)
+        blocks = cfg.blocks
+        self.rows = [list(row) for row in rows]
+        # Edges into each block, in the order of phi arguments; the entries are also entered from START
+        self.predecessors = [list(block.predecessors) for block in blocks]
+        self.starts = [0] + cfg.entries
+        for index in self.starts:
+            self.predecessors[index].append(START)
+        self.idom, self.order = immediate_dominators(START, self.successors, self.predecessors_of)
+        self.phis = [[] for _ in blocks]
+        self.variables = []
+        self.definitions = []
+        self.uses = []
+        self.insert_phis()
+        self.rename()
+
+    def successors(self, node):
+        return self.starts if node == START else self.cfg.blocks[node].successors
+
+    def predecessors_of(self, node):
+        return () if node == START else self.predecessors[node]
+
+    def new_value(self, variable, definition):
+        self.variables.append(variable)
+        self.definitions.append(definition)
+        self.uses.append([])
+        return len(self.variables) - 1
+
+    def insert_phis(self):
+        """Place a phi for each variable read across blocks at the iterated dominance frontier of its assignments."""
+        frontiers = dominance_frontiers(self.idom, self.order, self.predecessors_of)
+        exposed, written = block_summaries(self.cfg)
+        assigned_in = {variable: [] for variable in nonlocal_variables(exposed)}
+        for index, writes_here in enumerate(written):
+            for variable in writes_here:
+                if variable in assigned_in:
+                    assigned_in[variable].append(index)
+        phis, predecessors = self.phis, self.predecessors
+        for variable, sites in assigned_in.items():
+            placed = set()
+            queued = set(sites)
+            work = list(sites)
+            while work:
+                for node in frontiers.get(work.pop(), ()):
+                    if node not in placed:
+                        placed.add(node)
+                        phis[node].append(Phi(node, variable, len(predecessors[node])))
+                        if node not in queued:
+                            queued.add(node)
+                            work.append(node)
+
+    def rename(self):
+        """Give every assignment a new value and every read the value that reaches it, walking the dominator tree."""
+        rows, blocks, phis = self.rows, self.cfg.blocks, self.phis
+        variables, definitions, uses = self.variables, self.definitions, self.uses
+        children = {}
+        for node in self.order[1:]:
+            children.setdefault(self.idom[node], []).append(node)
+        stacks = {}  # Variable to its values, the one that reaches the current point last
+
+        def current(variable):
+            stack = stacks.get(variable)
+            if not stack:
+                # Nothing assigns it on the way here, so it still holds its value on entry
+                stack = stacks[variable] = [self.new_value(variable, None)]
+            return stack[-1]
+
+        work = [(START, None)]
+        while work:
+            node, pushed = work.pop()
+            if pushed is not None:
+                for variable in pushed:
+                    stacks[variable].pop()
+                continue
+            pushed = []
+            if node != START:
+                for phi in phis[node]:
+                    phi.target = self.new_value(phi.variable, phi)
+                    stacks.setdefault(phi.variable, []).append(phi.target)
+                    pushed.append(phi.variable)
+                block = blocks[node]
+                for index in range(block.start, block.end):
+                    row = rows[index]
+                    op = row[0]
+                    for position in READ_POSITIONS[op]:
+                        operand = row[position]
+                        kind = operand & KIND_MASK
+                        if kind == NAME or kind == TEMP:
+                            stack = stacks.get(operand)
+                            value = stack[-1] if stack else current(operand)
+                            uses[value].append(index)
+                            row[position] = value << KIND_BITS | VALUE
+                    if op in ASSIGNING:
+                        # A new value, as new_value() makes, without the call
+                        variable = row[3]
+                        value = len(variables)
+                        variables.append(variable)
+                        definitions.append(index)
+                        uses.append([])
+                        stack = stacks.get(variable)
+                        if stack is None:
+                            stacks[variable] = [value]
+                        else:
+                            stack.append(value)
+                        pushed.append(variable)
+                        row[3] = value << KIND_BITS | VALUE
+            for successor in self.successors(node):
+                edge = self.predecessors[successor].index(node)
+                for phi in phis[successor]:
+                    value = current(phi.variable)
+                    phi.arguments[edge] = value
+                    uses[value].append(phi)
+            work.append((node, pushed))
+            work.extend((child, None) for child in reversed(children.get(node, ())))
+
+    def destruct(self, rows=None):
+        """Return plain TAC rows for rows in this SSA form (by default its own): values renamed back, phis dropped."""
+        variables = self.variables
+        out = []
+        for row in self.rows if rows is None else rows:
+            out.append([row[0]] + [variables[operand >> KIND_BITS] if operand & KIND_MASK == VALUE else operand
+                                   for operand in row[1:]])
+        return out
@@ -0,0 +1,134 @@
+from zara.lexer import Interner
+
+
+class Symbol:
+    # depth is the nesting level of the declaring scope (0 is global); slot is the
+    # variable's storage slot, reused by later scopes once its own scope has closed
+    __slots__ = ("name", "type", "depth", "slot", "value")
+
+    def __init__(self, name, symbol_type, depth, slot, value=None):
+        self.name = name
+        self.type = symbol_type
+        self.depth = depth
+        self.slot = slot
+        self.value = value
+
+    def __repr__(self):
+        return f"Symbol({self.name!r}, {self.type!r}, depth={self.depth}, slot={self.slot})"
+
+
+class SymbolTable:
+    """Nested scopes over identifiers interned to integer ids.
+
+    bindings[id] is the symbol a name currently refers to, so a lookup is one list
+    index however deeply scopes are nested. Declaring in a scope records the
+    binding it replaces in an undo log, and leaving the scope replays the log back
+    to where the scope started, so pushing and popping cost nothing beyond the
+    scope's own declarations.
+    """
+
+    def __init__(self, names=None):
+        self.names = names if names is not None else Interner()  # Usually the lexer's, which already holds every name
+        self.bindings = []
+        self.undo = []  # (name id, binding it replaced) for each declaration in an open scope
+        self.marks = []  # (undo log length, next slot) where each open scope started
+        self.depth = 0
+        self.next_slot = 0
+        self.max_slots = 0  # Slots needed to hold every variable live at once
+        self.declared = 0  # Declarations made over the table's lifetime
+
+    def push_scope(self):
+        """Open a nested scope."""
+        self.marks.append((len(self.undo), self.next_slot))
+        self.depth += 1
+
+    def pop_scope(self):
+        """Close the innermost scope, making its declarations invisible again."""
+        mark, self.next_slot = self.marks.pop()
+        undo, bindings = self.undo, self.bindings
+        while len(undo) > mark:
+            index, previous = undo.pop()
+            bindings[index] = previous
+        self.depth -= 1
+
+    def declare(self, name, symbol_type, value=None):
+        """Declare a name in the innermost scope and return its Symbol.
+
+        A name cannot be declared again while an earlier declaration of it is
+        visible, even from an enclosing scope; separate blocks may reuse a name.
+        """
+        index = self.names.intern(name)
+        bindings = self.bindings
+        if index >= len(bindings):
+            bindings.extend([None] * (index + 1 - len(bindings)))
+        previous = bindings[index]
+        if previous is not None:
+            where = "this scope" if previous.depth == self.depth else "an enclosing scope"
+            raise ValueError(f"Symbol '{name}' already exists in {where}.")
+        symbol = Symbol(name, symbol_type, self.depth, self.next_slot, value)
+        self.next_slot += 1
+        self.declared += 1
+        if self.next_slot > self.max_slots:
+            self.max_slots = self.next_slot
+        self.undo.append((index, previous))
+        bindings[index] = symbol
+        return symbol
+
+    def lookup(self, name):
+        """Return the Symbol a name refers to in the current scope, or None if it is not declared."""
+        index = self.names.ids.get(name)
+        if index is None or index >= len(self.bindings):
+            return None
+        return self.bindings[index]
+
+    def add_symbol(self, name, symbol_type, value=None):
+        """Adds a new symbol to the current scope if it doesn't already exist."""
+        return self.declare(name, symbol_type, value)
+
+    def update_symbol(self, name, value):
+        """Updates the value of an existing symbol."""
+        self.get_symbol(name).value = value
+
+    def get_symbol(self, name):
+        """Retrieves a symbol's information."""
+        symbol = self.lookup(name)
+        if symbol is None:
+            raise ValueError(f"Symbol '{name}' not found.")
+        return symbol
+
+    def __repr__(self):
+        """String representation for debugging."""
+        return str([symbol for symbol in self.bindings if symbol is not None])
+
+# Tests
+
+if __name__ == "__main__":
+    from zara.runtime import new_container
+
+    # Initialize the symbol table
+    symbol_table = SymbolTable()
+
+    # Add different types of symbols
+    symbol_table.add_symbol("x", "int", 5)
+    symbol_table.add_symbol("pi", "float", 3.14)
+    symbol_table.add_symbol("greeting", "string", "Hello, Zara!")
+    symbol_table.add_symbol("numbers", "array<int>", new_container("array<int>", [1, 2, 3, 4]))
+    symbol_table.add_symbol("decimals", "stack<float>", new_container("stack<float>"))
+
+    # Update a symbol's value
+    symbol_table.update_symbol("x", 10)
+
+    # Declarations in a nested scope disappear when it is closed
+    symbol_table.push_scope()
+    symbol_table.add_symbol("inner", "int", 1)
+    print("Inside the block:", symbol_table.get_symbol("inner"), symbol_table.get_symbol("x"))
+    symbol_table.pop_scope()
+    print("After the block, 'inner' is", symbol_table.lookup("inner"))
+
+    # Retrieve and print symbol information to verify accuracy
+    print("Symbol Table Entries:")
+    print(symbol_table)
+
+    # Output specific symbol details
+    print("\nDetails for 'x':", symbol_table.get_symbol("x"))
+    print("Details for 'greeting':", symbol_table.get_symbol("greeting"))
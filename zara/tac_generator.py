@@ -0,0 +1,333 @@
+from zara.ast_nodes import NodeVisitor, Name, Index, Member, BinOp, UnsupportedError
+from zara.container_types import container_type
+from zara.parser import Parser
+from zara.tac_ir import Quads, VALUE_METHODS, VOID_METHODS, temp_operand, label_operand
+
+
+# Instructions a streaming generator with an optimizer collects before optimizing and writing them
+OPTIMIZE_BATCH = 4096
+
+
+def format_instruction(inst):
+    """Render one quadruple [op, arg1, arg2, result] as a line of TAC.
+
+    String constants arrive in double quotes (see Quads.operand), so that "x"
+    cannot be read as the variable x. Jumps and labels get lines of their own,
+    `if t1 goto L1`, `goto L2` and `L1:`, where the first display_instructions
+    printed every quadruple as an assignment (`L1 = t1 if None`, `None = L1`).
+    """
+    op, arg1, arg2, result = inst
+    if op == 'label':
+        return f"{arg1}:"
+    if op == 'goto':
+        return f"goto {result}"
+    if op == 'if':
+        return f"if {arg1} goto {result}"
+    if op == '[]':
+        return f"{result} = {arg1}[{arg2}]"
+    if op == '[]=':
+        return f"{result}[{arg2}] = {arg1}"
+    if op == 'new':
+        return f"{result} = new {arg1[1:-1]}({'' if arg2 is None else arg2})"  # The type, without its quotes
+    if op in VALUE_METHODS:
+        return f"{result} = {arg1}.{op}()"
+    if op in VOID_METHODS:
+        return f"{arg1}.{op}({arg2})"
+    if op == 'vector':
+        return f"{result} = vector {arg1}"
+    return f"{result} = {arg1} {op} {arg2}" if arg2 is not None else f"{result} = {arg1}"
+
+
+class TACGenerator(NodeVisitor):
+    """Translates a syntax tree into three-address code quadruples.
+
+    Instructions are kept in a columnar Quads store. Visiting an expression
+    returns its packed operand (see tac_ir), which is what emit() takes.
+    """
+
+    def __init__(self, symbol_table=None, sink=None, names=None, optimizer=None, allocator=None):
+        self.instructions = Quads(names)
+        self.temp_counter = 0
+        self.label_counter = 0
+        self.symbol_table = symbol_table  # Declarations are recorded here when given
+        self.sink = sink  # Anything with a write() method; see flush()
+        self.optimizer = optimizer  # An optimizer.PassManager run before instructions are handed out
+        self.allocator = allocator  # A temp_allocator.TempAllocator run after the optimizer
+        self.written = 0  # Instructions flush() has written to the sink
+
+    def new_temp(self):
+        self.temp_counter += 1
+        return temp_operand(self.temp_counter)
+
+    def new_label(self):
+        self.label_counter += 1
+        return label_operand(self.label_counter)
+
+    def variable(self, name):
+        return self.instructions.name(name)
+
+    def emit(self, op, arg1=None, arg2=None, result=None):
+        self.instructions.append(op, arg1, arg2, result)
+
+    def flush(self, final=False):
+        """Write the pending instructions to the sink and drop them, so they do not pile up.
+
+        With an optimizer, instructions are held back until there are OPTIMIZE_BATCH
+        of them or final is true, so that the passes see more than one statement at a time.
+        """
+        if self.sink is None:
+            return
+        if self.optimizer is not None:
+            if not final and len(self.instructions) < OPTIMIZE_BATCH:
+                return
+            self.optimizer.run(self.instructions)
+        if self.allocator is not None:
+            self.allocator.run(self.instructions)
+        write = self.sink.write
+        for inst in self.instructions:
+            write(format_instruction(inst) + "\n")
+        self.written += len(self.instructions)
+        self.instructions.clear()
+        # Every operand has been written out as text, so the literals of this batch need not stay in memory
+        self.instructions.clear_constants()
+
+    def display_instructions(self):
+        for inst in self.instructions:
+            print(format_instruction(inst))
+
+    def generate(self, tree):
+        """Translate a Program tree, or a single statement, and return the instructions."""
+        self.visit(tree)
+        self.finish()
+        return self.instructions
+
+    def finish(self):
+        """Optimize, recycle temps in, and write out to the sink, whatever instructions are still pending."""
+        if self.sink is not None:
+            self.flush(final=True)
+            return
+        if self.optimizer is not None:
+            self.optimizer.run(self.instructions)
+        if self.allocator is not None:
+            self.allocator.run(self.instructions)
+
+    def statements(self, body):
+        for statement in body:
+            self.visit(statement)
+            # Everything emitted so far is final, so streaming output can go out now
+            self.flush()
+
+    def block(self, body):
+        """Translate the statements of a block, in a scope of their own when declarations are recorded."""
+        if self.symbol_table is None:
+            self.statements(body)
+            return
+        self.symbol_table.push_scope()
+        try:
+            self.statements(body)
+        finally:
+            self.symbol_table.pop_scope()
+
+    def generic_visit(self, node):
+        # Only reached by what SemanticAnalyzer rejects (methods, classes, fields), on a tree it has not checked
+        raise UnsupportedError(f"{type(node).__name__} cannot be translated to TAC.")
+
+    def visit_Program(self, node):
+        self.statements(node.body)
+
+    def visit_VarDecl(self, node):
+        if self.symbol_table is not None:
+            self.symbol_table.add_symbol(node.name, node.data_type)
+        if node.value is not None:
+            value = self.visit(node.value)
+            self.emit('=', value, None, self.variable(node.name))
+        elif container_type(node.data_type) is not None:
+            # A container variable starts out holding an empty container
+            self.emit('new', self.instructions.const(node.data_type), None, self.variable(node.name))
+
+    def visit_Assign(self, node):
+        if isinstance(node.target, Index):
+            array = self.visit(node.target.target)
+            index = self.visit(node.target.index)
+            value = self.visit(node.value)
+            self.emit('[]=', value, index, array)
+            return value
+        if not isinstance(node.target, Name):
+            return self.generic_visit(node.target)
+        expr_value = self.visit(node.value)
+        target = self.variable(node.target.id)
+        self.emit('=', expr_value, None, target)
+        return target
+
+    def visit_ExprStatement(self, node):
+        self.visit(node.expr)
+
+    def visit_BinOp(self, node):
+        # Postorder with an explicit stack, so long chains and deep nesting do not recurse
+        operands = []
+        pending = [(node, False)]
+        while pending:
+            current, operands_done = pending.pop()
+            if operands_done:
+                right = operands.pop()
+                temp = self.new_temp()
+                self.emit(current.op, operands.pop(), right, temp)
+                operands.append(temp)
+            elif type(current) is BinOp:
+                pending += ((current, True), (current.right, False), (current.left, False))
+            else:
+                operands.append(self.visit(current))
+        return operands[0]
+
+    def visit_Literal(self, node):
+        return self.instructions.const(node.value)
+
+    def visit_ArrayLiteral(self, node):
+        const = self.instructions.const
+        array = self.new_temp()
+        length = const(len(node.elements)) if node.elements else None
+        self.emit('new', const(node.data_type), length, array)
+        for index, element in enumerate(node.elements):
+            self.emit('[]=', self.visit(element), const(index), array)
+        return array
+
+    def visit_Index(self, node):
+        array = self.visit(node.target)
+        index = self.visit(node.index)
+        temp = self.new_temp()
+        self.emit('[]', array, index, temp)
+        return temp
+
+    def visit_Call(self, node):
+        """Translate a container method call; the analyzer lets no other call through."""
+        if not isinstance(node.func, Member):
+            return self.generic_visit(node)
+        method = node.func.name
+        receiver = self.visit(node.func.obj)
+        if method in VOID_METHODS:
+            self.emit(method, receiver, self.visit(node.args[0]), None)
+            return None
+        temp = self.new_temp()
+        self.emit(method, receiver, None, temp)
+        return temp
+
+    def visit_Name(self, node):
+        return self.variable(node.id)
+
+    def visit_If(self, node):
+        condition = self.visit(node.condition)
+
+        # Labels for the if-true block and for the code after it (the else block, if any)
+        true_label = self.new_label()
+        else_label = self.new_label()
+
+        # Emit TAC for condition check and jump to true_label if true
+        self.emit('if', condition, None, true_label)
+        self.emit('goto', None, None, else_label)  # Skip true block if false
+        self.emit('label', true_label, None, None)
+
+        # Process if-true block
+        self.block(node.body)
+
+        # Optional else
+        if node.orelse is not None:
+            end_label = self.new_label()
+            self.emit('goto', None, None, end_label)  # True block skips the else block
+            self.emit('label', else_label, None, None)
+            self.block(node.orelse)
+            self.emit('label', end_label, None, None)
+        else:
+            self.emit('label', else_label, None, None)
+
+    def visit_DoWhile(self, node):
+        # Label for the beginning of the loop
+        loop_start = self.new_label()
+        self.emit('label', loop_start, None, None)
+
+        # Process loop body
+        self.block(node.body)
+
+        # Emit TAC for condition and jump back to loop_start if true
+        condition = self.visit(node.condition)
+        self.emit('if', condition, None, loop_start)
+
+
+    def visit_VectorLoop(self, node):
+        """Translate a loop the vectorizer rewrote into one vector instruction holding its source."""
+        from zara.vectorizer import loop_source
+        if self.symbol_table is not None and node.declared:
+            self.symbol_table.push_scope()
+            self.symbol_table.add_symbol(node.index, "int")
+            self.symbol_table.pop_scope()
+        self.emit('vector', self.instructions.const(loop_source(node)), None, self.variable(node.index))
+
+    def visit_For(self, node):
+        if self.symbol_table is not None:
+            self.symbol_table.push_scope()  # For the variable the header may declare
+        try:
+            self.for_loop(node)
+        finally:
+            if self.symbol_table is not None:
+                self.symbol_table.pop_scope()
+
+    def for_loop(self, node):
+        if node.init is not None:
+            self.visit(node.init)
+
+        # The condition is tested at the bottom, so every iteration ends with one back edge
+        body_label = self.new_label()
+        condition_label = self.new_label()
+        if node.condition is not None:
+            self.emit('goto', None, None, condition_label)
+        self.emit('label', body_label, None, None)
+        self.block(node.body)
+        if node.update is not None:
+            self.visit(node.update)
+        self.emit('label', condition_label, None, None)
+        if node.condition is not None:
+            condition = self.visit(node.condition)
+            self.emit('if', condition, None, body_label)
+        else:
+            self.emit('goto', None, None, body_label)
+
+
+class ParserWithTranslation:
+    """Parses tokens and translates each statement to TAC as soon as it is parsed."""
+
+    def __init__(self, tokens, symbol_table, sink=None, optimizer=None):
+        self.parser = Parser(tokens)
+        self.symbol_table = symbol_table
+        self.tac = TACGenerator(symbol_table, sink, optimizer=optimizer)
+
+    def parse(self):
+        for statement in self.parser.iter_statements():
+            self.tac.visit(statement)
+            self.tac.flush()
+        self.tac.finish()
+
+    def display_tac(self):
+        print("Three-Address Code (TAC):")
+        self.tac.display_instructions()
+
+if __name__ == "__main__":
+    from zara.symbol_table import SymbolTable
+    from zara.lexer import Token, TokenType
+
+    tokens = [
+        # Variable declarations
+        Token(TokenType.DATA_TYPE, "int"), Token(TokenType.IDENTIFIER, "x"), Token(TokenType.OPERATOR, "="), Token(TokenType.LITERAL, 5), Token(TokenType.DELIMITER, ";"),
+
+        # If statement
+        Token(TokenType.KEYWORD, "if"), Token(TokenType.DELIMITER, "("), Token(TokenType.IDENTIFIER, "x"), Token(TokenType.OPERATOR, ">"), Token(TokenType.LITERAL, 0), Token(TokenType.DELIMITER, ")"),
+        Token(TokenType.DELIMITER, "{"), Token(TokenType.IDENTIFIER, "x"), Token(TokenType.OPERATOR, "="), Token(TokenType.LITERAL, 10), Token(TokenType.DELIMITER, ";"), Token(TokenType.DELIMITER, "}"),
+
+        # Do-while loop
+        Token(TokenType.KEYWORD, "do"), Token(TokenType.DELIMITER, "{"),
+        Token(TokenType.IDENTIFIER, "x"), Token(TokenType.OPERATOR, "="), Token(TokenType.IDENTIFIER, "x"), Token(TokenType.OPERATOR, "+"), Token(TokenType.LITERAL, 1), Token(TokenType.DELIMITER, ";"),
+        Token(TokenType.DELIMITER, "}"), Token(TokenType.KEYWORD, "while"), Token(TokenType.DELIMITER, "("), Token(TokenType.IDENTIFIER, "x"), Token(TokenType.OPERATOR, "<"), Token(TokenType.LITERAL, 20), Token(TokenType.DELIMITER, ")"), Token(TokenType.DELIMITER, ";"),
+    ]
+
+    symbol_table = SymbolTable()
+    parser = ParserWithTranslation(tokens, symbol_table)
+    parser.parse()
+    parser.display_tac()
@@ -0,0 +1,160 @@
+"""Columnar storage for three-address code.
+
+Quads keeps each instruction as one opcode byte plus, for each of its three
+operands (arg1, arg2, result), a kind tag byte and an unsigned index. What an
+index means depends on the kind: a name in an Interner, a constant in the
+constants table, or the number of a temp or label. Temps and labels are plain
+integers, so no t{n} or L{n} strings are built until an instruction is shown.
+
+TACGenerator works with packed operands, single ints holding the index above
+the kind (index << KIND_BITS | kind), which are never 0 except for NO_OPERAND.
+Reading a Quads, by index or by iterating, decodes instructions back into
+[op, arg1, arg2, result] lists in the same form TAC has always been shown in.
+"""
+import struct
+from array import array
+
+from zara.lexer import Interner
+
+# After the arithmetic and jumps come the container instructions: t = a[i], a[i] = v (arg1 v, arg2 i, result a),
+# t = new <type>(n) (arg1 the type as a string constant), the methods returning a value (t = a.sum(), arg1 a)
+# and those returning none (a.fill(v), arg1 a, arg2 v). Last, i = vector "<loop>" runs a loop the vectorizer
+# rewrote (its source is arg1) and assigns the loop's index its final value
+OPCODES = ('=', '+', '-', '*', '/', '>', '<', '==', 'if', 'goto', 'label',
+           '[]', '[]=', 'new', 'length', 'sum', 'pop', 'peek', 'size', 'fill', 'push', 'vector')
+VALUE_METHODS = ('length', 'sum', 'pop', 'peek', 'size')
+VOID_METHODS = ('fill', 'push')
+OPCODE_OF = {op: code for code, op in enumerate(OPCODES)}
+
+# Operand kinds
+NONE, NAME, CONST, TEMP, LABEL = range(5)
+KIND_BITS = 3
+KIND_MASK = (1 << KIND_BITS) - 1
+
+NO_OPERAND = 0
+
+FLOAT_BITS = struct.Struct("<d")
+
+
+def constant_key(value):
+    """Return the key of a constant in a constant table, which tells apart values that compare equal.
+
+    1 and 1.0 differ by type; floats are keyed by their bits, since 0.0 == -0.0 and a NaN equals nothing.
+    """
+    if type(value) is float:
+        return float, FLOAT_BITS.pack(value)
+    return type(value), value
+
+
+def temp_operand(number):
+    return number << KIND_BITS | TEMP
+
+
+def label_operand(number):
+    return number << KIND_BITS | LABEL
+
+
+class Quads:
+    """Three-address instructions stored in parallel typed arrays."""
+
+    def __init__(self, names=None):
+        self.ops = array('B')
+        self.kinds = array('B')  # Three per instruction: arg1, arg2, result
+        self.args = array('I')  # Three per instruction, indexed like kinds
+        self.names = names if names is not None else Interner()
+        self.constants = []
+        self.constant_ids = {}  # constant_key(value) to index
+
+    def name(self, name):
+        """Return the packed operand for a variable."""
+        return self.names.intern(name) << KIND_BITS | NAME
+
+    def const(self, value):
+        """Return the packed operand for a literal value."""
+        key = constant_key(value)
+        index = self.constant_ids.get(key)
+        if index is None:
+            index = self.constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return index << KIND_BITS | CONST
+
+    def append(self, op, arg1=None, arg2=None, result=None):
+        """Add an instruction; the operands are packed operands or None."""
+        self.ops.append(OPCODE_OF[op])
+        for operand in (arg1, arg2, result):
+            operand = operand or NO_OPERAND
+            self.kinds.append(operand & KIND_MASK)
+            self.args.append(operand >> KIND_BITS)
+
+    def operand(self, kind, index):
+        """Decode an operand into the value it is shown as: a name, a number, a quoted string, tN or LN."""
+        if kind == NAME:
+            return self.names.names[index]
+        if kind == TEMP:
+            return f"t{index}"
+        if kind == CONST:
+            value = self.constants[index]
+            # Quote string literals so they cannot be confused with variable names
+            return f'"{value}"' if isinstance(value, str) else value
+        if kind == LABEL:
+            return f"L{index}"
+        return None
+
+    def rows(self):
+        """Return the instructions as [opcode id, arg1, arg2, result] lists of packed operands, for rewriting."""
+        ops, kinds, args = self.ops, self.kinds, self.args
+        rows = []
+        for index in range(len(ops)):
+            base = index * 3
+            rows.append([ops[index],
+                         args[base] << KIND_BITS | kinds[base],
+                         args[base + 1] << KIND_BITS | kinds[base + 1],
+                         args[base + 2] << KIND_BITS | kinds[base + 2]])
+        return rows
+
+    def load_rows(self, rows):
+        """Replace the instructions with rows in the form rows() returns."""
+        self.clear()
+        add_op, add_kind, add_arg = self.ops.append, self.kinds.append, self.args.append
+        for op, arg1, arg2, result in rows:
+            add_op(op)
+            for operand in (arg1, arg2, result):
+                add_kind(operand & KIND_MASK)
+                add_arg(operand >> KIND_BITS)
+
+    def value(self, operand):
+        """Return the value of a packed constant operand."""
+        return self.constants[operand >> KIND_BITS]
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __getitem__(self, index):
+        """Decode instruction index into an [op, arg1, arg2, result] list; changing the list does not change the store."""
+        if index < 0:
+            index += len(self.ops)
+        op = OPCODES[self.ops[index]]
+        kinds, args, operand = self.kinds, self.args, self.operand
+        base = index * 3
+        return [op, operand(kinds[base], args[base]), operand(kinds[base + 1], args[base + 1]),
+                operand(kinds[base + 2], args[base + 2])]
+
+    def __iter__(self):
+        for index in range(len(self.ops)):
+            yield self[index]
+
+    def clear(self):
+        """Drop the instructions, keeping the name and constant tables that packed operands refer to."""
+        del self.ops[:]
+        del self.kinds[:]
+        del self.args[:]
+
+    def clear_constants(self):
+        """Drop the constant table, once no instruction or operand still to be read refers to it."""
+        self.constants.clear()
+        self.constant_ids.clear()
+
+    @property
+    def nbytes(self):
+        """Bytes used by the instruction arrays, not counting the name and constant tables."""
+        return sum(len(column) * column.itemsize for column in (self.ops, self.kinds, self.args))
@@ -0,0 +1,118 @@
+"""Recycling of temps by linear-scan allocation over their live ranges.
+
+TACGenerator.new_temp hands out a fresh temp for every intermediate value, so
+long programs end up with as many temps as they have expressions, and anything
+running the code needs a slot for each. TempAllocator renames them onto as few
+temps as possible: a temp is reused as soon as the value it holds is dead.
+
+Each temp gets a live range, the stretch of the instructions in program order
+from its first definition to the last point it is live. Inside a block that is
+its first write and last read. A temp that is live at a block boundary (which
+the dataflow Liveness finds) has its range stretched over that boundary. Ranges
+are then handed temps in order of their starts, in the manner of linear-scan
+register allocation. Since these ranges are intervals, that uses the fewest
+temps any renaming based on them can.
+
+An instruction reads its operands before it writes its result, so a temp read
+for the last time can be written by that same instruction.
+"""
+import heapq
+import time
+
+from zara.cfg import CFG, reads, writes
+from zara.dataflow import Liveness, bits_of
+from zara.tac_ir import KIND_MASK, TEMP, temp_operand
+
+
+def live_ranges(rows, cfg=None):
+    """Return each temp's live range as [start, end] positions.
+
+    Position 2i is where instruction i reads and 2i + 1 where it writes, so
+    ranges that only touch at an instruction do not overlap.
+    """
+    ranges = {}
+    for index, row in enumerate(rows):
+        for operand in reads(row):
+            if operand & KIND_MASK == TEMP:
+                extend(ranges, operand, 2 * index)
+        target = writes(row)
+        if target is not None and target & KIND_MASK == TEMP:
+            extend(ranges, target, 2 * index + 1)
+
+    cfg = cfg or CFG(rows)
+    liveness = Liveness(cfg, live_at_exit=())
+    variables = liveness.variables
+    for block in cfg.blocks:
+        for bit in bits_of(liveness.live_in[block.index]):
+            if variables[bit] & KIND_MASK == TEMP:
+                extend(ranges, variables[bit], 2 * block.start)
+        for bit in bits_of(liveness.live_out[block.index]):
+            if variables[bit] & KIND_MASK == TEMP:
+                extend(ranges, variables[bit], 2 * block.end)
+    return ranges
+
+
+def extend(ranges, operand, position):
+    span = ranges.get(operand)
+    if span is None:
+        ranges[operand] = [position, position]
+    elif position < span[0]:
+        span[0] = position
+    elif position > span[1]:
+        span[1] = position
+
+
+def allocate(ranges):
+    """Return a map from each temp to the temp number it is renamed to, and how many numbers it used."""
+    assigned = {}
+    active = []  # (end, number) of the ranges holding a number
+    free = []  # Numbers no range holds, lowest first
+    count = 0
+    for operand, (start, end) in sorted(ranges.items(), key=lambda item: item[1][0]):
+        while active and active[0][0] < start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            number = heapq.heappop(free)
+        else:
+            count += 1
+            number = count
+        assigned[operand] = number
+        heapq.heappush(active, (end, number))
+    return assigned, count
+
+
+class TempAllocator:
+    """Renames the temps of Quads onto as few temps as possible.
+
+    run() can be called once per batch of whole statements, as a streaming
+    compile does; the counts then add up over the batches.
+    """
+
+    def __init__(self):
+        self.temps_before = 0  # Distinct temps the code had
+        self.temps_after = 0  # Most temps any batch needed afterwards
+        self.seconds = 0.0
+
+    def run(self, quads):
+        """Rename the temps of quads in place and return them."""
+        if not len(quads):
+            return quads
+        start = time.perf_counter()
+        rows = quads.rows()
+        assigned, count = allocate(live_ranges(rows))
+        renamed = {operand: temp_operand(number) for operand, number in assigned.items()}
+        for row in rows:
+            for position in (1, 2, 3):
+                operand = row[position]
+                if operand & KIND_MASK == TEMP:
+                    row[position] = renamed[operand]
+        quads.load_rows(rows)
+        self.temps_before += len(assigned)
+        self.temps_after = max(self.temps_after, count)
+        self.seconds += time.perf_counter() - start
+        return quads
+
+    def report(self):
+        """Return the temp counts as lines of text."""
+        return [f"temps: {self.temps_before} before recycling, {self.temps_after} after "
+                f"({self.seconds * 1000:.2f} ms)"]
@@ -0,0 +1,405 @@
+"""Loop vectorization: elementwise array loops as whole-array operations.
+
+Vectorizer rewrites each counted loop of the form
+
+    for (int i = start; i < stop; i++) { c[i] = a[i] * b[i + 1] + k; ... }
+
+into a VectorLoop node, which runs every statement of the body once over the
+whole index range, as one batched operation on the buffers of runtime.ZaraArray
+(NumPy arrays when NumPy is installed). Any other loop is left as it is.
+
+A loop is only rewritten when no iteration depends on another. The body must
+be assignments to elements at [i] whose values read array elements at [i + k],
+loop-invariant scalars and literals, combined with + - * /. An array the loop
+writes may only be read at [i] itself: reading a[i - 1] while writing a[i]
+carries a value from one iteration to the next, as in a prefix sum, and such
+loops are rejected. The bound and scalars the body reads cannot change inside
+the loop, since the body only writes array elements.
+
+What the tree cannot show is checked by run() before anything is
+written: that the arrays hold numbers of matching types, that every index is
+in range, and that two names do not refer to one array in a way that would
+create a dependency. When a check fails, and when an operation raises (a
+division by zero, or an int that does not fit in 64 bits), the loop runs
+element by element instead, so its results and errors are those of the
+scalar loop.
+
+The pass works on checked syntax trees; compile_source runs it at -O3 (see
+VECTORIZE_LEVEL in the compiler) before TAC is generated. TACGenerator lowers
+a VectorLoop to one instruction, i = vector "<loop>", which holds the loop as
+Zara source (loop_source()) and assigns its index the value the loop leaves it
+with. The backends build the loop again from that source once, with
+loop_of(), and run it with run_loop() against a dict of variable values.
+"""
+from decimal import Decimal
+
+from zara.ast_nodes import Program, VarDecl, Assign, If, DoWhile, For, MethodDecl, BinOp, Literal, Name, Index, VectorLoop
+from zara.lexer import Lexer
+from zara.parser import Parser
+from zara.runtime import ZaraArray, NUMERIC, OPERATORS, filled, wrap
+
+ARITHMETIC = ("+", "-", "*", "/")
+# Operators whose operands can swap places, so that a scalar can go on the right
+SYMMETRIC = ("+", "*")
+
+
+def index_offset(expr, index):
+    """Return k when expr is index + k (or index - k, or index alone), and None otherwise."""
+    if isinstance(expr, Name):
+        return 0 if expr.id == index else None
+    if not isinstance(expr, BinOp) or expr.op not in ("+", "-"):
+        return None
+    left, right = expr.left, expr.right
+    if expr.op == "+" and isinstance(left, Literal):
+        left, right = right, left
+    if (isinstance(left, Name) and left.id == index and isinstance(right, Literal)
+            and type(right.value) is int):
+        return right.value if expr.op == "+" else -right.value
+    return None
+
+
+def is_counter(expr, index):
+    return isinstance(expr, Name) and expr.id == index
+
+
+def invariant(expr, index):
+    """Return whether expr is arithmetic on literals and scalar variables other than index."""
+    if isinstance(expr, Literal):
+        return type(expr.value) in (int, float)
+    if isinstance(expr, Name):
+        return expr.id != index
+    return isinstance(expr, BinOp) and expr.op in ARITHMETIC and invariant(expr.left, index) and invariant(
+        expr.right, index)
+
+
+def evaluate(expr, variables):
+    """Compute an expression of the vectorizable subset for the current values of variables."""
+    if isinstance(expr, Literal):
+        return expr.value
+    if isinstance(expr, Name):
+        return variables[expr.id]
+    if isinstance(expr, Index):
+        return variables[expr.target.id][evaluate(expr.index, variables)]
+    return OPERATORS[expr.op](evaluate(expr.left, variables), evaluate(expr.right, variables))
+
+
+def loop_shape(node):
+    """Return (index, declared, start, stop) for a loop counting up by one, or a reason it is not one."""
+    init = node.init
+    if isinstance(init, VarDecl) and init.data_type == "int" and init.value is not None:
+        index, declared, start = init.name, True, init.value
+    elif isinstance(init, Assign) and isinstance(init.target, Name):
+        index, declared, start = init.target.id, False, init.value
+    else:
+        return "no counter is initialized"
+    condition = node.condition
+    if isinstance(condition, BinOp) and condition.op == "<" and is_counter(condition.left, index):
+        stop = condition.right
+    elif isinstance(condition, BinOp) and condition.op == ">" and is_counter(condition.right, index):
+        stop = condition.left
+    else:
+        return f"the condition does not compare {index} with a bound"
+    update = node.update
+    if not (isinstance(update, Assign) and is_counter(update.target, index)
+            and isinstance(update.value, BinOp) and update.value.op == "+"
+            and index_offset(update.value, index) == 1):
+        return f"{index} is not incremented by one"
+    if not invariant(start, index) or not invariant(stop, index):
+        return "the bounds are not loop-invariant arithmetic"
+    return index, declared, start, stop
+
+
+def dependency(statements, index):
+    """Return a reason the statements cannot run as whole-array operations, or None if they can."""
+    written = set()
+    for statement in statements:
+        if not (isinstance(statement, Assign) and isinstance(statement.target, Index)):
+            return "the body does more than assign array elements"
+        target = statement.target
+        if not isinstance(target.target, Name) or index_offset(target.index, index) != 0:
+            return f"an element other than [{index}] is assigned"
+        written.add(target.target.id)
+    for statement in statements:
+        reason = value_dependency(statement.value, index, written)
+        if reason is not None:
+            return reason
+    return None
+
+
+def value_dependency(expr, index, written):
+    if isinstance(expr, Literal):
+        return None if type(expr.value) in (int, float) else "a value is not a number"
+    if isinstance(expr, Name):
+        if expr.id == index:
+            return f"{index} is used as a value"
+        if expr.id in written:
+            return f"{expr.id} is used whole"
+        return None
+    if isinstance(expr, Index):
+        if not isinstance(expr.target, Name):
+            return "an indexed value is not a variable"
+        offset = index_offset(expr.index, index)
+        if offset is None:
+            return f"an index is not {index} plus a constant"
+        if offset and expr.target.id in written:
+            return f"loop-carried dependency: {expr.target.id}[{index}{offset:+d}] is read while it is assigned"
+        return None
+    if isinstance(expr, BinOp):
+        if expr.op not in ARITHMETIC:
+            return f"'{expr.op}' has no elementwise form"
+        return value_dependency(expr.left, index, written) or value_dependency(expr.right, index, written)
+    return f"{type(expr).__name__} has no elementwise form"
+
+
+def vectorize_loop(node):
+    """Return a VectorLoop for a For node, or a string giving the reason it must stay a scalar loop."""
+    shape = loop_shape(node)
+    if isinstance(shape, str):
+        return shape
+    index, declared, start, stop = shape
+    if not node.body:
+        return "the body is empty"
+    reason = dependency(node.body, index)
+    if reason is not None:
+        return reason
+    return VectorLoop(node, index, declared, start, stop, node.body, start=node.start, end=node.end)
+
+
+def element_type(expr, variables):
+    """Return the element type an expression of the loop body has at run time, or None if it is unsuitable."""
+    if isinstance(expr, Literal):
+        return type(expr.value).__name__
+    if isinstance(expr, Name):
+        value = variables.get(expr.id)
+        return type(value).__name__ if type(value) in (int, float) else None
+    if isinstance(expr, Index):
+        array = variables.get(expr.target.id)
+        if not isinstance(array, ZaraArray) or array.element_type not in NUMERIC:
+            return None
+        return array.element_type
+    left, right = element_type(expr.left, variables), element_type(expr.right, variables)
+    return left if left == right else None
+
+
+def reads(expr, index):
+    """Yield (array name, offset) for each element expr reads."""
+    if isinstance(expr, Index):
+        yield expr.target.id, index_offset(expr.index, index)
+    elif isinstance(expr, BinOp):
+        yield from reads(expr.left, index)
+        yield from reads(expr.right, index)
+
+
+def prepare(loop, variables):
+    """Return the bounds of a VectorLoop if its values allow running it whole-array, or None."""
+    start, stop = evaluate(loop.lower, variables), evaluate(loop.upper, variables)
+    if type(start) is not int or type(stop) is not int:
+        return None
+    if stop <= start:
+        return start, start
+    if start < 0:
+        return None
+    written = set()
+    for statement in loop.statements:
+        array = variables.get(statement.target.target.id)
+        if not isinstance(array, ZaraArray) or stop > len(array):
+            return None
+        if element_type(statement.value, variables) != array.element_type:
+            return None
+        written.add(id(array))
+    for statement in loop.statements:
+        for name, offset in reads(statement.value, loop.index):
+            array = variables[name]
+            if start + offset < 0 or stop + offset > len(array):
+                return None
+            if offset and id(array) in written:
+                return None  # Another name for an array the loop assigns
+    return start, stop
+
+
+def elementwise(expr, variables, start, stop, index):
+    """Compute expr for every index from start to stop at once: a ZaraArray, or a scalar when expr is one."""
+    if isinstance(expr, Index):
+        array = variables[expr.target.id]
+        offset = index_offset(expr.index, index)
+        return wrap(array.element_type, array.data[start + offset:stop + offset])
+    if not isinstance(expr, BinOp):
+        return evaluate(expr, variables)
+    left = elementwise(expr.left, variables, start, stop, index)
+    right = elementwise(expr.right, variables, start, stop, index)
+    if not isinstance(left, ZaraArray):
+        if not isinstance(right, ZaraArray):
+            return OPERATORS[expr.op](left, right)
+        if expr.op in SYMMETRIC:
+            left, right = right, left
+        else:
+            left = ZaraArray.filled(right.element_type, left, len(right))
+    return left.elementwise(expr.op, right)
+
+
+def run_scalar(loop, variables):
+    """Run a VectorLoop element by element, as its original For loop would, and return the index's final value."""
+    index = loop.index
+    position = evaluate(loop.lower, variables)
+    variables[index] = position
+    while position < evaluate(loop.upper, variables):
+        for statement in loop.statements:
+            array = variables[statement.target.target.id]
+            array[position] = evaluate(statement.value, variables)
+        position += 1
+        variables[index] = position
+    if loop.declared:
+        del variables[index]
+    return position
+
+
+def run(loop, variables):
+    """Run a VectorLoop on a dict of variable values, and return whether it ran whole-array."""
+    stop = run_vector(loop, variables)
+    if stop is None:
+        run_scalar(loop, variables)
+        return False
+    if not loop.declared:
+        variables[loop.index] = stop
+    return True
+
+
+def run_vector(loop, variables):
+    """Run a VectorLoop whole-array if its values allow it and return the index's final value; else change nothing."""
+    bounds = prepare(loop, variables)
+    if bounds is None:
+        return None
+    start, stop = bounds
+    if stop > start:
+        # An operation only raises before its statement writes anything, so only earlier statements need undoing
+        saved = {}
+        if len(loop.statements) > 1:
+            for statement in loop.statements:
+                name = statement.target.target.id
+                saved.setdefault(name, variables[name].slice(start, stop))
+        try:
+            for statement in loop.statements:
+                array = variables[statement.target.target.id]
+                value = elementwise(statement.value, variables, start, stop, loop.index)
+                if isinstance(value, ZaraArray):
+                    array.data[start:stop] = value.data
+                else:
+                    array.data[start:stop] = filled(array.element_type, value, stop - start)
+        except (ZeroDivisionError, OverflowError):
+            # Put back what earlier statements wrote, and fail where the scalar loop fails
+            for name, part in saved.items():
+                variables[name].data[start:stop] = part.data
+            return None
+    return stop
+
+
+def source(expr):
+    """Return Zara source for an expression of the vectorizable subset."""
+    if isinstance(expr, Literal):
+        if type(expr.value) is float:
+            text = format(Decimal(repr(expr.value)), "f")  # Zara has no exponents; this is still the same float
+            return text if "." in text else text + ".0"
+        return str(expr.value)
+    if isinstance(expr, Name):
+        return expr.id
+    if isinstance(expr, Index):
+        return f"{expr.target.id}[{source(expr.index)}]"
+    return f"({source(expr.left)} {expr.op} {source(expr.right)})"
+
+
+def loop_source(loop):
+    """Return the source of a VectorLoop as a for loop, from which loop_of() makes the same VectorLoop."""
+    index = loop.index
+    start = f"{'int ' if loop.declared else ''}{index} = {source(loop.lower)}"
+    body = " ".join(f"{source(statement.target)} = {source(statement.value)};" for statement in loop.statements)
+    return f"for ({start}; {index} < {source(loop.upper)}; {index} = {index} + 1) {{ {body} }}"
+
+
+_loops = {}  # Source to VectorLoop, for loop_of()
+
+
+def loop_of(text):
+    """Return the VectorLoop of a loop's source, as a vector instruction holds it, parsing it only once."""
+    loop = _loops.get(text)
+    if loop is None:
+        loop = vectorize_loop(Parser(Lexer(text).tokenize()).parse().body[0])
+        if not isinstance(loop, VectorLoop):
+            raise ValueError(f"Not a vectorizable loop ({loop}): {text}")
+        _loops[text] = loop
+    return loop
+
+
+def variable_names(loop):
+    """Return the names of the variables a VectorLoop reads or writes, its index included."""
+    names = {loop.index}
+
+    def add(expr):
+        if isinstance(expr, Name):
+            names.add(expr.id)
+        elif isinstance(expr, Index):
+            names.add(expr.target.id)
+            add(expr.index)
+        elif isinstance(expr, BinOp):
+            add(expr.left)
+            add(expr.right)
+
+    add(loop.lower)
+    add(loop.upper)
+    for statement in loop.statements:
+        add(statement.target)
+        add(statement.value)
+    return sorted(names)
+
+
+def run_loop(text, variables):
+    """Run the loop of a vector instruction on a dict of variable values and return the index's final value."""
+    loop = loop_of(text)
+    stop = run_vector(loop, variables)
+    return stop if stop is not None else run_scalar(loop, variables)
+
+
+def run_registers(text, slots, registers):
+    """run_loop() on the registers of a VM, where slots maps names to registers; variables without one are None."""
+    variables = {name: registers[slots[name]] if name in slots else None for name in variable_names(loop_of(text))}
+    return run_loop(text, variables)
+
+
+class Vectorizer:
+    """Replaces the vectorizable For loops of a tree by VectorLoop nodes."""
+
+    def __init__(self):
+        self.vectorized = 0
+        self.rejected = {}  # Reason to the number of loops kept scalar for it
+
+    def rewrite(self, tree):
+        """Rewrite a Program, or a single statement, in place and return it."""
+        if isinstance(tree, Program):
+            tree.body = self.block(tree.body)
+            return tree
+        return self.statement(tree)
+
+    def block(self, body):
+        return [self.statement(statement) for statement in body]
+
+    def statement(self, node):
+        if isinstance(node, If):
+            node.body = self.block(node.body)
+            if node.orelse is not None:
+                node.orelse = self.block(node.orelse)
+        elif isinstance(node, (DoWhile, MethodDecl)):
+            node.body = self.block(node.body)
+        elif isinstance(node, For):
+            loop = vectorize_loop(node)
+            if isinstance(loop, VectorLoop):
+                self.vectorized += 1
+                return loop
+            self.rejected[loop] = self.rejected.get(loop, 0) + 1
+            node.body = self.block(node.body)  # Inner loops may still qualify
+        return node
+
+    def report(self):
+        """Return the loops vectorized and the reasons others were not, as lines of text."""
+        lines = [f"vectorized loops: {self.vectorized}"]
+        for reason, count in sorted(self.rejected.items(), key=lambda item: -item[1]):
+            lines.append(f"kept scalar ({count}): {reason}")
+        return lines
@@ -0,0 +1,273 @@
+"""Virtual machine that runs three-address code.
+
+assemble() lowers Quads into Bytecode: a flat array of fixed-width
+instructions, WIDTH integers each (opcode, a, b, c). Every operand is resolved
+ahead of time to a slot in one register list that holds every variable, temp
+and constant, so running an instruction never looks at operand kinds or
+names. Labels are dropped and jumps hold the index of the instruction
+they go to.
+
+Container instructions call into runtime: a register holds the function for
+each method (or, for new, for the container type) the code uses, and CALL and
+CALL_VOID call it with the container. A vector instruction becomes VECTOR,
+which hands the whole register list to vectorizer.run_registers().
+
+Lowering also fuses the patterns the generator emits around every branch:
+
+    t = a < b; if t goto L                  ->  LT_JUMP a b L   (when t is dead after the jump)
+    if c goto L1; goto L2; L1:              ->  JUMP_UNLESS c L2
+    t = a < b; if t goto L1; goto L2; L1:   ->  NOT_LT_JUMP a b L2
+
+run() executes the bytecode with a single dispatch loop over the register list.
+"""
+from array import array
+from functools import partial
+
+from zara.cfg import CFG
+from zara.dataflow import Liveness
+from zara.tac_ir import OPCODE_OF, VALUE_METHODS, VOID_METHODS, KIND_MASK, KIND_BITS, NAME, CONST, TEMP
+
+# Bytecode opcodes, most frequent first, since run() tests them in this order.
+# LOAD c = a[b], STORE c[b] = a, CALL c = a(b), VECTOR c = a(registers), CALL_VOID a(b, c)
+(MOVE, ADD, SUB, MUL, LT_JUMP, GT_JUMP, EQ_JUMP, NOT_LT_JUMP, NOT_GT_JUMP, NOT_EQ_JUMP,
+ JUMP_UNLESS, JUMP_IF, JUMP, LT, GT, EQ, DIV, LOAD, STORE, CALL, VECTOR, CALL_VOID) = range(22)
+OPNAMES = ("MOVE", "ADD", "SUB", "MUL", "LT_JUMP", "GT_JUMP", "EQ_JUMP", "NOT_LT_JUMP", "NOT_GT_JUMP", "NOT_EQ_JUMP",
+           "JUMP_UNLESS", "JUMP_IF", "JUMP", "LT", "GT", "EQ", "DIV", "LOAD", "STORE", "CALL", "VECTOR", "CALL_VOID")
+WIDTH = 4
+
+TAC_COPY, TAC_IF, TAC_GOTO, TAC_LABEL = OPCODE_OF['='], OPCODE_OF['if'], OPCODE_OF['goto'], OPCODE_OF['label']
+TAC_LOAD, TAC_STORE, TAC_NEW, TAC_VECTOR = OPCODE_OF['[]'], OPCODE_OF['[]='], OPCODE_OF['new'], OPCODE_OF['vector']
+TAC_METHODS = {OPCODE_OF[op]: op for op in VALUE_METHODS + VOID_METHODS}
+ARITHMETIC = {OPCODE_OF['+']: ADD, OPCODE_OF['-']: SUB, OPCODE_OF['*']: MUL, OPCODE_OF['/']: DIV,
+              OPCODE_OF['<']: LT, OPCODE_OF['>']: GT, OPCODE_OF['==']: EQ}
+COMPARE_JUMP = {LT: LT_JUMP, GT: GT_JUMP, EQ: EQ_JUMP}
+COMPARE_SKIP = {LT: NOT_LT_JUMP, GT: NOT_GT_JUMP, EQ: NOT_EQ_JUMP}
+
+
+def divide(left, right):
+    """Zara division: integers divide to an integer rounded toward zero, anything else to a float."""
+    if type(left) is int and type(right) is int:
+        quotient = abs(left) // abs(right)
+        return quotient if (left < 0) == (right < 0) else -quotient
+    return left / right
+
+
+def dead_conditions(cfg):
+    """Return the rows of the conditional jumps whose condition is a temp no instruction reads afterwards."""
+    rows = cfg.rows
+    liveness = Liveness(cfg, live_at_exit=())
+    dead = set()
+    for block in cfg.blocks:
+        if block.end > block.start and rows[block.end - 1][0] == TAC_IF:
+            condition = rows[block.end - 1][1]
+            if condition & KIND_MASK == TEMP and condition not in liveness.live_variables(liveness.live_out[block.index]):
+                dead.add(block.end - 1)
+    return dead
+
+
+class Bytecode:
+    """Assembled instructions and the register layout they refer to."""
+
+    def __init__(self, code, registers, variables):
+        self.code = code  # array of WIDTH ints per instruction
+        self.registers = registers  # Initial register contents: constants hold their values, the rest None
+        self.variables = variables  # Variable name to register
+
+    def __len__(self):
+        return len(self.code) // WIDTH
+
+    def instructions(self):
+        """Return the instructions as (opcode, a, b, c) tuples."""
+        code = self.code
+        return [tuple(code[index:index + WIDTH]) for index in range(0, len(code), WIDTH)]
+
+    def disassemble(self):
+        """Return the instructions as lines of text."""
+        return [f"{index:5} {OPNAMES[op]:12} {a:6} {b:6} {c:6}"
+                for index, (op, a, b, c) in enumerate(self.instructions())]
+
+
+def assemble(quads):
+    """Lower Quads into Bytecode."""
+    rows = quads.rows()
+    dead_after = dead_conditions(CFG(rows))
+
+    slots = {}  # Packed operand to register
+    variables = {}
+    registers = []
+
+    def slot(operand):
+        register = slots.get(operand)
+        if register is None:
+            register = slots[operand] = len(slots)
+            kind = operand & KIND_MASK
+            if kind == NAME:
+                variables[quads.names.names[operand >> KIND_BITS]] = register
+            registers.append(quads.value(operand) if kind == CONST else None)
+        return register
+
+    def function(key, make):
+        # A register holding a function, made the first time the code calls it
+        register = slots.get(key)
+        if register is None:
+            register = slots[key] = len(slots)
+            registers.append(make())
+        return register
+
+    code = []
+    label_at = {}  # Packed label operand to the instruction it marks
+    patches = []  # Positions in code that hold a packed label operand until labels are placed
+    count = len(rows)
+
+    def branches_around(index, label):
+        # if c goto label; goto elsewhere; label:
+        return (index + 2 < count and rows[index + 1][0] == TAC_GOTO
+                and rows[index + 2][0] == TAC_LABEL and rows[index + 2][1] == label)
+
+    index = 0
+    while index < count:
+        op, arg1, arg2, result = rows[index]
+        if op == TAC_LABEL:
+            label_at[arg1] = len(code) // WIDTH
+            index += 1
+            continue
+        if op == TAC_COPY:
+            code += (MOVE, slot(arg1), 0, slot(result))
+        elif op in ARITHMETIC:
+            following = rows[index + 1] if index + 1 < count else None
+            if (ARITHMETIC[op] in COMPARE_JUMP and following is not None and following[0] == TAC_IF
+                    and following[1] == result and index + 1 in dead_after):
+                if branches_around(index + 1, following[3]):
+                    code += (COMPARE_SKIP[ARITHMETIC[op]], slot(arg1), slot(arg2), rows[index + 2][3])
+                    index += 3
+                else:
+                    code += (COMPARE_JUMP[ARITHMETIC[op]], slot(arg1), slot(arg2), following[3])
+                    index += 2
+                patches.append(len(code) - 1)
+                continue
+            code += (ARITHMETIC[op], slot(arg1), slot(arg2), slot(result))
+        elif op == TAC_IF:
+            if branches_around(index, result):
+                code += (JUMP_UNLESS, slot(arg1), 0, rows[index + 1][3])
+                index += 1  # The goto is folded in; the label is placed as usual
+            else:
+                code += (JUMP_IF, slot(arg1), 0, result)
+            patches.append(len(code) - 1)
+        elif op == TAC_GOTO:
+            code += (JUMP, 0, 0, result)
+            patches.append(len(code) - 1)
+        elif op == TAC_LOAD or op == TAC_STORE:
+            code += (LOAD if op == TAC_LOAD else STORE, slot(arg1), slot(arg2), slot(result))
+        elif op == TAC_NEW:
+            from zara import runtime  # Not at the top: runtime imports this module
+            data_type = quads.value(arg1)
+            code += (CALL, function(("new", data_type), lambda: partial(runtime.allocate, data_type)), slot(arg2),
+                     slot(result))
+        elif op in TAC_METHODS:
+            from zara import runtime
+            method = TAC_METHODS[op]
+            call = function(method, lambda: runtime.METHODS[method])
+            if method in VOID_METHODS:
+                code += (CALL_VOID, call, slot(arg1), slot(arg2))
+            else:
+                code += (CALL, call, slot(arg1), slot(result))
+        elif op == TAC_VECTOR:
+            from zara import vectorizer
+            text = quads.value(arg1)
+            # variables is filled in by the time the code runs, with every variable the program uses
+            code += (VECTOR, function(("vector", text), lambda: partial(vectorizer.run_registers, text, variables)), 0,
+                     slot(result))
+        index += 1
+
+    end = len(code) // WIDTH
+    for position in patches:
+        code[position] = label_at.get(code[position], end)  # A label outside the code ends the run
+    return Bytecode(array('l', code), registers, variables)
+
+
+class VM:
+    """Runs Bytecode."""
+
+    def __init__(self, bytecode):
+        self.bytecode = bytecode
+        self.instructions = bytecode.instructions()
+        self.registers = None
+        self.executed = 0  # Instructions run by the last run()
+
+    def run(self):
+        """Run the program from the start with fresh registers and return the values of its variables."""
+        instructions = self.instructions
+        registers = list(self.bytecode.registers)
+        end = len(instructions)
+        pc = 0
+        executed = 0
+        while pc < end:
+            op, a, b, c = instructions[pc]
+            executed += 1
+            pc += 1
+            if op == MOVE:
+                registers[c] = registers[a]
+            elif op == ADD:
+                registers[c] = registers[a] + registers[b]
+            elif op == SUB:
+                registers[c] = registers[a] - registers[b]
+            elif op == MUL:
+                registers[c] = registers[a] * registers[b]
+            elif op == LT_JUMP:
+                if registers[a] < registers[b]:
+                    pc = c
+            elif op == GT_JUMP:
+                if registers[a] > registers[b]:
+                    pc = c
+            elif op == EQ_JUMP:
+                if registers[a] == registers[b]:
+                    pc = c
+            elif op == NOT_LT_JUMP:
+                if not registers[a] < registers[b]:
+                    pc = c
+            elif op == NOT_GT_JUMP:
+                if not registers[a] > registers[b]:
+                    pc = c
+            elif op == NOT_EQ_JUMP:
+                if not registers[a] == registers[b]:
+                    pc = c
+            elif op == JUMP_UNLESS:
+                if not registers[a]:
+                    pc = c
+            elif op == JUMP_IF:
+                if registers[a]:
+                    pc = c
+            elif op == JUMP:
+                pc = c
+            elif op == LT:
+                registers[c] = int(registers[a] < registers[b])
+            elif op == GT:
+                registers[c] = int(registers[a] > registers[b])
+            elif op == EQ:
+                registers[c] = int(registers[a] == registers[b])
+            elif op == DIV:
+                registers[c] = divide(registers[a], registers[b])
+            elif op == LOAD:
+                registers[c] = registers[a][registers[b]]
+            elif op == STORE:
+                registers[c][registers[b]] = registers[a]
+            elif op == CALL:
+                registers[c] = registers[a](registers[b])
+            elif op == VECTOR:
+                registers[c] = registers[a](registers)
+            else:
+                registers[a](registers[b], registers[c])
+        self.registers = registers
+        self.executed = executed
+        return self.values()
+
+    def values(self):
+        """Return the variables the last run() assigned, by name."""
+        registers = self.registers
+        return {name: registers[register] for name, register in self.bytecode.variables.items()
+                if registers[register] is not None}
+
+
+def run(quads):
+    """Assemble and run quads, returning the values of their variables."""
+    return VM(assemble(quads)).run()
@@ -0,0 +1,230 @@
+"""The full Zara grammar for the LALR(1) engine in lalr.py.
+
+LALRParser is a bottom-up alternative to the recursive-descent Parser and
+builds the same trees. Its tables are built once per grammar change and then
+loaded from a per-user cache directory: $ZARA_CACHE_DIR if set, else zara
+under $XDG_CACHE_HOME (~/.cache by default). Nothing is written into the
+installed package, which may be read-only or shared by several users.
+"""
+import os
+
+from zara.lexer import TokenType
+from zara.lalr import Grammar, LRParser, Recovery, load_or_build
+from zara.ast_nodes import (Program, VarDecl, Assign, ExprStatement, If, DoWhile, For, Return, MethodDecl,
+                       ClassDecl, BinOp, Literal, Name, Call, Member, Index, New, ArrayLiteral, LVALUES)
+
+
+def default_cache_dir():
+    """Return the directory the LALR tables are cached in, read from the environment on each call."""
+    if os.environ.get("ZARA_CACHE_DIR"):
+        return os.environ["ZARA_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "zara")
+
+
+# Loosest binding first; comparisons do not chain
+PRECEDENCE = [
+    ("right", ["="]),
+    ("nonassoc", ["=="]),
+    ("nonassoc", ["<", ">"]),
+    ("left", ["+", "-"]),
+    ("left", ["*", "/"]),
+]
+
+
+def located(node, first, last):
+    """Give node the source span from the start of first to the end of last (tokens or nodes)."""
+    node.start = first.start
+    node.end = last.end
+    return node
+
+
+def append(items, item):
+    if item is not None:
+        items.append(item)
+    return items
+
+
+def assign(target, value, first, last):
+    if not isinstance(target, LVALUES):
+        raise SyntaxError(f"Cannot assign to {type(target).__name__}")
+    return located(Assign(target, value), first, last)
+
+
+def binary(p):
+    return located(BinOp(p[1].value, p[0], p[2]), p[0], p[2])
+
+
+def expression_statement(expr, last):
+    return expr if isinstance(expr, Assign) else located(ExprStatement(expr), expr, last)
+
+
+def increment(target, token):
+    one = located(Literal(1), token, token)
+    if not isinstance(target, LVALUES):
+        raise SyntaxError(f"Cannot increment {type(target).__name__}")
+    return located(Assign(target, located(BinOp("+", target, one), target, token)), target, token)
+
+
+def for_loop(p):
+    init = p[2]
+    if init is not None and not isinstance(init, (VarDecl, Assign)):
+        init = located(ExprStatement(init), init, init)
+    return located(For(init, p[4], p[6], p[8][0]), p[0], p[8][1])
+
+
+RULES = [
+    ("program", "items", lambda p: Program(p[0])),
+    ("items", "", lambda p: []),
+    ("items", "items item", lambda p: append(p[0], p[1])),
+    ("item", "statement", lambda p: p[0]),
+    ("item", "method", lambda p: p[0]),
+    ("item", "class_decl", lambda p: p[0]),
+
+    ("statements", "", lambda p: []),
+    ("statements", "statements statement", lambda p: append(p[0], p[1])),
+    ("statement", "declaration", lambda p: p[0]),
+    ("statement", "expr ';'", lambda p: expression_statement(p[0], p[1])),
+    ("statement", "';'", lambda p: None),
+    ("statement", "if_stmt", lambda p: p[0]),
+    ("statement", "'do' block 'while' '(' expr ')' ';'",
+     lambda p: located(DoWhile(p[1][0], p[4]), p[0], p[6])),
+    ("statement", "'for' '(' for_init ';' opt_expr ';' opt_expr ')' block", for_loop),
+    ("statement", "'return' expr ';'", lambda p: located(Return(p[1]), p[0], p[2])),
+    ("statement", "'return' ';'", lambda p: located(Return(None), p[0], p[1])),
+
+    ("declaration", "type IDENTIFIER ';'", lambda p: located(VarDecl(p[0][0], p[1].value, None), p[0][1], p[2])),
+    ("declaration", "type IDENTIFIER '=' expr ';'",
+     lambda p: located(VarDecl(p[0][0], p[1].value, p[3]), p[0][1], p[4])),
+    ("method", "type IDENTIFIER '(' params ')' block",
+     lambda p: located(MethodDecl(p[0][0], p[1].value, p[3], p[5][0]), p[0][1], p[5][1])),
+    ("params", "", lambda p: []),
+    ("params", "param_list", lambda p: p[0]),
+    ("param_list", "param", lambda p: [p[0]]),
+    ("param_list", "param_list ',' param", lambda p: append(p[0], p[2])),
+    ("param", "type IDENTIFIER", lambda p: (p[0][0], p[1].value)),
+
+    ("class_decl", "'class' IDENTIFIER '{' members '}'",
+     lambda p: located(ClassDecl(p[1].value, p[3]), p[0], p[4])),
+    ("members", "", lambda p: []),
+    ("members", "members member", lambda p: append(p[0], p[1])),
+    ("member", "declaration", lambda p: p[0]),
+    ("member", "method", lambda p: p[0]),
+    ("member", "IDENTIFIER '(' params ')' block",
+     lambda p: located(MethodDecl(None, p[0].value, p[2], p[4][0]), p[0], p[4][1])),
+
+    # A type is (text, first token) so that declarations can start their span at the type
+    ("type", "'int'", lambda p: (p[0].value, p[0])),
+    ("type", "'float'", lambda p: (p[0].value, p[0])),
+    ("type", "'string'", lambda p: (p[0].value, p[0])),
+    ("type", "'void'", lambda p: (p[0].value, p[0])),
+    ("type", "IDENTIFIER", lambda p: (p[0].value, p[0])),
+    ("type", "'array' '<' type '>'", lambda p: (f"array<{p[2][0]}>", p[0])),
+    ("type", "'stack' '<' type '>'", lambda p: (f"stack<{p[2][0]}>", p[0])),
+    ("type", "'function' '<' type_list '>'", lambda p: (f"function<{','.join(p[2])}>", p[0])),
+    ("type_list", "type", lambda p: [p[0][0]]),
+    ("type_list", "type_list ',' type", lambda p: append(p[0], p[2][0])),
+
+    # A block is (statements, closing brace)
+    ("block", "'{' statements '}'", lambda p: (p[1], p[2])),
+    ("if_stmt", "'if' '(' expr ')' block", lambda p: located(If(p[2], p[4][0], None), p[0], p[4][1])),
+    ("if_stmt", "'if' '(' expr ')' block 'else' block",
+     lambda p: located(If(p[2], p[4][0], p[6][0]), p[0], p[6][1])),
+    ("if_stmt", "'if' '(' expr ')' block 'else' if_stmt",
+     lambda p: located(If(p[2], p[4][0], [p[6]]), p[0], p[6])),
+    ("for_init", "", lambda p: None),
+    ("for_init", "type IDENTIFIER '=' expr", lambda p: located(VarDecl(p[0][0], p[1].value, p[3]), p[0][1], p[3])),
+    ("for_init", "expr", lambda p: p[0]),
+    ("opt_expr", "", lambda p: None),
+    ("opt_expr", "expr", lambda p: p[0]),
+
+    ("expr", "expr '=' expr", lambda p: assign(p[0], p[2], p[0], p[2])),
+    ("expr", "expr '==' expr", binary),
+    ("expr", "expr '<' expr", binary),
+    ("expr", "expr '>' expr", binary),
+    ("expr", "expr '+' expr", binary),
+    ("expr", "expr '-' expr", binary),
+    ("expr", "expr '*' expr", binary),
+    ("expr", "expr '/' expr", binary),
+    ("expr", "postfix", lambda p: p[0]),
+
+    ("postfix", "primary", lambda p: p[0]),
+    ("postfix", "postfix '(' args ')'", lambda p: located(Call(p[0], p[2]), p[0], p[3])),
+    ("postfix", "postfix '.' IDENTIFIER", lambda p: located(Member(p[0], p[2].value), p[0], p[2])),
+    ("postfix", "postfix '[' expr ']'", lambda p: located(Index(p[0], p[2]), p[0], p[3])),
+    ("postfix", "postfix '++'", lambda p: increment(p[0], p[1])),
+
+    ("primary", "LITERAL", lambda p: located(Literal(p[0].value), p[0], p[0])),
+    ("primary", "IDENTIFIER", lambda p: located(Name(p[0].value), p[0], p[0])),
+    ("primary", "'this'", lambda p: located(Name(p[0].value), p[0], p[0])),
+    ("primary", "'(' expr ')'", lambda p: p[1]),
+    ("primary", "'new' IDENTIFIER '(' args ')'", lambda p: located(New(p[1].value, p[3]), p[0], p[4])),
+    ("primary", "'[' args ']'", lambda p: located(ArrayLiteral(p[1], None), p[0], p[2])),
+    ("args", "", lambda p: []),
+    ("args", "arg_list", lambda p: p[0]),
+    ("arg_list", "expr", lambda p: [p[0]]),
+    ("arg_list", "arg_list ',' expr", lambda p: append(p[0], p[2])),
+]
+
+GRAMMAR = Grammar(RULES, PRECEDENCE)
+
+# After a syntax error, drop the broken statement or class member and carry on with the next one
+RECOVERY = Recovery(resume=["statement", "member"], terminator=";", opening="{", closing="}")
+
+# Token types whose value names the terminal, like '(' or 'if'; the others are named by their type
+SYMBOL_TYPES = (TokenType.KEYWORD, TokenType.OPERATOR, TokenType.DELIMITER, TokenType.DATA_TYPE)
+
+_engine = None
+
+
+def get_engine(cache_dir=None):
+    """Return the shared LRParser, loading or building its tables on first use (in default_cache_dir() if not given)."""
+    global _engine
+    if _engine is None:
+        tables = load_or_build(GRAMMAR, cache_dir or default_cache_dir(), "zara_grammar")
+        _engine = LRParser(GRAMMAR, tables, RECOVERY)
+    return _engine
+
+
+def make_terminal_of(grammar):
+    by_value = {}
+    for name in grammar.terminals:
+        if name.startswith("'"):
+            by_value[name[1:-1]] = grammar.symbol_ids[name]
+    identifier, literal = grammar.terminal_id("IDENTIFIER"), grammar.terminal_id("LITERAL")
+
+    def terminal_of(token):
+        if token.type == TokenType.IDENTIFIER:
+            return identifier
+        if token.type == TokenType.LITERAL:
+            return literal
+        if token.type in SYMBOL_TYPES and token.value in by_value:
+            return by_value[token.value]
+        raise SyntaxError(f"Unexpected token {token}")
+
+    return terminal_of
+
+
+terminal_of = make_terminal_of(GRAMMAR)
+
+
+class LALRParser:
+    """Table-driven LALR(1) parser for Zara that produces the same trees as Parser."""
+
+    def __init__(self, tokens, diagnostics=None):
+        self.tokens = tokens
+        self.engine = get_engine()
+        self.diagnostics = diagnostics  # Collects syntax errors instead of raising the first
+
+    def parse(self):
+        """Parse the input tokens into a Program tree."""
+        if self.diagnostics is None:
+            return self.engine.parse(self.tokens, terminal_of)
+        tree = self.engine.parse(self.tokens, terminal_of, self.error)
+        return Program([]) if tree is None else tree
+
+    def error(self, message, token):
+        if token is None:
+            self.diagnostics.add("syntax", message)
+        else:
+            self.diagnostics.add("syntax", message, token.start, token.end)
@@ -0,0 +1,191 @@
+"""zarac: compile many Zara files at once across a pool of worker processes.
+
+    python -m zara.zarac src/ extra.zara -j 32 -O 2 -o build/
+
+Each argument is a .zara file or a directory searched recursively for them.
+Every file is compiled on its own by compile_file in a worker process, which
+writes the TAC to a .tac file (or with --emit zir a binary .zir file, see
+zara.zir, that runs without being compiled again) and sends back only a small CompileResult: a
+status, the instruction count, the diagnostic lines and the time taken. A file
+that cannot be read, or that makes the compiler fail, is reported as failed
+without stopping the others.
+
+Results are collected in the order the files were given, with the files of a
+directory in sorted order, so diagnostics come out the same whatever the
+number of workers. Workers can share a compile cache directory (see
+compile_cache), which is safe across processes.
+"""
+import os
+import sys
+import time
+
+from zara.compiler import compile_source
+from zara.diagnostics import Diagnostics
+from zara.tac_generator import format_instruction
+
+SOURCE_SUFFIX = ".zara"
+OUTPUT_SUFFIX = ".tac"
+# Output formats, by their file suffix
+EMIT_SUFFIXES = {"tac": OUTPUT_SUFFIX, "zir": ".zir"}
+
+# Outcomes of compiling one file
+COMPILED, ERRORS, FAILED = "compiled", "errors", "failed"
+
+# Files handed to a worker at a time are at most this many, and at least one
+MAX_CHUNK = 16
+
+# The CompileCache of each cache directory in this process, kept across files so that its running size
+# estimate is too, and only the first store of a worker scans the directory
+_caches = {}
+
+
+class CompileResult:
+    __slots__ = ("status", "instructions", "lines", "seconds")
+
+    def __init__(self, status, instructions, lines, seconds):
+        self.status = status
+        self.instructions = instructions
+        self.lines = lines  # Formatted diagnostics, or the reason the file failed
+        self.seconds = seconds
+
+    def __reduce__(self):
+        # Sent back from workers as a bare tuple
+        return CompileResult, (self.status, self.instructions, self.lines, self.seconds)
+
+
+def collect(paths, output_dir=None, suffix=OUTPUT_SUFFIX):
+    """Return (source, output) path pairs for the files and directories given, in a stable order.
+
+    Outputs go next to their sources, or under output_dir at the same path
+    relative to the directory argument they were found in.
+    """
+    pairs = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, directories, files in os.walk(path):
+                directories.sort()
+                found.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(SOURCE_SUFFIX))
+            base = path
+        else:
+            found, base = [path], os.path.dirname(path)
+        for source in found:
+            stem = os.path.splitext(source)[0]
+            if output_dir is not None:
+                stem = os.path.join(output_dir, os.path.relpath(stem, base or "."))
+            pairs.append((source, stem + suffix))
+    return pairs
+
+
+def compile_file(source, output, opt_level=0, recycle_temps=False, cache_dir=None, emit="tac"):
+    """Compile one file, writing its TAC to output unless output is None; return a CompileResult.
+
+    emit is the format of the output: "tac" for lines of text, "zir" for a .zir file.
+    """
+    start = time.perf_counter()
+    diagnostics = Diagnostics(source)
+    try:
+        with open(source, "rb") as f:
+            code = f.read().decode("utf-8")
+        cache = shared_cache(cache_dir) if cache_dir else None
+        quads = compile_source(code, diagnostics=diagnostics, opt_level=opt_level, recycle_temps=recycle_temps,
+                               cache=cache)
+        if quads is not None and output is not None:
+            if emit == "zir":
+                from zara import zir
+                zir.write(output, quads)
+            else:
+                write_output(output, quads)
+    except (OSError, UnicodeDecodeError) as error:
+        return CompileResult(FAILED, 0, (f"{source}: cannot compile: {error}",), time.perf_counter() - start)
+    except RecursionError:
+        return CompileResult(FAILED, 0, (f"{source}: nested too deeply to compile",), time.perf_counter() - start)
+    except Exception as error:  # A compiler bug must not take down the other files
+        return CompileResult(FAILED, 0, (f"{source}: internal compiler error: {type(error).__name__}: {error}",),
+                             time.perf_counter() - start)
+    status = ERRORS if diagnostics.count else COMPILED
+    return CompileResult(status, len(quads) if quads is not None else 0, tuple(diagnostics.report()),
+                         time.perf_counter() - start)
+
+
+def shared_cache(directory):
+    """Return this process's CompileCache for directory."""
+    cache = _caches.get(directory)
+    if cache is None:
+        from zara.compile_cache import CompileCache
+        cache = _caches[directory] = CompileCache(directory)
+    return cache
+
+
+def write_output(path, quads):
+    """Write TAC lines to path through a temporary file, so a reader never sees half of it."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        for inst in quads:
+            f.write(format_instruction(inst) + "\n")
+    os.replace(temporary, path)
+
+
+def compile_task(task):
+    return compile_file(*task)
+
+
+def compile_all(tasks, jobs):
+    """Yield a CompileResult for each (source, output, opt_level, recycle_temps, cache_dir[, emit]) task, in order."""
+    jobs = max(1, min(jobs, len(tasks)))
+    if jobs == 1:
+        yield from map(compile_task, tasks)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunk = max(1, min(MAX_CHUNK, len(tasks) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(compile_task, tasks, chunksize=chunk)
+
+
+def main(argv=None):
+    import argparse
+    from zara.opt_levels import OPT_LEVELS
+
+    arguments = argparse.ArgumentParser(prog="zarac", description="Compile Zara files to three-address code.")
+    arguments.add_argument("paths", nargs="+", help=f"{SOURCE_SUFFIX} files, or directories to search for them")
+    arguments.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                           help="worker processes (default: one per CPU)")
+    arguments.add_argument("-O", dest="opt_level", type=int, choices=sorted(OPT_LEVELS), default=0,
+                           help="optimization level (default 0)")
+    arguments.add_argument("--recycle-temps", action="store_true", help="reuse temps whose values are dead")
+    arguments.add_argument("-o", "--output-dir", help="write the output files here instead of beside the sources")
+    arguments.add_argument("--emit", choices=sorted(EMIT_SUFFIXES), default="tac",
+                           help="write TAC as text (.tac, the default) or as binary files that run without "
+                                "compiling (.zir)")
+    arguments.add_argument("--check", action="store_true", help="only report errors; write no output")
+    arguments.add_argument("--cache-dir", help="reuse the output of earlier compiles of the same sources from here")
+    arguments.add_argument("-q", "--quiet", action="store_true", help="do not print the summary line")
+    args = arguments.parse_args(argv)
+    if args.jobs < 1:
+        arguments.error("--jobs must be at least 1")
+
+    pairs = collect(args.paths, args.output_dir, EMIT_SUFFIXES[args.emit])
+    if not pairs:
+        arguments.error(f"no {SOURCE_SUFFIX} files found")
+    tasks = [(source, None if args.check else output, args.opt_level, args.recycle_temps, args.cache_dir, args.emit)
+             for source, output in pairs]
+
+    start = time.perf_counter()
+    counts = {COMPILED: 0, ERRORS: 0, FAILED: 0}
+    instructions = 0
+    for result in compile_all(tasks, args.jobs):
+        counts[result.status] += 1
+        instructions += result.instructions
+        for line in result.lines:
+            print(line, file=sys.stderr)
+    if not args.quiet:
+        print(f"zarac: {len(tasks)} files, {counts[COMPILED]} compiled, {counts[ERRORS]} with errors, "
+              f"{counts[FAILED]} failed; {instructions} instructions in {time.perf_counter() - start:.2f}s "
+              f"with {min(args.jobs, len(tasks))} workers", file=sys.stderr)
+    return 0 if counts[COMPILED] == len(tasks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Binary files of compiled three-address code (.zir).
+
+write() saves Quads to a .zir file that ZirFile maps into memory with mmap
+and reads in place. Opening one only checks its header; an instruction,
+constant or name is unpacked from the mapping when it is read. So a program
+compiled once can start running on another host without being parsed or
+compiled again, and several processes running it share the pages of the file.
+
+A ZirFile has the methods of Quads that the backends read (rows(), value(),
+names.names[...], indexing and iterating), so vm.run(), jit.run() and
+python_backend.compile_program() take one as they take Quads. to_quads()
+copies it into Quads that can be changed.
+
+Every number is little-endian and every section starts at a multiple of 8
+bytes:
+
+    header      HEADER: the magic bytes, the format version, the file size,
+                the count and offset of each section below, and a CRC-32 of
+                the header before it and everything after the header
+    code        one 16-byte INSTRUCTION record per instruction: the opcode and
+                the kinds of arg1, arg2 and result as bytes, then their
+                indices as uint32, the fields of a Quads row
+    constants   one 16-byte record per constant: a type code, 7 bytes of
+                padding and the value, an int64, a float64 or (for strings,
+                and integers too big for 64 bits, as decimal text) the index
+                of a string
+    labels      the label numbers the code defines as sorted uint32s, then as
+                many uint32 instruction indices, so a jump target is found by
+                binary search
+    strings     count + 1 uint32 offsets into UTF-8 text that follows them;
+                string i is the text from offset i to offset i + 1. The first
+                names strings are the names, by id
+
+A file with another magic or version, or one that is damaged, raises
+ValueError. Opening checks the CRC-32 and then, in C loops over the columns,
+that every opcode, operand kind, constant type, string offset and label
+number is in range; a name, constant or string index is checked when it is
+read, and to_quads() checks those of the copy. So a damaged file fails with
+ValueError, never with an error of its own bytes while it is read or run.
+FORMAT_VERSION changes whenever the layout does.
+"""
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import compress
+
+from zara.lexer import Interner
+from zara.tac_ir import OPCODES, OPCODE_OF, KIND_BITS, NAME, CONST, TEMP, LABEL, Quads
+
+SUFFIX = ".zir"
+MAGIC = b"ZIR\0"
+FORMAT_VERSION = 2
+
+# magic, version, flags (none yet), file size, then the count and offset of code, constants, labels and strings,
+# the number of the strings that are names, and the CRC-32 of the rest of the file; padded to ALIGNMENT
+HEADER = struct.Struct("<4sHH11I4x")
+CHECKED_HEADER = HEADER.size - 8  # The bytes of the header before the CRC-32, which it covers
+INSTRUCTION = struct.Struct("<4B3I")
+CONSTANT = struct.Struct("<B7x8s")
+INT64, FLOAT64, UINT32 = struct.Struct("<q"), struct.Struct("<d"), struct.Struct("<I")
+ALIGNMENT = 8
+
+# Constant type codes
+INT, FLOAT, STRING, BIG_INT = range(4)
+
+LABEL_OP = OPCODE_OF['label']
+# The valid values of the byte fields
+OPCODE_BYTES, KIND_BYTES, TYPE_BYTES = bytes(range(len(OPCODES))), bytes(range(LABEL + 1)), bytes(range(BIG_INT + 1))
+
+
+def padding(size):
+    return -size % ALIGNMENT
+
+
+def encode(quads):
+    """Return the bytes of a .zir file holding quads."""
+    strings = list(quads.names.names)
+    constants = bytearray()
+    for value in quads.constants:
+        if type(value) is int and -1 << 63 <= value < 1 << 63:
+            constants += CONSTANT.pack(INT, INT64.pack(value))
+        elif type(value) is float:
+            constants += CONSTANT.pack(FLOAT, FLOAT64.pack(value))
+        elif type(value) in (int, str):
+            constants += CONSTANT.pack(BIG_INT if type(value) is int else STRING, UINT32.pack(len(strings)) + bytes(4))
+            strings.append(str(value))
+        else:
+            raise ValueError(f"cannot store constant {value!r} in a {SUFFIX} file")
+
+    ops, kinds, args = quads.ops, quads.kinds, quads.args
+    code = bytearray(INSTRUCTION.size * len(ops))
+    pack = INSTRUCTION.pack_into
+    labels = []
+    for index in range(len(ops)):
+        base = index * 3
+        pack(code, index * INSTRUCTION.size, ops[index], kinds[base], kinds[base + 1], kinds[base + 2],
+             args[base], args[base + 1], args[base + 2])
+        if ops[index] == LABEL_OP:
+            labels.append((args[base], index))
+    labels.sort()
+    label_table = struct.pack(f"<{2 * len(labels)}I", *[number for number, _ in labels],
+                              *[index for _, index in labels])
+
+    text = bytearray()
+    offsets = [0]
+    for string in strings:
+        text += string.encode("utf-8")
+        offsets.append(len(text))
+    string_table = struct.pack(f"<{len(offsets)}I", *offsets) + text
+
+    sections = [bytes(code), bytes(constants), label_table, string_table]
+    starts = []
+    size = HEADER.size
+    for section in sections:
+        starts.append(size)
+        size += len(section) + padding(len(section))
+    if size >= 1 << 32:
+        raise ValueError(f"program too large for a {SUFFIX} file")
+    body = bytearray()
+    for section in sections:
+        body += section + bytes(padding(len(section)))
+    fields = [MAGIC, FORMAT_VERSION, 0, size, len(ops), starts[0], len(quads.constants), starts[1],
+              len(labels), starts[2], len(strings), starts[3], len(quads.names.names)]
+    checksum = zlib.crc32(body, zlib.crc32(HEADER.pack(*fields, 0)[:CHECKED_HEADER]))
+    return HEADER.pack(*fields, checksum) + bytes(body)
+
+
+def write(path, quads):
+    """Write quads to a .zir file through a temporary file, so a reader never maps half of it."""
+    data = encode(quads)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+class Strings:
+    """The first count strings of a ZirFile's string table, each decoded the first time it is read."""
+
+    def __init__(self, data, table, count, total, path):
+        self.data = data
+        self.path = path
+        self.table = table  # Offset of the uint32 offsets
+        self.text = table + 4 * (total + 1)
+        self.decoded = [None] * count
+
+    def __len__(self):
+        return len(self.decoded)
+
+    def __iter__(self):
+        for index in range(len(self.decoded)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        try:
+            string = self.decoded[index]
+        except IndexError:
+            raise ValueError(f"{self.path}: damaged {SUFFIX} file: string {index} out of range") from None
+        if string is None:
+            if index < 0:
+                index += len(self.decoded)
+            start, end = struct.unpack_from("<2I", self.data, self.table + 4 * index)
+            try:
+                string = self.decoded[index] = str(self.data[self.text + start:self.text + end], "utf-8")
+            except UnicodeDecodeError:
+                raise ValueError(f"{self.path}: damaged {SUFFIX} file: string {index} is not UTF-8") from None
+        return string
+
+
+class Names:
+    """The names of a ZirFile by id, read like the Interner of Quads (names.names[id])."""
+
+    def __init__(self, names):
+        self.names = names
+
+    def __len__(self):
+        return len(self.names)
+
+
+class ZirFile:
+    """A .zir file mapped into memory, read in place; use as a context manager or close() it."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # An empty file cannot be mapped
+                raise ValueError(f"{path}: not a {SUFFIX} file") from None
+        self.data = memoryview(self.map)
+        try:
+            self.read_header()
+        except ValueError:
+            self.close()
+            raise
+
+    def read_header(self):
+        size = len(self.data)
+        if size < HEADER.size or self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path}: not a {SUFFIX} file")
+        (_, self.version, _, expected, self.instructions, self.code, constants, self.constants, self.labels,
+         self.label_table, strings, string_table, names, checksum) = HEADER.unpack_from(self.data)
+        if self.version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: {SUFFIX} format version {self.version} is not supported "
+                             f"(this compiler reads version {FORMAT_VERSION})")
+        sections = ((self.code, INSTRUCTION.size * self.instructions), (self.constants, CONSTANT.size * constants),
+                    (self.label_table, 8 * self.labels), (string_table, 4 * (strings + 1)))
+        if expected != size or names > strings or any(offset + length > size for offset, length in sections):
+            raise ValueError(f"{self.path}: truncated or damaged {SUFFIX} file")
+        if zlib.crc32(self.data[HEADER.size:], zlib.crc32(self.data[:CHECKED_HEADER])) != checksum:
+            raise ValueError(f"{self.path}: damaged {SUFFIX} file: its checksum does not match")
+        self.strings = Strings(self.data, string_table, strings, strings, self.path)
+        self.names = Names(Strings(self.data, string_table, names, strings, self.path))
+        self.decoded = [None] * constants  # Constant values read so far
+        problem = self.check(strings, string_table)
+        if problem is not None:
+            raise ValueError(f"{self.path}: damaged {SUFFIX} file: {problem}")
+
+    def words(self, offset, count):
+        """Return count uint32s from offset as an array."""
+        words = array('I')
+        words.frombytes(self.data[offset:offset + 4 * count])
+        if sys.byteorder != "little":
+            words.byteswap()
+        return words
+
+    def check(self, strings, string_table):
+        """Return what is out of range in the sections, or None if nothing is.
+
+        Name, constant and string indices are checked where they are read instead (see
+        Strings and constant()), which costs nothing here; everything else is checked in C loops.
+        """
+        data, count = self.data, self.instructions
+        code = data[self.code:self.code + INSTRUCTION.size * count]
+        ops = code[::INSTRUCTION.size].tobytes()
+        # translate() deleting every valid byte leaves only the invalid ones
+        if ops.translate(None, OPCODE_BYTES):
+            return "unknown opcode"
+        if any(code[1 + position::INSTRUCTION.size].tobytes().translate(None, KIND_BYTES) for position in range(3)):
+            return "unknown operand kind"
+
+        types = data[self.constants:self.constants + CONSTANT.size * self.constant_count:CONSTANT.size].tobytes()
+        if types.translate(None, TYPE_BYTES):
+            return "unknown constant type"
+
+        offsets = self.words(string_table, strings + 1)
+        if sorted(offsets) != offsets.tolist() or self.strings.text + offsets[-1] > len(data):
+            return "string offsets out of order or past the end"
+
+        numbers = self.words(self.label_table, self.labels).tolist()
+        if sorted(set(numbers)) != numbers or ops.count(LABEL_OP) != self.labels:
+            return "label table does not match the code"
+        return None
+
+    def close(self):
+        if self.map is not None:
+            self.data.release()
+            self.map.close()
+            self.map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def constant(self, index):
+        """Return the value of constant index."""
+        try:
+            value = self.decoded[index]
+        except IndexError:
+            raise ValueError(f"{self.path}: damaged {SUFFIX} file: constant {index} out of range") from None
+        if value is None:
+            kind, raw = CONSTANT.unpack_from(self.data, self.constants + CONSTANT.size * index)
+            if kind == INT:
+                value = INT64.unpack(raw)[0]
+            elif kind == FLOAT:
+                value = FLOAT64.unpack(raw)[0]
+            elif kind == STRING or kind == BIG_INT:
+                value = self.strings[UINT32.unpack_from(raw)[0]]
+                if kind == BIG_INT:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        raise ValueError(f"{self.path}: damaged {SUFFIX} file: constant {index} is not an integer")
+            else:
+                raise ValueError(f"{self.path}: constant {index} has unknown type {kind}")
+            self.decoded[index] = value
+        return value
+
+    @property
+    def constant_count(self):
+        return len(self.decoded)
+
+    def value(self, operand):
+        """Return the value of a packed constant operand."""
+        return self.constant(operand >> KIND_BITS)
+
+    def rows(self):
+        """Return the instructions as [opcode id, arg1, arg2, result] lists of packed operands, as Quads.rows() does."""
+        with self.data[self.code:self.code + INSTRUCTION.size * self.instructions] as code:
+            return [[op, arg1 << KIND_BITS | kind1, arg2 << KIND_BITS | kind2, result << KIND_BITS | kind3]
+                    for op, kind1, kind2, kind3, arg1, arg2, result in INSTRUCTION.iter_unpack(code)]
+
+    def label_index(self, label):
+        """Return the index of the instruction defining label number label, or None if the code has none."""
+        low, high = 0, self.labels
+        while low < high:
+            middle = (low + high) // 2
+            if UINT32.unpack_from(self.data, self.label_table + 4 * middle)[0] < label:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.labels and UINT32.unpack_from(self.data, self.label_table + 4 * low)[0] == label:
+            index = UINT32.unpack_from(self.data, self.label_table + 4 * (self.labels + low))[0]
+            if index >= self.instructions or self[index][:2] != ['label', f"L{label}"]:
+                raise ValueError(f"{self.path}: damaged {SUFFIX} file: label {label} is not at instruction {index}")
+            return index
+        return None
+
+    def operand(self, kind, index):
+        """Decode an operand into the value it is shown as, as Quads.operand() does."""
+        if kind == NAME:
+            return self.names.names[index]
+        if kind == TEMP:
+            return f"t{index}"
+        if kind == CONST:
+            value = self.constant(index)
+            return f'"{value}"' if isinstance(value, str) else value
+        if kind == LABEL:
+            return f"L{index}"
+        return None
+
+    def __len__(self):
+        return self.instructions
+
+    def __getitem__(self, index):
+        """Decode instruction index into an [op, arg1, arg2, result] list."""
+        if index < 0:
+            index += self.instructions
+        if not 0 <= index < self.instructions:
+            raise IndexError("instruction index out of range")
+        op, kind1, kind2, kind3, arg1, arg2, result = INSTRUCTION.unpack_from(self.data,
+                                                                              self.code + INSTRUCTION.size * index)
+        operand = self.operand
+        return [OPCODES[op], operand(kind1, arg1), operand(kind2, arg2), operand(kind3, result)]
+
+    def __iter__(self):
+        for index in range(self.instructions):
+            yield self[index]
+
+    def to_quads(self):
+        """Return a copy of the program as Quads, with the names and constants at the same indices."""
+        names = Interner()
+        for name in self.names.names:
+            names.intern(name)
+        quads = Quads(names)
+        for index in range(self.constant_count):
+            quads.const(self.constant(index))
+        with self.data[self.code:self.code + INSTRUCTION.size * self.instructions] as code:
+            if sys.byteorder == "little":
+                # Each column is a strided slice of the records, copied without unpacking them one by one
+                count = self.instructions
+                quads.ops.frombytes(code[::INSTRUCTION.size].tobytes())
+                quads.kinds.frombytes(bytes(3 * count))
+                quads.args.frombytes(bytes(12 * count))
+                with code.cast('I') as words, memoryview(quads.kinds) as kinds, memoryview(quads.args) as args:
+                    for position in range(3):
+                        kinds[position::3] = code[1 + position::INSTRUCTION.size]
+                        args[position::3] = words[1 + position::INSTRUCTION.size // 4]
+            else:
+                for op, kind1, kind2, kind3, arg1, arg2, result in INSTRUCTION.iter_unpack(code):
+                    quads.ops.append(op)
+                    quads.kinds.extend((kind1, kind2, kind3))
+                    quads.args.extend((arg1, arg2, result))
+        # Reading through this file checks name and constant indices; the copy is not read through it
+        for kind, limit in ((NAME, len(self.names)), (CONST, self.constant_count)):
+            if max(compress(quads.args, map(kind.__eq__, quads.kinds)), default=-1) >= limit:
+                raise ValueError(f"{self.path}: damaged {SUFFIX} file: operand index out of range")
+        return quads